@@ -0,0 +1,99 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Micro-benchmark of the accumulation of the scored comments of a stock. It compares the previous accumulation (one
+`DataFrame.append` per comment then `drop_duplicates` on the text and the user) with the columnar buffer
+`CommentBuffer` (duplicates removed with hash sets when we add the comments, one DataFrame at the end). The scoring
+(`roberta_analysis()`) is not included.
+
+`DataFrame.append` copies the whole DataFrame at each comment, so it is skipped above `--max-append` comments.
+
+Ex: `python -m benchmarks.bench_accumulator --comments 10000 100000`
+"""
+
+import argparse
+import random
+import time
+import pandas as pd
+from perform_stats.comment_buffer import CommentBuffer
+
+columns_sentiment = ['text', 'probability', 'directional', 'source', 'user'] #as in `initialize.py`
+comment_source = ['reddit', 'stocktwit', 'twitter']
+
+
+def comments(nb_comments, duplicate_ratio=0.1):
+    """Return `nb_comments` fake comments (text, probability, directional, source, user) with about
+    `duplicate_ratio` of duplicated texts"""
+
+    random.seed(0)
+    nb_unique = max(1, int(nb_comments * (1 - duplicate_ratio)))
+    return [(f'comment {random.randrange(nb_unique)} about $TSLA', random.uniform(-1, 1),
+             random.choice(['Bullish', 'Bearish', '']), 'stocktwit', f'user{random.randrange(nb_comments)}')
+            for _ in range(nb_comments)]
+
+
+def append_frame(comments_):
+    """Previous accumulation : one `DataFrame.append` per comment, then the duplicates are removed"""
+
+    pd_stock_sentiment = pd.DataFrame(columns=columns_sentiment)
+    for comment in comments_:
+        pd_stock_sentiment = pd_stock_sentiment.append(dict(zip(columns_sentiment, comment)), ignore_index=True)
+    pd_stock_sentiment = pd_stock_sentiment.drop_duplicates(subset=columns_sentiment[0], keep="first",
+                                                            ignore_index=True)
+    return pd_stock_sentiment.drop_duplicates(subset=columns_sentiment[4], keep="first", ignore_index=True)
+
+
+def append_buffer(comments_):
+    """Current accumulation : `CommentBuffer` with the duplicates removed when we add the comments"""
+
+    buffer = CommentBuffer(columns_sentiment, comment_source)
+    for text, probability, directional, source, user in comments_:
+        if not buffer.is_duplicate(text, user, unique_user=True):
+            buffer.append(text, probability, directional, source, user)
+    return buffer.to_frame()
+
+
+def time_it(func, comments_):
+    """Return the time (in s) and the number of rows of `func(comments_)`"""
+
+    start_time = time.perf_counter()
+    rows = len(func(comments_))
+    return time.perf_counter() - start_time, rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comments', type=int, nargs='+', default=[10000, 100000], help='number of comments')
+    parser.add_argument('--max-append', type=int, default=20000,
+                        help='maximum number of comments for the `DataFrame.append` accumulation')
+    args = parser.parse_args()
+
+    print(f'{"comments":>10}{"append (s)":>15}{"buffer (s)":>15}{"rows":>10}')
+    for nb_comments in args.comments:
+        comments_ = comments(nb_comments)
+        buffer_time, rows = time_it(append_buffer, comments_)
+        append_time = '{:.3f}'.format(time_it(append_frame, comments_)[0]) if nb_comments <= args.max_append \
+            else 'skipped'
+        print(f'{nb_comments:>10}{append_time:>15}{buffer_time:>15.3f}{rows:>10}')
@@ -0,0 +1,78 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Benchmark of the page load and scroll time of the browsers with the default profile and with the lean profile
+(no images, no media, no remote fonts, blocked URLs). It needs a network connection as the point is to measure
+what the browser downloads.
+
+Ex: `python -m benchmarks.bench_browser_profile --driver chrome --url https://stocktwits.com/symbol/TSLA` or
+`python -m benchmarks.bench_browser_profile --driver firefox --scrolls 20 --block "*doubleclick.net*"`
+"""
+
+import argparse
+import time
+import web_scrapping.package_methods as pm
+from initialize import chrome_options, firefox_options, firefox_lean_preferences
+
+
+def bench(which_driver, url, nb_scrolls, url_blocklist, pause_time=2):
+    """Return the page load time and the scroll time (seconds) of `url` with each profile of `which_driver`"""
+
+    driver_parameters = {'options_chrome' : chrome_options(), 'options_chrome_lean' : chrome_options(lean=True),
+                         'options_ff' : firefox_options(), 'ff_language' : 'en-US, en',
+                         'ff_lean_preferences' : firefox_lean_preferences(url_blocklist),
+                         'url_blocklist' : url_blocklist}
+    results = {}
+    for profile, lean in [('default', False), ('lean', True)]:
+        driver = pm.initialise_driver(which_driver, driver_parameters, lean)
+        try:
+            start_time = time.perf_counter()
+            driver.get(url)
+            load_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            page_state = driver.execute_script(pm.MUTATION_OBSERVER)
+            for _ in range(nb_scrolls):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                is_loaded, page_state, _ = pm.wait_for_load(driver, page_state, pause_time)
+                if not is_loaded:
+                    break
+            results[profile] = (load_time, time.perf_counter() - start_time)
+        finally:
+            driver.quit()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--driver', default='chrome', choices=['chrome', 'firefox'])
+    parser.add_argument('--url', default='https://stocktwits.com/symbol/TSLA', help='page we load and scroll')
+    parser.add_argument('--scrolls', type=int, default=10, help='number of scrolls')
+    parser.add_argument('--block', nargs='*', default=[], help='URLs (with wildcards) blocked in the lean profile')
+    args = parser.parse_args()
+
+    print(f'{"profile":<10}{"load (s)":>10}{"scroll (s)":>12}')
+    for profile, (load_time, scroll_time) in bench(args.driver, args.url, args.scrolls, args.block).items():
+        print(f'{profile:<10}{load_time:>10.2f}{scroll_time:>12.2f}')
@@ -0,0 +1,98 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Micro-benchmark of the check that tells `scroll_to_value()` to stop scrolling. It compares the previous check (an
+Xpath with one `contains(text(), "hh:mm AM")` clause per minute of the day, evaluated by the browser) with the
+current one (the timestamp of the oldest post read in one script call, `pm.OLDEST_TIMESTAMP`) on a saved page.
+
+Ex: `python -m benchmarks.bench_date_check --posts 2000 --repeat 20` or
+`python -m benchmarks.bench_date_check --page saved_stocktwits_page.html`
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+import web_scrapping.package_methods as pm
+from benchmarks.saved_page import class_time, posts_to_return, save_page, open_page
+
+
+def xpath_buffer(time_ago):
+    """Xpath predicate with one clause per minute between `time_ago` hours ago and yesterday, as it was built
+    before by `StockTwitsApi.buffer_date()` (with repeated string concatenation)"""
+
+    now = datetime.now()
+    search_time = now - timedelta(hours=time_ago)
+    furthest_date = now - timedelta(days=1)
+    date__ = ''
+    while furthest_date.day != search_time.day:
+        date_ = search_time.strftime('%I:%M %p')
+        if date__ == '':
+            date__ += ''.join(['contains(text(),', '"', date_, '")'])
+        else:
+            date__ += ''.join([' or contains(text(),', '"', date_, '")'])
+        search_time -= timedelta(minutes=1)
+    return '//a[@class="{}" and ({})]'.format(class_time, date__)
+
+
+def time_it(func, repeat):
+    """Return the average time (in ms) of `func` over `repeat` calls"""
+
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start_time) / repeat * 1000
+
+
+def bench(page, time_ago, repeat):
+    """Return the average time (ms) of each check on `page`"""
+
+    driver = open_page(page)
+    try:
+        search_time = datetime.now() - timedelta(hours=time_ago)
+        results = {
+            'xpath buffer (ms)' : time_it(lambda: driver.find_elements_by_xpath(xpath_buffer(time_ago)), repeat),
+            'oldest timestamp (ms)' : time_it(
+                lambda: pm.oldest_timestamp(driver, posts_to_return, 'time[datetime]') < search_time, repeat)}
+    finally:
+        driver.quit()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page', help='saved page. By default, a page is generated with `--posts` posts')
+    parser.add_argument('--posts', type=int, default=2000, help='number of posts in the generated page')
+    parser.add_argument('--time-ago', type=int, default=6, help='number of hours in the past we search')
+    parser.add_argument('--repeat', type=int, default=20, help='number of evaluations of each check')
+    args = parser.parse_args()
+
+    page = args.page
+    if page is None:
+        page = os.path.join(tempfile.mkdtemp(), 'stocktwits.html')
+        save_page(args.posts, page)
+    for name, result in bench(page, args.time_ago, args.repeat).items():
+        print(f'{name:<25}{result:>10.2f}')
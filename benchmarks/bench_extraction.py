@@ -0,0 +1,86 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Benchmark of the extraction of the posts on a saved page. It compares the previous extraction (the text of each
+post read one by one, one WebDriver round-trip per post, then parsed with `split('\n')` in python) with the current
+one (all the posts extracted in one script call, `pm.extract_posts()`).
+
+Ex: `python -m benchmarks.bench_extraction --posts 2000` or
+`python -m benchmarks.bench_extraction --page saved_stocktwits_page.html`
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import web_scrapping.package_methods as pm
+from benchmarks.saved_page import posts_to_return, post_layout, save_page, open_page
+
+
+def extract_one_by_one(driver):
+    """Extraction of the posts as it was done before in `scroll_to_value()` and `StockTwitsApi.loop_twits()`"""
+
+    twits = []
+    for twit in [post.text for post in driver.find_elements_by_xpath(posts_to_return)]:
+        user = twit.split('\n')[0:1][0]
+        twit_directional = twit.split('\n')[1:2][0]
+        if 'Bullish' in twit_directional or 'Bearish' in twit_directional:
+            twits.append((user, twit_directional, twit.split('\n', 3)[3:4][0]))
+        else:
+            twits.append((user, '', twit.split('\n', 2)[2:3][0]))
+    return twits
+
+
+def bench(page, repeat):
+    """Return the average time (ms) of each extraction on `page` and the number of posts extracted"""
+
+    driver = open_page(page)
+    results = {}
+    try:
+        for name, extract in [('one by one', extract_one_by_one),
+                              ('one script call', lambda driver: pm.extract_posts(driver, posts_to_return,
+                                                                                  post_layout))]:
+            start_time = time.perf_counter()
+            for _ in range(repeat):
+                nb_posts = len(extract(driver))
+            results[name] = ((time.perf_counter() - start_time) / repeat * 1000, nb_posts)
+    finally:
+        driver.quit()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page', help='saved page. By default, a page is generated with `--posts` posts')
+    parser.add_argument('--posts', type=int, default=2000, help='number of posts in the generated page')
+    parser.add_argument('--repeat', type=int, default=3, help='number of extractions with each method')
+    args = parser.parse_args()
+
+    page = args.page
+    if page is None:
+        page = os.path.join(tempfile.mkdtemp(), 'stocktwits.html')
+        save_page(args.posts, page)
+    for name, (result, nb_posts) in bench(page, args.repeat).items():
+        print(f'{name:<20}{result:>10.2f} ms{nb_posts:>8} posts')
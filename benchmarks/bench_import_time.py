@@ -0,0 +1,94 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Import-time budgets of the entry points of the project, measured with `python -X importtime` in a new process.
+Each scenario has a budget (ms) and a list of modules it must not import (ex: `main.py --help` must not import torch or
+selenium). The exit code is 1 if a scenario crashes, a budget is exceeded or a forbidden module is imported, so that
+it guards the lazy imports of the packages.
+
+Ex: `python -m benchmarks.bench_import_time` or `python -m benchmarks.bench_import_time --budget-scale 2` on a slow
+machine
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+heavy = ['torch', 'transformers', 'selenium', 'webdriver_manager', 'fasttext', 'twilio', 'matplotlib', 'pmaw', 'nltk']
+
+#name : (python code or script with arguments, budget in ms, modules that must not be imported)
+scenarios = {
+    'main.py --help' : (['main.py', '--help'], 1500, heavy),
+    'import packages' : (['-c', 'import web_scrapping, sentiment_analysis, perform_stats, stock_to_trade, run_control'],
+                         100, heavy),
+    'stocktwits api source' : (['-c', 'import web_scrapping; web_scrapping.StockTwitsStream'], 1500,
+                               ['torch', 'transformers', 'selenium', 'webdriver_manager', 'pmaw']),
+    'browser sources' : (['-c', 'import web_scrapping; web_scrapping.StockTwitsApi; web_scrapping.TwitsApi'], 500,
+                         ['torch', 'transformers', 'selenium', 'webdriver_manager', 'pandas', 'requests']),
+    'reddit source' : (['-c', 'import web_scrapping; web_scrapping.RedditApi_'], 2000,
+                       ['torch', 'transformers', 'selenium', 'webdriver_manager']),
+    'instrumentation' : (['-c', 'from run_control.instrumentation import instrumentation'], 50, heavy + ['pandas']),
+}
+
+
+def import_time(arguments):
+    """Return the total import time (ms), the top-level packages imported by `python -X importtime arguments` and
+    its error (last line of stderr, `None` if the exit code is 0)"""
+
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=root, capture_output=True,
+                             text=True)
+    total, modules = 0, set()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip().split('.')[0])
+        if not name[1:].startswith(' '): #top-level import (the nested imports are indented)
+            total += int(cumulative)
+    error = None
+    if process.returncode != 0:
+        lines = [line for line in process.stderr.splitlines() if not line.startswith('import time:')]
+        error = lines[-1] if lines else f'exit code {process.returncode}'
+    return total / 1000, modules, error
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-scale', type=float, default=1., help='multiply all the budgets')
+    args = parser.parse_args()
+
+    failed = False
+    print(f'{"scenario":<25}{"time (ms)":>12}{"budget (ms)":>13}  forbidden imports')
+    for name, (arguments, budget, forbidden) in scenarios.items():
+        total, modules, error = import_time(arguments)
+        imported = sorted(set(forbidden) & modules)
+        over_budget = total > budget * args.budget_scale
+        failed = failed or over_budget or bool(imported) or error is not None
+        print(f'{name:<25}{total:>12.1f}{budget * args.budget_scale:>13.0f}  {", ".join(imported) or "-"}'
+              f'{"  OVER BUDGET" if over_budget else ""}{"  FAILED (" + error + ")" if error is not None else ""}')
+    sys.exit(1 if failed else 0)
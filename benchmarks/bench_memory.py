@@ -0,0 +1,86 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Memory used by the scored comments of a full run on the Stocktwits trending stocks (30 stocks). It compares the
+previous schema of `pd_stock_sentiment` (python strings for the source, directional and user, float64 probability)
+with the compact schema of `CommentBuffer.to_frame()`, with and without the text of the comments.
+
+Ex: `python -m benchmarks.bench_memory --stocks 30 --comments 5000`
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import pandas as pd
+from perform_stats.comment_buffer import CommentBuffer, frame_memory
+from benchmarks.bench_accumulator import columns_sentiment, comment_source
+
+
+def comments(nb_comments, nb_users):
+    """Return `nb_comments` fake comments (text, probability, directional, source, user) written by `nb_users` users"""
+
+    return [(f'comment {i} about $TSLA, to the moon or not {random.random()}', random.uniform(-1, 1),
+             random.choice(['Bullish', 'Bearish', None]), random.choice(comment_source),
+             f'user{random.randrange(nb_users)}') for i in range(nb_comments)]
+
+
+def object_frame(comments_):
+    """Previous schema : python objects for everything except the probability (float64)"""
+
+    frame = pd.DataFrame(comments_, columns=columns_sentiment)
+    for column in [columns_sentiment[0], columns_sentiment[2], columns_sentiment[3], columns_sentiment[4]]:
+        frame[column] = frame[column].astype(object)
+    return frame
+
+
+def compact_frame(comments_, keep_text, text_store):
+    """Compact schema of `CommentBuffer.to_frame()`"""
+
+    buffer = CommentBuffer(columns_sentiment, comment_source, keep_text, text_store)
+    for comment in comments_:
+        buffer.append(*comment)
+    return buffer.to_frame()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stocks', type=int, default=30, help='number of stocks in the run')
+    parser.add_argument('--comments', type=int, default=5000, help='number of comments per stock')
+    parser.add_argument('--users', type=int, default=1500, help='number of users per stock')
+    args = parser.parse_args()
+
+    random.seed(0)
+    text_store = os.path.join(tempfile.mkdtemp(), 'text_store.csv')
+    memory = {'object (MB)' : 0, 'compact (MB)' : 0, 'compact, text hash (MB)' : 0}
+    for _ in range(args.stocks):
+        comments_ = comments(args.comments, args.users)
+        memory['object (MB)'] += frame_memory(object_frame(comments_))
+        memory['compact (MB)'] += frame_memory(compact_frame(comments_, True, None))
+        memory['compact, text hash (MB)'] += frame_memory(compact_frame(comments_, False, text_store))
+
+    for name, result in memory.items():
+        print(f'{name:<25}{result / 2**20:>10.2f}')
+    print(f'{"text store on disk (MB)":<25}{os.path.getsize(text_store) / 2**20:>10.2f}')
@@ -0,0 +1,92 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Synthetic corpora used by the benchmark suite (`suite.py`), so that it runs offline. They are generated with a fixed
+seed, so that two runs of the suite work on the same data"""
+
+import random
+import sqlite3
+import string
+from datetime import datetime, timedelta
+
+words = ['the', 'stock', 'is', 'going', 'to', 'moon', 'buy', 'sell', 'calls', 'puts', 'earnings', 'short', 'squeeze',
+         'bullish', 'bearish', 'hold', 'dip', 'rocket', 'loss', 'gain', 'today', 'tomorrow', 'market', 'price']
+emojis = ['🚀', '🌙', '💎', '🙌', '📉', '📈']
+
+
+def tickers(nb_tickers, seed=0):
+    """Return a dictionary of `nb_tickers` fake tickers with their keywords (as `init.stock_dictionnary`)"""
+
+    rng = random.Random(seed)
+    stocks = {}
+    while len(stocks) < nb_tickers:
+        ticker = ''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 4)))
+        stocks[ticker] = [ticker, ticker.capitalize() + ' Corp']
+    return stocks
+
+
+def twits(nb_twits, stocks=None, seed=0):
+    """Return `nb_twits` fake twits/comments with cashtags, urls, mentions and emojis. One comment in 10 mentions one
+    of the `stocks`"""
+
+    rng = random.Random(seed)
+    stocks = list(stocks or tickers(30))
+    comments = []
+    for _ in range(nb_twits):
+        comment = ' '.join(rng.choice(words) for _ in range(rng.randint(5, 30)))
+        if rng.random() < 0.1:
+            comment += f" ${rng.choice(stocks)}"
+        if rng.random() < 0.3:
+            comment += ' ' + rng.choice(emojis)
+        if rng.random() < 0.1:
+            comment += ' https://t.co/' + ''.join(rng.choice(string.ascii_letters) for _ in range(10))
+        if rng.random() < 0.1:
+            comment = '@user ' + comment
+        comments.append(comment)
+    return comments
+
+
+def news_db(file_name, ticker_db, news_header, days, headlines_per_day, seed=0):
+    """Write a fake news database (as written by `FinnHub`) with `headlines_per_day` headlines per day during `days`
+    days. Return the list of the dates (one per day at 9:30 am)"""
+
+    rng = random.Random(seed)
+    conn_ = sqlite3.connect(file_name)
+    c = conn_.cursor()
+    c.execute(f"DROP TABLE IF EXISTS {ticker_db}")
+    c.execute(f"CREATE TABLE {ticker_db} ({', '.join(news_header)})")
+    start_date = datetime(2021, 8, 2, 9, 30)
+    dates = [start_date + timedelta(days=day) for day in range(days)]
+    rows = []
+    for date_ in dates:
+        for _ in range(headlines_per_day):
+            time_ = (date_ + timedelta(minutes=rng.randint(0, 24 * 60 - 1))).timestamp()
+            headline = ' '.join(rng.choice(words) for _ in range(rng.randint(6, 15)))
+            rows.append(['company', time_, headline, rng.randint(0, 10**9), '', ticker_db[:-1], 'news', '', ''])
+    c.executemany(f"INSERT INTO {ticker_db} VALUES ({','.join(['?'] * len(news_header))})", rows)
+    conn_.commit()
+    conn_.close()
+    return dates
@@ -0,0 +1,67 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Saved page used by the benchmarks of the webscrappers. It has the same structure as a page of Stocktwits (user,
+directional, permalink with the published time, text) so that we can run the benchmarks offline"""
+
+import os
+from datetime import datetime, timedelta
+from selenium.webdriver.chrome.options import Options as opChrome
+import web_scrapping.package_methods as pm
+
+class_time = 'st_28bQfzV st_1E79qOs st_3TuKxmZ st_1VMMH6S'
+class_twits = 'st_29E11sZ st_jGV698i st_1GuPg4J st_qEtgVMo st_2uhTU4W'
+posts_to_return = "//div[@class='{}']".format(class_twits)
+post_layout = {'permalink' : 'a[href*="/message/"]', 'id_pattern' : '/message/(\\d+)',
+               'time_selector' : 'time[datetime]', 'text_line' : 2, 'separator' : '\n', 'directional' : True}
+
+
+def save_page(nb_posts, file_name):
+    """Write a page with `nb_posts` posts (one per minute from now) with the same structure as Stocktwits"""
+
+    now = datetime.now()
+    posts = []
+    for i in range(nb_posts):
+        published = now - timedelta(minutes=i)
+        directional = '<div>Bullish</div>' if i % 3 else ''
+        posts.append(f'<div class="{class_twits}"><div>user{i}</div>{directional}'
+                     f'<a class="{class_time}" href="/user{i}/message/{10**8 - i}">'
+                     f'<time datetime="{published.astimezone().isoformat()}">{published.strftime("%I:%M %p")}'
+                     f'</time></a><div>twit number {i} $TSLA to the moon</div></div>')
+    with open(file_name, 'w') as file:
+        file.write(''.join(['<html><body>', ''.join(posts), '</body></html>']))
+
+
+def open_page(page, driver_parameters=None):
+    """Open the saved `page` in a headless Chrome browser and return the driver"""
+
+    if driver_parameters is None:
+        options = opChrome()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        driver_parameters = {'options_chrome' : options}
+    driver = pm.initialise_driver('chrome', driver_parameters)
+    driver.get('file://' + os.path.abspath(page))
+    return driver
@@ -0,0 +1,191 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Harness of `StockTwitsStream` on recorded pages of the symbol stream (`fixtures/stocktwits`), served locally with
+`http.server` (`init.stocktwits_api` points to it). It checks, without any call to Stocktwits :
+- the paging with the `max` cursor (the twit at the cursor is returned again) until `cursor.more` is false
+- the cutoff on `created_at` : we stop paging once a page has a twit older than `init.time_ago`
+- the directional read in `entities.sentiment.basic` (null or missing when the user didn't choose)
+
+The times of the pages are shifted when they are served so that the newest twit was published now. The exit code is
+1 if a check fails. The fasttext model ('lid.176.bin') must be downloaded as for a run.
+
+Ex: `python -m benchmarks.stream_harness`
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from benchmarks.suite import ConstantModel, fake_init
+
+fixtures_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'fixtures', 'stocktwits')
+date_format = '%Y-%m-%dT%H:%M:%SZ' #format of `created_at` in the API
+
+
+def load_pages(stock):
+    """Return the recorded pages of `stock`. The keys are the `max` cursor of the request (`None` for the first
+    page)"""
+
+    pages = {}
+    for file_name in glob.glob(os.path.join(fixtures_dir, stock + '*.json')):
+        #'AAPL.json' is the first page and 'AAPL.max=1009.json' is the page requested with `max=1009`
+        cursor = os.path.basename(file_name)[len(stock):-len('.json')]
+        with open(file_name, encoding='utf-8') as file_:
+            pages[int(cursor[len('.max='):]) if cursor else None] = json.load(file_)
+    return pages
+
+
+def shift_pages(pages):
+    """Shift the `created_at` of the twits of `pages` so that the newest twit was published now (UTC)"""
+
+    messages = [message for page in pages.values() for message in page['messages']]
+    shift = datetime.utcnow().replace(microsecond=0) \
+        - max(datetime.strptime(message['created_at'], date_format) for message in messages)
+    for message in messages:
+        message['created_at'] = (datetime.strptime(message['created_at'], date_format) + shift).strftime(date_format)
+    return pages
+
+
+def serve(pages):
+    """Serve `pages` (dictionary with the stock as key and its pages as item) on a local port in a thread. Return the
+    server and the list of the requests received (stock, `max` cursor)"""
+
+    requests_ = []
+
+    class StreamHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            stock = os.path.basename(parts.path)[:-len('.json')]
+            cursor = dict(parse_qsl(parts.query)).get('max')
+            cursor = int(cursor) if cursor is not None else None
+            requests_.append((stock, cursor))
+            page = pages.get(stock, {}).get(cursor)
+            body = json.dumps(page if page is not None else {'response' : {'status' : 404}}).encode('utf-8')
+            self.send_response(200 if page is not None else 404)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests_
+
+
+def stream_init(server):
+    """Return the attributes of `InitProject` used by `StockTwitsStream` with the API on the local `server`"""
+
+    from run_control.scheduler import Scheduler
+    init = fake_init()
+    init.stocktwits_api = f'http://127.0.0.1:{server.server_address[1]}/api/2/'
+    init.scheduler = Scheduler(None) #no time budget
+    init.nb_posts = {}
+    return init
+
+
+def expected_twits(pages, hours):
+    """Return the ids of the twits of `pages` published in the last `hours` hours (most recent first)"""
+
+    search_time = datetime.utcnow() - timedelta(hours=hours)
+    return sorted({message['id'] for page in pages.values() for message in page['messages']
+                   if datetime.strptime(message['created_at'], date_format) >= search_time}, reverse=True)
+
+
+def expected_requests(stock, pages, hours):
+    """Return the requests (stock, `max` cursor) to get the twits of `pages` published in the last `hours` hours :
+    we follow the `max` cursor until a page has an older twit or there are no more pages"""
+
+    search_time = datetime.utcnow() - timedelta(hours=hours)
+    requests_, cursor = [], None
+    while True:
+        requests_.append((stock, cursor))
+        page = pages[cursor]
+        oldest_twit = min(datetime.strptime(message['created_at'], date_format) for message in page['messages'])
+        if oldest_twit < search_time or not page['cursor']['more']:
+            return requests_
+        cursor = page['cursor']['max']
+
+
+def check(name, result, expected):
+    """Print the check `name` and return `True` if `result` is `expected`"""
+
+    passed = result == expected
+    print(f'{name:<45}{"ok" if passed else "FAILED : " + str(result) + " instead of " + str(expected)}')
+    return passed
+
+
+def run(stock, cutoff_hours):
+    """Run the checks on the recorded pages of `stock`. Return `True` if they all pass"""
+
+    from web_scrapping.stocktwits_stream import StockTwitsStream
+    pages = shift_pages(load_pages(stock))
+    server, requests_ = serve({stock : pages})
+    passed = True
+    try:
+        init = stream_init(server)
+        stream = StockTwitsStream(init, ConstantModel())
+
+        #paging : all the pages with the `max` cursor of the previous page, each twit once. Cutoff : only the recent
+        #twits and no page after the one with an older twit
+        for name, hours in [('paging', 24 * 365), ('cutoff', cutoff_hours)]:
+            del requests_[:]
+            twits = stream.get_stream(stock, hours)
+            passed &= check(f'{name} : twits', [twit['id'] for twit in twits], expected_twits(pages, hours))
+            passed &= check(f'{name} : requests (max cursor)', requests_, expected_requests(stock, pages, hours))
+
+        #directional : `entities.sentiment.basic` of the twits kept (the others are not in english)
+        init.current_stock = stock
+        stream.stock_twits = stream.get_stream(stock, 24 * 365)
+        frame = stream.write_values().to_frame()
+        directional = {}
+        for twit in stream.stock_twits:
+            sentiment = twit['entities'].get('sentiment') #null or missing if the user didn't choose
+            directional[twit['user']['username']] = sentiment['basic'] if sentiment else ''
+        result = {user : value if isinstance(value, str) else ''
+                  for user, value in zip(frame[init.columns_sentiment[4]], frame[init.columns_sentiment[2]])}
+        passed &= check('directional : twits kept', len(result) > 0, True)
+        passed &= check(f'directional : {len(result)} twits', result, {user : directional[user] for user in result})
+        passed &= check('raw posts recorded', init.nb_posts[init.comment_source[1]][stock], len(stream.stock_twits))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return passed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stock', default='AAPL', help='stock of the recorded pages in `fixtures/stocktwits`')
+    parser.add_argument('--cutoff', type=float, default=1.75, help='lookback window (hours) of the cutoff check')
+    args = parser.parse_args()
+    sys.exit(0 if run(args.stock, args.cutoff) else 1)
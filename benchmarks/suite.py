@@ -0,0 +1,259 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Offline benchmark suite of the hot paths of the project, on the synthetic corpora of `corpus.py`. Each benchmark
+is run `--repeat` times and the median and minimum times are written in a json file with a stable layout (sorted
+keys), so that two runs can be compared. A benchmark whose dependency is missing (ex: the fasttext or Roberta model
+not downloaded) is skipped and reported as such.
+
+Ex:
+    python -m benchmarks.suite --output base.json
+    python -m benchmarks.suite --output new.json --only text_cleanup write_values
+    python -m benchmarks.suite --compare base.json new.json --threshold 0.1
+
+In the comparison mode, the ratio (new / base) of the median time of each benchmark is printed and the exit code is 1
+if a benchmark is slower than `--threshold` (10% by default)
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+import pandas as pd
+from benchmarks import corpus
+
+columns_sentiment = ['text', 'probability', 'directional', 'source', 'user'] #as in `initialize.py`
+columns_metrics = ["Total average sentiment", "Total number of comments", "Stocktwits sentiment accuracy",
+                   "Average sentiment for ", "Nb of comments for "]
+comment_source = ['reddit', 'stocktwit', 'twitter']
+
+
+class ConstantModel():
+    """Model that gives the same score to every comment, to time the code around the inference only"""
+
+    def roberta_analysis(self, twit):
+        return 0.5
+
+    def roberta_batch(self, twits, batch_size=32):
+        return [0.5] * len(twits)
+
+
+def fake_init(stocks=None):
+    """Return the attributes of `InitProject` used by the hot paths (without reading the .env file or starting a
+    browser)"""
+
+    from perform_stats.comment_buffer import CommentBuffer
+    from perform_stats.comment_sample import CommentSample
+    from perform_stats.sequential_test import SequentialTest
+    from run_control.scheduler import Scheduler
+    return SimpleNamespace(columns_sentiment=columns_sentiment, comment_source=comment_source,
+                           columns_metrics=columns_metrics, comment_buffer=CommentBuffer(columns_sentiment,
+                                                                                         comment_source),
+                           stock_dictionnary=stocks or {}, current_stock='', pd_metrics=pd.DataFrame(),
+                           pd_stock_sentiment=pd.DataFrame(columns=columns_sentiment),
+                           comment_budget=None, comment_sample=CommentSample(None), early_stop=False,
+                           sequential_test=SequentialTest(False, 0, 0.), scheduler=Scheduler(None))
+
+
+def load_roberta():
+    """Return `TwitAnalysis` with the Roberta model already downloaded (no network call)"""
+
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    from sentiment_analysis.twits_analysis import TwitAnalysis
+    model_name = "cardiffnlp/twitter-roberta-base-sentiment"
+    twit_analysis = TwitAnalysis.__new__(TwitAnalysis)
+    twit_analysis.tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+    twit_analysis.model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=True)
+    twit_analysis.labels = ['negative', 'neutral', 'positive'] #mapping of the model
+    return twit_analysis
+
+
+def bench_text_cleanup(scale):
+    import web_scrapping.package_methods as pm
+    twits = corpus.twits(int(20000 * scale))
+    return lambda: [pm.text_cleanup(twit) for twit in twits], len(twits)
+
+
+def bench_detect_lang(scale):
+    from web_scrapping.package_methods import PackageMethods
+    package_methods = PackageMethods()
+    twits = corpus.twits(int(20000 * scale))
+    return lambda: [package_methods.detect_lang(twit) for twit in twits], len(twits)
+
+
+def bench_roberta_single(scale):
+    twit_analysis = load_roberta()
+    twits = corpus.twits(max(1, int(200 * scale)))
+    return lambda: [twit_analysis.roberta_analysis(twit) for twit in twits], len(twits)
+
+
+def bench_roberta_batch(scale):
+    twit_analysis = load_roberta()
+    twits = corpus.twits(max(1, int(200 * scale)))
+    return lambda: twit_analysis.roberta_batch(twits), len(twits)
+
+
+def bench_reddit_loop(scale):
+    from web_scrapping.reddit_api import RedditApi_
+    stocks = corpus.tickers(30)
+    reddit = RedditApi_.__new__(RedditApi_) #without the Pushshift API
+    reddit.init = fake_init(stocks)
+    reddit.roberta = ConstantModel()
+    reddit.reddit_comments = corpus.twits(int(100000 * scale), stocks)
+    reddit.reddit_times = [] #unknown time, as for the comments of the journal
+
+    def loop_comments():
+        for stock in stocks:
+            reddit.init.current_stock = stock
+            reddit.init.comment_buffer.clear()
+            reddit.write_values()
+    return loop_comments, len(reddit.reddit_comments) * len(stocks)
+
+
+def bench_write_values(scale):
+    import web_scrapping.package_methods as pm
+    init = fake_init()
+    twits = corpus.twits(int(20000 * scale))
+    model = ConstantModel()
+
+    def write_values():
+        init.comment_buffer.clear()
+        for i, twit in enumerate(twits):
+            pm.write_values(twit, init, model, 1, {}, user=f'user{i % 5000}', unique_user=True)
+        return init.comment_buffer.to_frame()
+    return write_values, len(twits)
+
+
+def bench_calculate_metrics(scale):
+    from perform_stats.calculate_metrics import CalculateMetrics
+    stocks = corpus.tickers(30)
+    init = fake_init(stocks)
+    twits = corpus.twits(int(5000 * scale))
+    for i, twit in enumerate(twits):
+        init.comment_buffer.append(twit, (i % 200) / 100 - 1, None, comment_source[i % 3], f'user{i}')
+    init.pd_stock_sentiment = init.comment_buffer.to_frame()
+    calculate_metrics = CalculateMetrics(init)
+
+    def metrics():
+        for stock in stocks:
+            init.current_stock = stock
+            calculate_metrics()
+    return metrics, len(stocks)
+
+
+def bench_vader(scale):
+    from sentiment_analysis.vader_analysis import VaderAnalysis
+    vader = VaderAnalysis()
+    vader.file_name = os.path.join(tempfile.mkdtemp(), 'financial_data.db')
+    days = max(2, int(60 * scale))
+    dates = corpus.news_db(vader.file_name, 'FSR_', vader.news_header, days, 50)
+    hist_price = pd.DataFrame({'date' : dates})
+    return lambda: vader('FSR_', hist_price.copy()), days * 50
+
+
+#name of the benchmark : (function that returns the callable to time and the number of items, default repeat)
+benchmarks = {'text_cleanup' : (bench_text_cleanup, 5),
+              'detect_lang' : (bench_detect_lang, 5),
+              'roberta_single' : (bench_roberta_single, 3),
+              'roberta_batch' : (bench_roberta_batch, 3),
+              'reddit_loop_comments' : (bench_reddit_loop, 1),
+              'write_values' : (bench_write_values, 5),
+              'calculate_metrics' : (bench_calculate_metrics, 5),
+              'vader_analysis' : (bench_vader, 3)}
+
+
+def run(names, scale, repeat=None):
+    """Run the benchmarks `names` and return their results"""
+
+    results = {}
+    for name in names:
+        setup, default_repeat = benchmarks[name]
+        try:
+            func, items = setup(scale)
+        except Exception as e:
+            results[name] = {'status' : f'skipped: {type(e).__name__}: {e}'}
+            print(f'{name:<25}skipped ({type(e).__name__})', file=sys.stderr)
+            continue
+        times = []
+        for _ in range(repeat or default_repeat):
+            start_time = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start_time)
+        median = statistics.median(times)
+        results[name] = {'status' : 'ok', 'items' : items, 'repeat' : len(times), 'median_s' : round(median, 6),
+                         'min_s' : round(min(times), 6), 'items_per_s' : round(items / median, 1) if median else None}
+        print(f'{name:<25}{median:>12.4f} s{items / median if median else 0:>15.0f} items/s', file=sys.stderr)
+    return results
+
+
+def compare(base_file, new_file, threshold):
+    """Print the ratio (new / base) of the median time of each benchmark and return the benchmarks slower than
+    `threshold`"""
+
+    with open(base_file, encoding='utf-8') as file_:
+        base = json.load(file_)['results']
+    with open(new_file, encoding='utf-8') as file_:
+        new = json.load(file_)['results']
+    regressions = []
+    print(f'{"benchmark":<25}{"base (s)":>12}{"new (s)":>12}{"ratio":>8}')
+    for name in sorted(set(base) & set(new)):
+        if base[name]['status'] != 'ok' or new[name]['status'] != 'ok':
+            print(f'{name:<25}{"skipped":>12}')
+            continue
+        ratio = new[name]['median_s'] / base[name]['median_s']
+        flag = '  REGRESSION' if ratio > 1 + threshold else ''
+        print(f'{name:<25}{base[name]["median_s"]:>12.4f}{new[name]["median_s"]:>12.4f}{ratio:>8.2f}{flag}')
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=list(benchmarks), help='benchmarks to run (default: all)')
+    parser.add_argument('--scale', type=float, default=1., help='size of the corpora (1 = 100k reddit comments)')
+    parser.add_argument('--repeat', type=int, help='number of runs of each benchmark (default: per benchmark)')
+    parser.add_argument('--output', help='json file with the results (default: standard output)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='compare two json files of results')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slowdown reported as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    report = {'meta' : {'python' : platform.python_version(), 'platform' : platform.platform(), 'scale' : args.scale},
+              'results' : run(args.only or list(benchmarks), args.scale, args.repeat)}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file_:
+            file_.write(text + '\n')
+    else:
+        print(text)
@@ -30,16 +30,16 @@ from pathlib import Path
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
 import re
-import requests
 import bs4 as bs
 import pandas as pd
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options as opChrome
-from webdriver_manager.firefox import GeckoDriverManager
-from selenium.webdriver.firefox.options import Options as opFireFox
 from decouple import config
 import logging
+from perform_stats.comment_buffer import CommentBuffer
+from perform_stats.comment_sample import CommentSample
+from perform_stats.sequential_test import SequentialTest
+from run_control.scheduler import Scheduler
+from web_scrapping.http_client import http_client
+from web_scrapping.http_cache import HttpCache
 
 
 def get_tickers():
@@ -50,7 +50,7 @@ def get_tickers():
     `tickers` : list
         S&P 500 company symbols
     """
-    resp = requests.get('http://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
+    resp = http_client.get('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
     soup = bs.BeautifulSoup(resp.text, 'lxml')
     table = soup.find_all('table')[0]  # Grab the first table
 
@@ -62,6 +62,82 @@ def get_tickers():
     return tickers
 
 
+def chrome_options(lean=False):
+    """Function that returns the options of the Chrome driver. The lean profile (`lean=True`) doesn't load the
+    images, the media and the remote fonts and disables the features we don't need to webscrap (sync, translate,
+    background networking, etc.). The URLs in `InitProject.url_blocklist` are blocked in `initialise_driver()`"""
+
+    from selenium.webdriver.chrome.options import Options as opChrome
+    options_chrome = opChrome()
+    #options_chrome.add_argument("--disable-gpu")
+    options_chrome.add_argument("--disable-extensions")
+    options_chrome.add_argument("--no-sandbox")
+    options_chrome.add_argument("--headless")
+    #options_chrome.add_argument("--disable-dev-shm-usage")
+    options_chrome.add_argument( "--window-size=1920,1080")
+
+    if lean:
+        options_chrome.add_argument("--blink-settings=imagesEnabled=false")
+        options_chrome.add_argument("--mute-audio")
+        options_chrome.add_argument("--autoplay-policy=user-gesture-required")
+        options_chrome.add_argument("--disable-remote-fonts")
+        options_chrome.add_argument("--disable-background-networking")
+        options_chrome.add_argument("--disable-component-update")
+        options_chrome.add_argument("--disable-default-apps")
+        options_chrome.add_argument("--disable-sync")
+        options_chrome.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+        options_chrome.add_argument("--disable-domain-reliability")
+        options_chrome.add_argument("--no-first-run")
+        options_chrome.add_argument("--no-default-browser-check")
+        options_chrome.add_experimental_option('prefs', {'profile.managed_default_content_settings.images' : 2,
+                                                         'profile.managed_default_content_settings.media_stream' : 2,
+                                                         'profile.default_content_setting_values.notifications' : 2})
+    return options_chrome
+
+def firefox_options():
+    """Function that returns the options of the Firefox driver. The preferences of the lean profile are in
+    `firefox_lean_preferences()` as they are set in the Firefox profile"""
+
+    from selenium.webdriver.firefox.options import Options as opFireFox
+    option_ff = opFireFox()
+    option_ff.add_argument("--headless")
+    option_ff.add_argument("--window-size=1920,1080")
+    option_ff.add_argument("--no-sandbox")
+    #option_ff.add_argument("--disable-dev-shm-usage")
+    return option_ff
+
+def firefox_lean_preferences(url_blocklist=None):
+    """Function that returns the preferences of the lean Firefox profile : no images, no media, no remote fonts,
+    no telemetry, no prefetch, no update checks at startup. The URLs matching `url_blocklist` (ex: '*doubleclick.net*') are sent to a proxy that
+    doesn't exist with a proxy auto-config (PAC) file, so they are never downloaded"""
+
+    preferences = {'permissions.default.image' : 2,
+                   'media.autoplay.default' : 5,
+                   'media.mediasource.enabled' : False,
+                   'gfx.downloadable_fonts.enabled' : False,
+                   'dom.webnotifications.enabled' : False,
+                   'media.peerconnection.enabled' : False,
+                   'network.prefetch-next' : False,
+                   'network.dns.disablePrefetch' : True,
+                   'toolkit.telemetry.enabled' : False,
+                   'datareporting.healthreport.uploadEnabled' : False,
+                   'browser.safebrowsing.malware.enabled' : False,
+                   'browser.safebrowsing.phishing.enabled' : False,
+                   'app.update.enabled' : False,
+                   'extensions.update.enabled' : False,
+                   'browser.search.update' : False,
+                   'network.captive-portal-service.enabled' : False,
+                   'network.connectivity-service.enabled' : False}
+
+    if url_blocklist:
+        conditions = ' || '.join([f'shExpMatch(url, "{url}")' for url in url_blocklist])
+        pac_file = ''.join(['data:text/javascript,function FindProxyForURL(url, host) {if (', conditions,
+                            ') return "PROXY 127.0.0.1:9"; return "DIRECT";}'])
+        preferences['network.proxy.type'] = 2
+        preferences['network.proxy.autoconfig_url'] = pac_file
+    return preferences
+
+
 class InitProject():
     """Class in which we set and/or initialize the values of the variables (attribute) for the entire project"""
 
@@ -82,6 +158,91 @@ class InitProject():
             List that contains the US Stock Holiday
         `self.pd_stock_sentiment` : pandas.DataFrame
             Pandas DataFrame that contains the sentiment/mood for each stock we are webscrapping on social media
+        `self.comment_buffer` : cls
+            columnar buffer (`CommentBuffer`) in which we accumulate the scored comments of the current stock. It is
+            materialized in `self.pd_stock_sentiment` once per stock with a compact schema (float32 probability,
+            categorical source, directional and user)
+        `self.sequential_test` : cls
+            sequential test (`SequentialTest`) of the average sentiment of the current stock in adaptive mode
+            (`self.early_stop`)
+        `self.comment_sample` : cls
+            reservoir sample (`CommentSample`) of the comments of the current stock in budget mode
+            (`self.comment_budget`)
+        `self.keep_text` : boolean
+            keep the text of the comments in `self.pd_stock_sentiment` (`True`) or only their 64 bits hash (`False`) to
+            save memory. When `False`, the texts are appended to `self.text_store_file` (hash, text)
+        `self.save_history` : boolean
+            append (`True`) or not (`False`) the scored comments of each stock to the history in `self.history_dir`
+            (`comment_history.py`), so that we can re-aggregate them or backtest without webscrapping again
+        `self.comment_budget` : int
+            maximum number of comments scored per source of a stock (budget mode). The comments are sampled uniformly
+            (`comment_sample.py`) and only the sample is scored. The true number of comments is still in
+            'Nb of comments for ' with the number sampled and the standard error of the average sentiment in
+            `self.columns_sampling`. `None` to score all the comments
+        `self.comment_strata` : int
+            number of periods of the lookback window with their own sample in budget mode (time-stratified sample).
+            1 for a uniform sample on the whole window
+        `self.early_stop` : boolean
+            adaptive mode (`True`) : the comments are scored by batch of `self.early_stop_batch` and we stop
+            webscrapping and scoring a source of a stock once it is settled, ie the confidence interval
+            (`self.early_stop_z` standard errors) of its average sentiment is above `self.min_sentiment`, below
+            -`self.min_sentiment` or inside the band, with at least `self.min_comments` (`sequential_test.py`). All
+            the sources run and the decision of the stock, comments and seconds saved are in
+            `self.columns_early_stop`. Not used in budget mode
+        `self.adaptive_lookback` : boolean
+            plan the lookback window of each stock (`True`) from its posting velocity (`lookback_planner.py`) instead
+            of `self.time_ago_trend` / `self.time_ago_no_trend` (`False`). The window reaches `self.lookback_target`
+            twits on Stocktwits and is between `self.lookback_min` and `self.time_ago_no_trend` hours
+        `self.lookback_file` : str
+            history of the posting velocity (twits per hour) of the stocks, used by the adaptive lookback
+        `self.run_deadline` : str
+            time of the day (hh:mm) the run must be done, ex: before the market opens (`scheduler.py`). Once it is
+            passed, the next stocks are skipped. `None` for no deadline
+        `self.stock_budget` : int
+            maximum number of seconds to webscrap and score a stock (`None` for no limit)
+        `self.source_budget` : dict
+            maximum number of seconds to webscrap and score a source of a stock (key). A source that is not in the
+            dictionary has no limit. When a budget runs out, we stop scrolling/paging and scoring and the unit is
+            recorded as truncated in `self.schedule_file`
+        `self.fetch_share` : float
+            share of the budget of a source we use to scroll/page. The rest is left to score the comments fetched so
+            that they are not thrown away when the budget runs out
+        `self.scheduler` : cls
+            scheduler of the run (`Scheduler`) : deadline, time budgets and priority of the stocks (position,
+            trending and then shorted)
+        `self.http_timeout` : int
+            default number of seconds before a request (`http_client.py`) is cancelled
+        `self.http_retries` : int
+            maximum number of retries of a request on a connection error, a timeout or a status 429/5xx
+        `self.host_limits` : dict
+            concurrency and rate (requests per second) limits of the hosts we call (key). The other hosts can have
+            4 requests in flight at the same time, without a rate limit. The metrics of the requests per host are
+            written in `self.http_report_file`
+        `self.http_cache_ttl` : dict
+            time to live (in seconds) of the responses in the on-disk HTTP cache (`http_cache.py`) of the URLs that
+            start with the prefix 'host/path' (key). Once it is passed, the response is revalidated with its ETag
+            and Last-Modified. The other URLs are not cached
+        `self.http_offline` : boolean
+            serve the HTTP responses only from the cache (`True`), ex: to run again without network. It is `True` if
+            the environment variable `SENTIMENT_OFFLINE` is '1' (`python main.py --offline`)
+        `self.history_dir` : str
+            directory of the history of the scored comments. One SQLite file per date and one table per ticker
+        `self.daemon_interval` : int
+            number of minutes between two cycles when we run as a daemon (`python main.py --daemon`, `daemon.py`)
+        `self.daemon_start`, `self.daemon_end` : str
+            time of the day (hh:mm) between which the daemon runs cycles
+        `self.daemon_overlap` : int
+            number of minutes we webscrap before the last cycle of a stock, so that we don't miss the comments posted
+            while we were webscrapping. The duplicates are not scored again
+        `self.universe_cycles` : int
+            number of cycles of the daemon between two evaluations of the stocks we webscrap (`StockToTrade`)
+        `self.instrumentation` : boolean
+            time (`True`) or not (`False`) each stage (browser launch, page load, language detection, tokenization,
+            inference, etc.) per stock and source with nested spans (`instrumentation.py`). The run report is written
+            in `self.report_file` (.json and .csv)
+        `self.journal_dir` : str
+            directory of the journal of the run (`run_journal.py`). It records the work done (stocks and sources), so
+            that a run that failed can be resumed with `python main.py --resume`
         `self.stock_dictionnary` : dict
             dictionary of stocks (ticker is the key) with keywords associated with them (item) that we are looking in
             the post. The items are one list per stock (key). This is the whole list we want to webscrap
@@ -93,9 +254,10 @@ class InitProject():
         `self.current_stock` : dict
             current dictionary of `self.stockdictionary` we are webscrapping data on the social media
         `self.pause_time` : long
-            pause time when scrolling down the pageand pause between manipulations on browser to load. 
-            We may need to increase this value as the page may be loaded at different time interval and needs to be 
-            long enough :  https://selenium-python.readthedocs.io/waits.html
+            maximum pause time when scrolling down the page and pause between manipulations on browser to load.
+            We only wait as long as the page needs to load (see `scroll_to_value()` in `package_methods.py`), but we
+            may need to increase this value if the page is sometimes very slow to load :
+            https://selenium-python.readthedocs.io/waits.html
         `self.comment_source` : list
             source of comments/twits that we analyse the sentiment
         `self.pd_metrics` : pandas.DataFrame
@@ -138,6 +300,35 @@ class InitProject():
         `self.trending_stock` : dict
             we say for each stock if it is a Stocktwits trending stock, so that we decide if we use `self.time_ago`
             or `self.time_ago_trending`
+        `self.stocktwits_source` : str
+            how we get the twits on Stocktwits. 'api' uses the JSON stream of the Stocktwits API
+            (`stocktwits_stream.py`) and 'browser' webscraps the website with Selenium (`stocktwits_api.py`)
+        `self.stocktwits_api` : str
+            base endpoint of the Stocktwits API. It can be a local server with recorded JSON pages to test
+        `self.lean_profile` : dict
+            use (`True`) or not (`False`) the lean profile of the browser (no images, no media, no remote fonts,
+            blocked URLs) for each source (key) we webscrap with a browser. See `chrome_options()` and
+            `firefox_lean_preferences()`
+        `self.url_blocklist` : list
+            URLs (with wildcards '*') never downloaded by the browser with the lean profile. Ex: trackers and ads
+        `self.browser_cache_dir` : str
+            directory of the persistent cache of the browsers, reused across launches so that the static files
+            (JS bundles, css) are not downloaded again for every stock. `None` to use a throwaway cache
+        `self.parallel_scrap` : boolean
+            webscrap the raw posts of all the stocks concurrently (before scoring them) in `parallel_scrap.py` instead
+            of one stock at a time in the loop in `main.py`
+        `self.max_browsers` : dict
+            maximum number of headless browsers opened at the same time for each source (key) when
+            `self.parallel_scrap` is `True`. It caps the concurrency per website so that we stay polite
+        `self.pd_scroll` : pandas.DataFrame
+            Pandas Dataframe with the number of scroll steps and the time waiting for the page to load (idle time)
+            per stock when webscrapping Stocktwits and Twitter
+        `self.raw_posts` : dict
+            raw posts (user, text) already webscrapped in `parallel_scrap.py`. The keys are the source and the items
+            are a dictionary with the stock as key and the raw posts as item
+        `self.nb_posts` : dict
+            number of raw posts webscrapped in the lookback window (before the duplicates and the non-english posts
+            are dropped), used for the posting velocity of the adaptive lookback. Same keys as `self.raw_posts`
         """
 
         #list of variables we can change ourself. Be careful when changing the order of a list as we refer to item
@@ -145,6 +336,9 @@ class InitProject():
         self.columns_sentiment = ['text','probability','directional','source','user']
         self.columns_metrics = ["Total average sentiment","Total number of comments", "Stocktwits sentiment accuracy",
                                 "Average sentiment for ", "Nb of comments for "]
+        self.columns_scroll = ["Scroll steps for ", "Idle time for "]
+        self.columns_sampling = ["Sampled comments for ", "Sampling error for "] #only in budget mode
+        self.columns_early_stop = ["Decision", "Comments saved", "Seconds saved"] #only in adaptive mode
         self.comment_source = ['reddit','stocktwit','twitter']
         self.keywords_to_remove = ['limited', 'Limited','Inc.','INC', 'Corporation', 'Corp.', 'Corp', 'Co.',
                                    'Ltd','ltd',',']
@@ -152,43 +346,123 @@ class InitProject():
         self.time_ago_no_trend = 7*24 #should be higher than `self.time_ago_trend`
         self.time_ago_trend = 6
         self.trending_stock  = {}
+        self.lookback = {} #lookback window (in hours) per stock planned by `LookbackPlanner` (adaptive lookback)
         self.pause_time = 2
         self.short_level = 30
         self.min_cap = 500*10**6
         self.min_comments = 60
         self.min_sentiment = 20
         self.min_sentiment_in = 15
+        self.stocktwits_source = 'api' #'api' or 'browser'
+        self.parallel_scrap = False
+        self.lean_profile = {'stocktwit' : True, 'twitter' : True}
+        self.max_browsers = {'stocktwit' : 3, 'twitter' : 2} #never more than 3-4 browsers on the same website
+        self.keep_text = True
+        self.save_history = True
+        self.comment_budget = None #ex: 500 comments per source
+        self.comment_strata = 1
+        self.early_stop = False
+        self.adaptive_lookback = False
+        self.run_deadline = None #ex: '09:15'
+        self.http_timeout = 10
+        self.http_retries = 3
+        self.host_limits = {'finviz.com' : {'concurrency' : 2, 'rate' : 1},
+                            'finance.yahoo.com' : {'concurrency' : 4, 'rate' : 4},
+                            'api.stocktwits.com' : {'concurrency' : 2, 'rate' : 2}}
+        self.http_cache_ttl = {'www.nyse.com/markets/hours-calendars' : 7*24*3600,
+                               'en.wikipedia.org/wiki/List_of_S%26P_500_companies' : 24*3600,
+                               'finance.yahoo.com/quote/' : 24*3600,
+                               'finviz.com/screener.ashx' : 12*3600}
+        self.http_offline = os.environ.get('SENTIMENT_OFFLINE') == '1'
+        self.stock_budget = None
+        self.source_budget = {} #ex: {'stocktwit' : 180, 'twitter' : 180}
+        self.fetch_share = 0.75
+        self.lookback_target = 300
+        self.lookback_min = 1
+        self.early_stop_batch = 32
+        self.early_stop_z = 3.
+        self.daemon_interval = 15
+        self.daemon_start = '09:00'
+        self.daemon_end = '16:30'
+        self.daemon_overlap = 5
+        self.universe_cycles = 4
+        self.instrumentation = True
 
         #we may change these variables but probably not
         self.subreddit = "wallstreetbets" #subreddit we webscrap data on in `reddit_api.py`
         self.limit = 100000 #max comments to webscrap on reddit in `reddit_api.py`
+        self.stocktwits_api = 'https://api.stocktwits.com/api/2/' #Stocktwits API in `stocktwits_stream.py`
+        self.url_blocklist = ['*doubleclick.net*', '*google-analytics.com*', '*googletagmanager.com*',
+                              '*googlesyndication.com*', '*scorecardresearch.com*', '*facebook.net*',
+                              '*amazon-adsystem.com*', '*quantserve.com*', '*.mp4*', '*.m3u8*', '*.woff*']
 
         self.stock_dictionnary = {} #list of stocks we webscrap. We get them in the package `stock_to_trade.py`
 
         #list of variables that are not necessary to change
         self.output_ = 'output/' #name of the folder where the output are stored
         self.results = 'results.csv' #name of the files with the `self.pd_metrics` results
-        self.timer_= 'timer_.csv' #name of the files with the `self.pd_timer` results
+        self.report_ = 'run_report' #name of the files (.json and .csv) with the run report (`instrumentation.py`)
+        self.scroll_ = 'scroll_.csv' #name of the files with the `self.pd_scroll` results
+        self.text_store_ = 'text_store.csv' #name of the file with the text of the comments (hash, text)
         self.input = 'input/' #name of the folder where the input are stored
         self.position = 'positions.csv' #name of the files telling the position we have. We have a position if
                                         #the thresold are 'meet' (`self.min_comments` and `self.min_sentiment`
         #file with the results, ie nb of comments and sentiment analysis
         self.results_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, self.results)
-        #file with the time it took to run the script on each source (reddit, stocktwit, twitter)
-        self.timer_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, self.timer_)
+        #run report with the time of each stage per stock and source (without extension, .json and .csv)
+        self.report_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, self.report_)
+        #file with the scroll steps and idle time per stock (stocktwit, twitter)
+        self.scroll_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, self.scroll_)
+        #file with the text of the comments when we only keep their hash (`self.keep_text` is `False`)
+        self.text_store_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_,
+                                            self.text_store_)
+        #history of the scored comments (one SQLite file per date)
+        self.history_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, 'history')
+        #stocks we have a position on (first column is the ticker)
+        self.position_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.input, self.position)
+        #status (done, truncated, skipped) and seconds of each stock and source of the run (`scheduler.py`)
+        self.schedule_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, 'schedule.csv')
+        #metrics of the HTTP requests per host (`http_client.py`)
+        self.http_report_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_,
+                                             'http_report.json')
+        #on-disk cache of the HTTP responses (`http_cache.py`)
+        self.http_cache_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, 'http_cache')
+        #market cap of the stocks screened today (`market_cap.py`)
+        self.market_cap_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_,
+                                            'market_cap.json')
+        #stocks of the Finviz screener per short level screened today (`finviz.py`)
+        self.finviz_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, 'finviz')
+        #posting velocity of the stocks observed in the last runs (adaptive lookback)
+        self.lookback_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, 'lookback.json')
+        #journal of the run to resume it if it fails
+        self.journal_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_, 'journal')
+        #persistent cache of the browsers and path of the drivers (chromedriver, geckodriver) already resolved
+        self.browser_cache_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_,
+                                              'browser_cache')
+        self.driver_cache_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.output_,
+                                              'driver_path.json')
 
 
         # list of variables that we should not set ourself
         self.us_holidays = []
         self.current_stock = '' #current stock we webscrap
         self.pd_stock_sentiment = pd.DataFrame(columns=self.columns_sentiment)
+        self.comment_buffer = CommentBuffer(self.columns_sentiment, self.comment_source, self.keep_text,
+                                            self.text_store_file)
+        self.scheduler = Scheduler(self)
+        self.comment_sample = CommentSample(self.comment_budget, self.comment_strata) #budget mode only
+        self.sequential_test = SequentialTest(self.early_stop and self.comment_budget is None, self.min_comments,
+                                              self.min_sentiment / 100, self.early_stop_z, self.early_stop_batch,
+                                              self.comment_source)
         self.driver_parameters = {} #parameters for the webdrivers (Chrome and Firefox). Parameters are in
         # `self.init_driver()`
         # fetching or not the data on the 'weekend discussion' post on wallstreetbet.
         self.check_weekend = False # False per default.
         self.pd_metrics = pd.DataFrame()
-        self.pd_timer = pd.DataFrame(columns=self.comment_source)
+        self.pd_scroll = pd.DataFrame()
         self.total_comments = []
+        self.raw_posts = {} #raw posts already webscrapped in `parallel_scrap.py` (source -> stock -> posts)
+        self.nb_posts = {} #number of raw posts webscrapped (source -> stock -> number)
         self.av_key = config('AV_KEY')
         self.logger_file = config('LOG_FILENAME') #file with error (traceback)
         self.twilio_sid = config('TWILIO_SID') #SID to use twilio API, to send SMS
@@ -201,17 +475,18 @@ class InitProject():
         # calling the functions
         self.get_us_holiday()
         self.init_driver()
-        self.init_timer()
         #self.set_time_ago()
         self.create_columns()
         self.create_logger()
 
 
-    def init_timer(self):
-        """Initialize the values to 0 (first line) of self.pd_timer"""
+    def configure_http(self):
+        """Configure the shared HTTP client (`http_client.py`) with the timeout, retries, host limits and cache of the
+        project. It is called once by the entry point (`main.py`) : the client is shared by the whole process, so
+        configuring it again would reset its limits and metrics"""
 
-        for source in self.comment_source:
-            self.pd_timer.loc[0, source] = 0
+        http_client.configure(self.http_timeout, self.http_retries, host_limits=self.host_limits,
+                              cache=HttpCache(self.http_cache_dir, self.http_cache_ttl), offline=self.http_offline)
 
     def create_columns(self):
         """Create new (appropriate) columns for the pd Dataframe metrics"""
@@ -230,12 +505,16 @@ class InitProject():
                 column_tempo.append(self.columns_metrics[4] +source)
 
             i+=1
+        if self.comment_budget is not None:
+            column_tempo += [column + source for source in self.comment_source for column in self.columns_sampling]
+        if self.early_stop:
+            column_tempo += self.columns_early_stop
         self.pd_metrics =self.pd_metrics.reindex(columns=column_tempo)
 
     def get_us_holiday(self):
         """Get the US Stock holidays """
 
-        resp = requests.get('https://www.nyse.com/markets/hours-calendars')
+        resp = http_client.get('https://www.nyse.com/markets/hours-calendars')
         soup = bs.BeautifulSoup(resp.text, 'lxml')
         # Grab the table with the US Stock holidays (first table)
         table = soup.find_all('table', {'class': 'table table-layout-fixed'})[0]
@@ -284,33 +563,41 @@ class InitProject():
         #pass
 
     def init_driver(self):
-        """Method to initialize the parameters for the drivers (Firefox and Chrome) """
+        """Method to initialize the parameters for the drivers (Firefox and Chrome). There are 2 profiles for each
+        driver : the default one and the lean one (see `chrome_options()` and `firefox_options()`)"""
 
         # Options for Chrome Driver
-        self.options_chrome = opChrome()
-        #self.options_chrome.add_argument("--disable-gpu")
-        self.options_chrome.add_argument("--disable-extensions")
-        self.options_chrome.add_argument("--no-sandbox")
-        self.options_chrome.add_argument("--headless")
-        #self.options_chrome.add_argument("--disable-dev-shm-usage")
-        self.options_chrome.add_argument( "--window-size=1920,1080")
-
+        self.options_chrome = chrome_options()
+        self.options_chrome_lean = chrome_options(lean=True)
 
         #store options in dictinoary
         self.driver_parameters['options_chrome'] = self.options_chrome
+        self.driver_parameters['options_chrome_lean'] = self.options_chrome_lean
 
         #Options for Firefox driver
-        self.option_ff = opFireFox()
-        self.option_ff.add_argument("--headless")
-        self.option_ff.add_argument("--window-size=1920,1080")
-        self.option_ff.add_argument("--no-sandbox")
-        #self.option_ff.add_argument("--disable-dev-shm-usage")
+        self.option_ff = firefox_options()
         self.ff_language =  'en-US, en'
 
         #store options and language profile in dict
         self.driver_parameters['options_ff'] = self.option_ff
         self.driver_parameters['ff_language'] = self.ff_language
-
+        self.driver_parameters['ff_lean_preferences'] = firefox_lean_preferences(self.url_blocklist)
+        self.driver_parameters['url_blocklist'] = self.url_blocklist
+
+        #cache of the browsers and of the path of the drivers
+        self.driver_parameters['browser_cache_dir'] = self.browser_cache_dir
+        self.driver_parameters['driver_cache_file'] = self.driver_cache_file
+
+    def get_time_ago(self,stock):
+        """Return how far (in hours) we webscrap data for `stock` depending if it is a trending stock on Stocktwits
+        (generally a lot of recent comments) or not. With the adaptive lookback, it is the window planned for the
+        stock (`self.lookback`)"""
+
+        if stock in self.lookback:
+            return self.lookback[stock]
+        if self.trending_stock.get(stock) == True:
+            return self.time_ago_trend
+        return self.time_ago_no_trend
 
     def set_time_ago(self):
         """Modifiy `self.time_ago` depending if the current day is Monday (so that previous days are the weekend)
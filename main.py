@@ -29,8 +29,6 @@ that the analysis should be done on company listed on US Exchange. We must use t
 
 import sentiment_analysis as sa
 import web_scrapping as ws
-import matplotlib.pyplot as plt
-import pandas as pd
 from initialize import InitProject
 from datetime import datetime, timedelta, time, date
 import perform_stats as ps
@@ -38,11 +36,12 @@ import stock_to_trade as stt
 import time
 import sys
 import os
-from twilio.rest import Client
 import logging
-import csv
-import torch
-from pathlib import Path
+import argparse
+import run_control as rc
+from run_control.instrumentation import instrumentation
+import run_control.profiling as profiling
+from web_scrapping.http_client import http_client
 
 class InitMain(InitProject):
     """Class that initializes global value for the project and performs some checks and stops the program if necessary
@@ -68,7 +67,6 @@ class InitMain(InitProject):
         self.time_ago = init.time_ago
         self.us_holidays = init.us_holidays
         self.pd_metrics = init.pd_metrics
-        self.pd_timer = init.pd_timer
         self.check_closed_days()
 
     def check_closed_days(self):
@@ -85,9 +83,31 @@ class InitMain(InitProject):
          #  raise Exception("Current day is the weekend. The market is closed. The program will shut down")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--resume', action='store_true',
+                        help='resume the last run from its journal, the stocks and sources already done are skipped')
+    parser.add_argument('--daemon', action='store_true',
+                        help='run in cycles during the day (see `daemon.py`) until it receives SIGINT or SIGTERM')
+    parser.add_argument('--offline', action='store_true',
+                        help='serve the HTTP responses only from the cache (see `http_cache.py`)')
+    args = parser.parse_args()
+    if args.offline:
+        os.environ['SENTIMENT_OFFLINE'] = '1' #read by every `InitProject`
+
+    #opt-in profiling with the environment variables `SENTIMENT_PROFILE` and `SENTIMENT_TRACEMALLOC`
+    #(see `profiling.py`)
+    profiling.profile_from_env()
+
     init = InitMain()
+    #the shared HTTP client is configured once for the run (and the daemon). Before `init()`, as it already gets
+    #the holidays with the client
+    init.configure_http()
     init()
 
+    #timing each stage per stock and source (see `instrumentation.py`). Also on if the profiler already enabled it
+    #for its memory snapshots (`--tracemalloc` or `SENTIMENT_TRACEMALLOC`), they are taken at the end of the spans
+    instrumentation.enable(bool(init.instrumentation or instrumentation.hooks))
+
     # logging error in a log file
 
     logformat = "%(asctime)s %(levelname)s %(module)s - %(funcName)s: %(message)s"
@@ -98,9 +118,30 @@ if __name__ == '__main__':
 
     #try:
 
+    #long-running daemon : the model is loaded once and each cycle only webscraps the new comments
+    if args.daemon:
+        logging.getLogger().setLevel(logging.INFO)
+        rc.Daemon(init)()
+        sys.exit(0)
+
+    #journal of the run. When resuming, the stocks, metrics, scroll stats and spans are loaded from it
+    journal = rc.RunJournal(init)
+    journal(resume=args.resume)
+
     #decide which stock we webscrap
-    stt_ = stt.StockToTrade(init)
-    stt_()
+    if not journal.has_stocks():
+        stt_ = stt.StockToTrade(init)
+        stt_()
+        journal.save_stocks()
+
+    #plan the lookback window of each stock from its posting velocity (adaptive lookback)
+    if init.adaptive_lookback:
+        planner = stt.LookbackPlanner(init)
+        planner(journal.remaining_stocks())
+
+    #deadline of the run and priority of the stocks (position, trending, shorted). See `scheduler.py`
+    init.scheduler()
+    stocks = init.scheduler.order(journal.remaining_stocks())
 
     #initialize the Roberta sentiment analysis
     init_roberta = sa.TwitAnalysis(init)
@@ -108,39 +149,71 @@ if __name__ == '__main__':
 
     #initialize all classes we want to webscrap data
     init.time_ago = init.time_ago_trend #set it by default to trending stock for reddit. We need a value here
-    ra_ = ws.RedditApi_(init, init_roberta) # Reddit
-    sta_ = ws.StockTwitsApi(init, init_roberta) # Stocktwits
-    ta = ws.TwitsApi(init, init_roberta) # Twitter
+    ra_, sta_, ta, browser_scrapers = rc.init_scrapers(init, init_roberta) # Reddit, Stocktwits, Twitter
 
     #initialize the class to calculate the metrics
     cm = ps.CalculateMetrics(init)
+    #initialize the class to save the scored comments
+    ch = ps.CommentHistory(init)
 
     #webscrapping data for reddit only one time (all comments for the different stocks are on the same posts)
-    ra_.webscrap()
+    if journal.has_reddit():
+        ra_.reddit_comments = journal.load_reddit()
+    else:
+        ra_.webscrap()
+        journal.save_reddit(ra_.reddit_comments)
 
-    #init.trending_stock['ARCH'] = True
-
-    for stock,keywords in init.stock_dictionnary.items():
-        #deciding how far we webscrap data depending if it is a trending stock on Stocktwits (generally a lot
-        #of recent comments
-        if init.trending_stock[stock] == True:
-            init.time_ago = init.time_ago_trend
-        else:
-            init.time_ago = init.time_ago_no_trend
-
-        init.current_stock = stock #changing to current stock in loop
-        init.pd_stock_sentiment.drop(init.pd_stock_sentiment.index, inplace=True) #drop values in the pandas Dataframe
-        # fetching the data on social media and twitter
+    #webscrapping the raw posts of all the stocks at the same time with many browsers (optional)
+    if init.parallel_scrap:
+        ws.ParallelScrap(init, browser_scrapers, stocks)()
 
-        # return the comments with sentiment analysis using Twitter-based Roberta Transformer on reddit, twitter,
-        #stocktwits
-
-        init.pd_stock_sentiment = ra_.write_values()
-        init.pd_stock_sentiment =  sta_.webscrap()
-        init.pd_stock_sentiment = ta.webscrap()
+    #init.trending_stock['ARCH'] = True
 
-        #calculate the metrics
-        init = cm()
+    for stock,keywords in stocks.items():
+        #the deadline of the run is passed, the stock is skipped (it is still in the journal for `--resume`)
+        if not init.scheduler.start_stock(stock):
+            continue
+        with instrumentation.span(stock): #all the stages of the stock are nested in its span
+            #deciding how far we webscrap data depending if it is a trending stock on Stocktwits (generally a lot
+            #of recent comments
+            init.time_ago = init.get_time_ago(stock)
+
+            init.current_stock = stock #changing to current stock in loop
+            init.comment_buffer.clear() #drop the comments of the previous stock
+            init.comment_sample.clear(init.time_ago) #reservoir sample of the stock (budget mode)
+            journal.load_stock(stock) #comments of the sources already done if we resume
+            #adaptive mode : each source stops once its average sentiment is settled (see `sequential_test.py`)
+            init.sequential_test.clear(init.comment_buffer.probability, init.comment_buffer.source)
+            # fetching the data on social media and twitter
+
+            # write the comments with sentiment analysis using Twitter-based Roberta Transformer on reddit, twitter,
+            #stocktwits in `init.comment_buffer` in the time budget of the source (see `scheduler.py`). Each source
+            #done is recorded in the journal (not the sources skipped by the scheduler, they are done on `--resume`)
+
+            for source, scrap in zip(init.comment_source, [ra_.write_values, sta_.webscrap, ta.webscrap]):
+                if not journal.is_done(stock, source):
+                    if init.sequential_test.run(source, lambda: init.scheduler.run(source, scrap)):
+                        journal.source_done(stock, source)
+
+            #materialize the comments of the stock in the pandas DataFrame (once per stock)
+            init.pd_stock_sentiment = init.comment_buffer.to_frame()
+            if init.save_history:
+                #append the scored comments of the stock to the history. They replace the ones of the stock
+                #already written by this run, so that a stock done again on `--resume` is not duplicated
+                ch(run_id=journal.run_id)
+
+            #calculate the metrics
+            init = cm()
+            #velocity (raw twits per hour) observed for the next runs. Not if we stopped early or the budget of
+            #Stocktwits ran out (we don't know all the twits) or if Stocktwits was done before a `--resume`
+            source = init.comment_source[1]
+            nb_posts = init.nb_posts.get(source, {}).get(stock)
+            if (init.adaptive_lookback and not init.sequential_test.is_stopped(source) and nb_posts is not None
+                    and init.scheduler.units.get((stock, source), {}).get('status') == 'done'):
+                planner.observe(stock, nb_posts, init.time_ago)
+        #the stock is done once all its sources are
+        if all(journal.is_done(stock, source) for source in init.comment_source):
+            journal.stock_done(stock)
 
     #decide the stock we take a position (or keep/exit)
     #dp_ = stt.DecidePosition(init)
@@ -148,12 +221,22 @@ if __name__ == '__main__':
 
     #Wwriting the file with the resuts
     init.pd_metrics.to_csv(init.results_file,encoding='utf-8')
-    #writing the time it took to run the program
-    init.pd_timer.to_csv(init.timer_file,encoding='utf-8')
+    #writing the run report (time of each stage per stock and source)
+    instrumentation.write_report(init.report_file)
+    #writing the metrics of the HTTP requests per host
+    http_client.write_report(init.http_report_file)
+    #writing the status (done, truncated, skipped) of each stock and source
+    init.scheduler.write_report(init.schedule_file)
+    #writing the scroll steps and idle time per stock
+    init.pd_scroll.to_csv(init.scroll_file,encoding='utf-8')
+    #the run is complete only if no stock or source was skipped, otherwise `--resume` does the rest
+    if not journal.remaining_stocks():
+        journal.finish()
 
     #os.system(f'say -v "Victoria" "The program is done. You can check it out."')
 
     #sending a SMS to say the program worked
+    from twilio.rest import Client #imported only here, at the end of the run
 
     client = Client(init.twilio_sid, init.twilio_auth)
     message = client.messages \
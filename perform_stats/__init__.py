@@ -24,6 +24,17 @@
 #  OR OTHER DEALINGS IN THE SOFTWARE.
 ##############################################################################
 
-from perform_stats.calculate_metrics import CalculateMetrics
+"""The classes are imported when they are used (PEP 562 `__getattr__`)"""
 
+from run_control.lazy import lazy_attributes
 
+#name of the object : module where it is defined
+lazy_imports = {
+    'CalculateMetrics' : 'perform_stats.calculate_metrics',
+    'CommentBuffer'    : 'perform_stats.comment_buffer',
+    'CommentHistory'   : 'perform_stats.comment_history',
+    'CommentSample'    : 'perform_stats.comment_sample',
+    'SequentialTest'   : 'perform_stats.sequential_test',
+}
+
+__getattr__, __dir__ = lazy_attributes(globals(), lazy_imports)
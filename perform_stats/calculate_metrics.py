@@ -46,6 +46,8 @@ class CalculateMetrics():
         self.average_sentiment()
         self.total_comments()
         self.total_average_sentiment()
+        if self.init.early_stop:
+            self.early_stop()
         return self.init
 
     def loop_source(func):
@@ -61,23 +63,64 @@ class CalculateMetrics():
 
     @loop_source
     def nb_comments(self,source):
-        """Number of twits/comments per source (reddit, twitter, stocktwits)"""
+        """Number of twits/comments per source (reddit, twitter, stocktwits). In budget mode, the comments that were
+        not sampled (not scored) are counted too"""
 
-        self.init.pd_metrics.loc[self.init.current_stock,self.init.columns_metrics[4] + source] \
-            = int(len(self.pd_subset.index))
+        nb_comments = len(self.pd_subset.index)
+        if self.init.comment_budget is not None:
+            nb_comments += self.init.comment_sample.total(source) - self.init.comment_sample.sampled(source)
+        self.init.pd_metrics.loc[self.init.current_stock,self.init.columns_metrics[4] + source] = int(nb_comments)
 
     @loop_source
     def average_sentiment(self,source):
-        """Average sentiment mood per source (reddit, twitter, stocktwits)"""
-        self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_metrics[3] + source] \
-            = self.pd_subset[self.init.columns_sentiment[1]].mean()
+        """Average sentiment mood per source (reddit, twitter, stocktwits). In budget mode, it is the estimate of the
+        reservoir sample (`comment_sample.py`) weighted with the comments scored outside of the sample (ex: the window
+        of the daemon), and we write the number of comments sampled and the standard error of the average"""
+
+        average = self.pd_subset[self.init.columns_sentiment[1]].mean()
+        if self.init.comment_budget is None:
+            self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_metrics[3] + source] = average
+            return
+
+        sample = self.init.comment_sample
+        error = 0.
+        if sample.sampled(source):
+            mean, error = sample.estimate(source)
+            nb_other = len(self.pd_subset.index) - sample.sampled(source)
+            sum_other = float(self.pd_subset[self.init.columns_sentiment[1]].sum()) - sample.score_sum(source)
+            nb_comments = nb_other + sample.total(source)
+            average = (sum_other + sample.total(source) * mean) / nb_comments
+            error *= sample.total(source) / nb_comments
+        self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_metrics[3] + source] = average
+        self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_sampling[0] + source] \
+            = int(len(self.pd_subset.index))
+        self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_sampling[1] + source] = error
 
     def total_comments(self):
         """return the total number of comments/twits for all the source"""
         self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_metrics[1]] \
-            = int(len(self.init.pd_stock_sentiment))
+            = int(sum(self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_metrics[4] + source]
+                      for source in self.init.comment_source))
 
     def total_average_sentiment(self):
-        """return the total average sentiment mood for all the source"""
+        """return the total average sentiment mood for all the source (average of the sources weighted by their
+        number of comments)"""
+
+        total = 0.
+        nb_comments = 0
+        for source in self.init.comment_source:
+            nb_source = self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_metrics[4] + source]
+            if nb_source:
+                total += nb_source * self.init.pd_metrics.loc[self.init.current_stock,
+                                                               self.init.columns_metrics[3] + source]
+                nb_comments += nb_source
         self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_metrics[0]] \
-            = self.init.pd_stock_sentiment[self.init.columns_sentiment[1]].mean()
\ No newline at end of file
+            = total / nb_comments if nb_comments else float('nan')
+
+    def early_stop(self):
+        """Decision of the sequential test (adaptive mode, see `sequential_test.py`) with the comments and seconds
+        saved ('' if the decision was not settled)"""
+
+        test = self.init.sequential_test
+        self.init.pd_metrics.loc[self.init.current_stock, self.init.columns_early_stop] \
+            = [test.decision or '', int(test.comments_saved), round(test.seconds_saved, 2)]
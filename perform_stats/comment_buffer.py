@@ -0,0 +1,180 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module with the columnar buffer in which we accumulate the scored comments of a stock before materializing them
+in a pandas DataFrame with a compact schema"""
+
+from array import array
+import csv
+import hashlib
+import sys
+import numpy as np
+import pandas as pd
+
+
+def text_hash(text):
+    """Return a signed 64 bits hash of `text` (stable across runs, unlike the built-in `hash()`)"""
+
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def frame_memory(frame):
+    """Return the memory (in bytes) used by the pandas DataFrame `frame`, including the python objects (strings)"""
+
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+class CommentBuffer():
+    """Columnar buffer of the scored comments (text, probability, directional, source, user) of the current stock.
+
+    Adding a row to a pandas DataFrame (`DataFrame.append`) copies the whole DataFrame, so scoring N comments was
+    O(N²). Here each column is a python list (or a typed `array`) and adding a comment is O(1). The DataFrame is
+    materialized once per stock with `self.to_frame()`, with a compact schema : the probability is a float32, the
+    source and directional are categoricals, the user is a categorical built on interned user ids and the text is
+    either kept or replaced by its 64 bits hash (`text_hash()`), the text itself being written in a text store on disk.
+
+    The duplicates are removed when we add the comments (before scoring them) with hash sets instead of
+    `drop_duplicates` on the whole DataFrame : a text is kept only once per stock and, for the sources where we
+    want it, a user is kept only once (their first comment)
+    """
+
+    def __init__(self,columns,sources,keep_text=True,text_store=None):
+        """
+        Parameters
+        ----------
+        `columns` : list
+            name of the columns of the DataFrame in order : text, probability, directional, source, user (see
+            `self.columns_sentiment` in `initialize.py`)
+        `sources` : list
+            sources of the comments (categories of the source column). See `self.comment_source` in `initialize.py`
+        `keep_text` : boolean
+            keep the text of the comments in the DataFrame (`True`) or only their hash (`False`)
+        `text_store` : str
+            csv file (hash, text) where we write the text of the comments when `keep_text` is `False`. `None` to not
+            keep the text at all
+        """
+
+        self.columns = columns
+        self.sources = pd.CategoricalDtype(sources)
+        self.keep_text = keep_text
+        self.text_store = text_store
+        self.clear()
+
+    def __len__(self):
+        return len(self.probability)
+
+    def clear(self):
+        """Remove all the comments (for a new stock)"""
+
+        self.text = [] if self.keep_text else array('q') #text or typed array of int64 hashes
+        self.probability = array('f') #typed array of float32
+        self.directional = []
+        self.source = array('b') #index of the source in `self.sources`
+        self.user = array('l') #id of the user in `self.users`, -1 if there is no user
+        self.timestamp = array('d') #time the comment was posted (epoch in seconds), nan if we don't know it
+        self.users = [] #interned users, the position is the user id
+        self.user_ids = {}
+        self.text_seen = set()
+        self.new_texts = {} #texts not written yet in `self.text_store`
+
+    def is_duplicate(self,text,user=None,unique_user=False):
+        """Return `True` if `text` is already in the buffer or if `unique_user` is `True` and `user` already has a
+        comment in the buffer"""
+
+        if (text if self.keep_text else text_hash(text)) in self.text_seen:
+            return True
+        return unique_user and user is not None and user in self.user_ids
+
+    def append(self,text,probability,directional,source,user=None,timestamp=None):
+        """Add a scored comment in the buffer in O(1). `timestamp` is the time it was posted (epoch in seconds), it is
+        not in `self.to_frame()` (see `self.timestamps()`)"""
+
+        if self.keep_text:
+            key = text
+        else:
+            key = text_hash(text)
+            if self.text_store is not None:
+                self.new_texts[key] = text
+        self.push(key,probability,directional,source,user,timestamp)
+
+    def push(self,key,probability,directional,source,user,timestamp=None):
+        """Add a scored comment in the buffer with its text already as a key (text or hash)"""
+
+        self.text.append(key)
+        self.text_seen.add(key)
+        self.probability.append(probability)
+        self.directional.append(directional)
+        self.source.append(self.sources.categories.get_loc(source))
+        self.user.append(self.user_id(user))
+        self.timestamp.append(timestamp if timestamp is not None else float('nan'))
+
+    def extend(self,frame,timestamps=None):
+        """Add the comments of the pandas DataFrame `frame` (built by `self.to_frame()`) in the buffer with the time
+        they were posted (`timestamps`, unknown by default). Ex: the partial results of a stock saved in the journal
+        of the run"""
+
+        values = [frame[column].astype(object).where(frame[column].notna(), None).tolist()
+                  for column in self.columns]
+        timestamps = timestamps if timestamps is not None else [None] * len(frame)
+        for key, probability, directional, source, user, timestamp in zip(*values, timestamps):
+            self.push(key if self.keep_text else int(key), probability, directional, source, user, timestamp)
+
+    def timestamps(self):
+        """Return the time the comments were posted (numpy array of epochs, nan if we don't know it), in the order of
+        `self.to_frame()`"""
+
+        return np.frombuffer(self.timestamp, dtype=np.float64).copy()
+
+    def user_id(self,user):
+        """Return the id of `user` (-1 if there is no user). A new user is interned and gets the next id"""
+
+        if user is None:
+            return -1
+        if user not in self.user_ids:
+            self.user_ids[user] = len(self.users)
+            self.users.append(sys.intern(user))
+        return self.user_ids[user]
+
+    def write_texts(self):
+        """Append the texts not written yet to the text store (csv file with the hash and the text)"""
+
+        if self.text_store is None or not self.new_texts:
+            return
+        with open(self.text_store, 'a', newline='', encoding='utf-8') as file_:
+            csv.writer(file_).writerows(self.new_texts.items())
+        self.new_texts.clear()
+
+    def to_frame(self):
+        """Materialize the comments in a pandas DataFrame with the columns `self.columns` and the compact schema"""
+
+        self.write_texts()
+        text = self.text if self.keep_text else np.frombuffer(self.text, dtype=np.int64).copy()
+        values = [text,
+                  np.frombuffer(self.probability, dtype=np.float32).copy(),
+                  pd.Categorical(self.directional),
+                  pd.Categorical.from_codes(np.frombuffer(self.source, dtype=np.int8), dtype=self.sources),
+                  pd.Categorical.from_codes(np.asarray(self.user, dtype=np.int64), categories=self.users)]
+        return pd.DataFrame(dict(zip(self.columns, values)), columns=self.columns)
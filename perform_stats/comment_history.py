@@ -0,0 +1,190 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module with the append-only history of the scored comments, so that we can re-aggregate them or backtest without
+webscrapping and scoring them again"""
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+class CommentHistory():
+    """Append-only store of the scored comments, partitioned by date and ticker.
+
+    There is one SQLite file per date (`YYYY-MM-DD.db` in `self.init.history_dir`) and one table per ticker in it
+    (with a trailing underscore, as in `finnhub.py`, to avoid errors with tickers like All State (ALL)). The schema is
+    compact : the source is its index in `self.init.comment_source`, the text is either the text or its 64 bits hash
+    (see `self.init.keep_text`), `time` is the unix time when the comments were scored and `run` is the id of the run
+    (`RunJournal`) that wrote them (`NULL` for the daemon). The history is append-only : a run only deletes its own
+    rows of a stock, so that a stock done again on `--resume` is not duplicated.
+
+    The reads push the predicates down : only the date files in the range and the tables of the tickers are opened,
+    only the columns asked are read and the filters on the source and the probability are done by SQLite
+    """
+
+    def __init__(self,init):
+        """
+        Parameters
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+        """
+
+        self.init = init
+        Path(self.init.history_dir).mkdir(parents=True, exist_ok=True)
+
+    def __call__(self,run_id=None):
+        """Append the comments of the current stock (`self.init.pd_stock_sentiment`) to the history. If `run_id` is
+        not `None`, they replace the comments of the stock already written by the run `run_id`"""
+
+        self.append(self.init.current_stock, self.init.pd_stock_sentiment, run_id=run_id)
+
+    def file_name(self,date_):
+        """Return the SQLite file of the date `date_`"""
+
+        return os.path.join(self.init.history_dir, date_.strftime('%Y-%m-%d') + '.db')
+
+    def table_name(self,table):
+        """Return the quoted identifier of the table `table` (tickers like BRK.B are not valid identifiers)"""
+
+        return '"' + table.replace('"', '""') + '"'
+
+    def create_table(self,c,table,text_type):
+        """Create the table `table` if it does not exist (and add the column `run` to the tables written before it)"""
+
+        c.execute(f"CREATE TABLE IF NOT EXISTS {self.table_name(table)} ({self.init.columns_sentiment[0]} {text_type}, "
+                  f"{self.init.columns_sentiment[1]} REAL, {self.init.columns_sentiment[2]} TEXT, "
+                  f"{self.init.columns_sentiment[3]} INTEGER, {self.init.columns_sentiment[4]} TEXT, time INTEGER, "
+                  f"run INTEGER)")
+        if 'run' not in [row[1] for row in c.execute(f"PRAGMA table_info({self.table_name(table)})")]:
+            c.execute(f"ALTER TABLE {self.table_name(table)} ADD COLUMN run INTEGER")
+
+    def append(self,ticker,frame,date_=None,run_id=None):
+        """Append the scored comments of `ticker` (pandas DataFrame `frame` with the columns
+        `self.init.columns_sentiment`, as built by `CommentBuffer.to_frame()`) in the partition of `date_` (today by
+        default). If `run_id` is not `None`, the comments of `ticker` already written by the run `run_id` are deleted
+        first (in the same transaction), so that writing the same stock again on `--resume` doesn't duplicate them.
+        The rows of the other runs are kept"""
+
+        if frame.empty:
+            return
+        date_ = date_ if date_ is not None else date.today()
+        columns = self.init.columns_sentiment
+        source = frame[columns[3]].astype(pd.CategoricalDtype(self.init.comment_source)).cat.codes
+        text = frame[columns[0]]
+        text_type = 'INTEGER' if np.issubdtype(text.dtype, np.integer) else 'TEXT'
+        now = int(time.time())
+        rows = zip(text.tolist(), frame[columns[1]].astype(float).tolist(),
+                   frame[columns[2]].astype(object).where(frame[columns[2]].notna(), None).tolist(),
+                   source.astype(int).tolist(),
+                   frame[columns[4]].astype(object).where(frame[columns[4]].notna(), None).tolist(),
+                   [now] * len(frame), [run_id] * len(frame))
+
+        with closing(sqlite3.connect(self.file_name(date_))) as conn_:
+            c = conn_.cursor()
+            self.create_table(c, ticker + '_', text_type)
+            if run_id is not None:
+                c.execute(f"DELETE FROM {self.table_name(ticker + '_')} WHERE run = ?", (run_id,))
+            c.executemany(f"INSERT INTO {self.table_name(ticker + '_')} ({','.join(columns)}, time, run) "
+                          f"VALUES (?,?,?,?,?,?,?)", rows)
+            conn_.commit()
+
+    def read(self,start_date,end_date=None,tickers=None,sources=None,min_probability=None,max_probability=None,
+             columns=None):
+        """Return the scored comments between `start_date` and `end_date` (included, today by default) in a pandas
+        DataFrame with the ticker and the date, and the compact schema of `CommentBuffer.to_frame()`.
+
+        Parameters
+        ----------
+        `start_date`, `end_date` : datetime.date
+            range of dates (partitions) we read
+        `tickers` : list
+            tickers we read. `None` for all the tickers
+        `sources` : list
+            sources we read (ex: ['stocktwit', 'twitter']). `None` for all the sources
+        `min_probability`, `max_probability` : float
+            keep only the comments with a probability in this range
+        `columns` : list
+            columns of `self.init.columns_sentiment` (and 'time') we read. `None` for all the columns
+        """
+
+        end_date = end_date if end_date is not None else date.today()
+        columns = columns if columns is not None else self.init.columns_sentiment + ['time']
+        where, parameters = [], []
+        if sources is not None:
+            where.append(f"{self.init.columns_sentiment[3]} IN ({','.join(['?'] * len(sources))})")
+            parameters += [self.init.comment_source.index(source) for source in sources]
+        if min_probability is not None:
+            where.append(f"{self.init.columns_sentiment[1]} >= ?")
+            parameters.append(min_probability)
+        if max_probability is not None:
+            where.append(f"{self.init.columns_sentiment[1]} <= ?")
+            parameters.append(max_probability)
+        where_ = ' WHERE ' + ' AND '.join(where) if where else ''
+
+        frames = []
+        date_ = start_date
+        while date_ <= end_date:
+            file_name = self.file_name(date_)
+            if os.path.exists(file_name):
+                with closing(sqlite3.connect(file_name)) as conn_:
+                    tables = [row[0] for row in conn_.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+                    for table in tables:
+                        ticker = table[:-1]
+                        if tickers is not None and ticker not in tickers:
+                            continue
+                        query = f"SELECT {','.join(columns)} FROM {self.table_name(table)}{where_}"
+                        frame = pd.read_sql_query(query, conn_, params=parameters)
+                        frame.insert(0, 'date', date_)
+                        frame.insert(0, 'ticker', ticker)
+                        frames.append(frame)
+            date_ += timedelta(days=1)
+
+        if not frames:
+            return pd.DataFrame(columns=['ticker', 'date'] + columns)
+        return self.compact(pd.concat(frames, ignore_index=True))
+
+    def compact(self,frame):
+        """Convert the columns of `frame` read in SQLite to the compact schema"""
+
+        columns = self.init.columns_sentiment
+        frame['ticker'] = frame['ticker'].astype('category')
+        if columns[1] in frame:
+            frame[columns[1]] = frame[columns[1]].astype(np.float32)
+        if columns[2] in frame:
+            frame[columns[2]] = frame[columns[2]].astype('category')
+        if columns[3] in frame:
+            frame[columns[3]] = pd.Categorical.from_codes(frame[columns[3]].astype(np.int8),
+                                                          categories=self.init.comment_source)
+        if columns[4] in frame:
+            frame[columns[4]] = frame[columns[4]].astype('category')
+        return frame
@@ -0,0 +1,177 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module with the reservoir sample of the comments of a stock, so that the number of comments we score per source
+is bounded (budget mode, `init.comment_budget`)"""
+
+import math
+import random
+import time
+
+
+class CommentSample():
+    """Uniform reservoir sample (algorithm R) of at most `budget` comments per source of the current stock.
+
+    A trending stock can have tens of thousands of comments in the lookback window and scoring them all is the
+    bottleneck of the run. In budget mode, the comments are offered to the reservoir while we loop through them
+    (`pm.write_values()`) and only the comments in the reservoir are scored at the end of the source
+    (`pm.score_pending()`). Each comment has the same chance to be in the sample whatever its position, so the
+    average sentiment of the sample is an unbiased estimate of the average sentiment of all the comments.
+
+    With `strata` > 1, the lookback window is split in `strata` periods of the same length with one reservoir of
+    `budget // strata` comments each (time-stratified sample), so that a burst of comments in the last hour doesn't
+    crowd out the rest of the window. The comments without a time (reddit) are in their own reservoir of `budget`
+    comments.
+
+    We keep the number of comments offered (true total) and the scores of the sample per period, so that we can
+    return the (stratified) average sentiment and its standard error with `self.estimate()`
+    """
+
+    def __init__(self,budget,strata=1,seed=None):
+        """
+        Parameters
+        ----------
+        `budget` : int
+            maximum number of comments scored per source of a stock (`None` to score all of them)
+        `strata` : int
+            number of periods of the lookback window with their own reservoir (1 for a uniform sample)
+        `seed` : int
+            seed of the random generator (`None` for a different sample on each run)
+        """
+
+        self.budget = budget
+        self.strata = max(1, strata)
+        self.random = random.Random(seed)
+        self.clear()
+
+    def clear(self,time_ago=None):
+        """Remove all the comments (for a new stock). `time_ago` is the lookback window (in hours) that we split in
+        `self.strata` periods"""
+
+        self.end = time.time()
+        self.start = self.end - time_ago * 3600 if time_ago else None
+        self.reservoirs = {} #source : {period : comments in the reservoir}
+        self.totals = {} #source : {period : nb of comments offered}
+        self.scores = {} #source : {period : scores of the comments sampled}
+        self.text_seen = set()
+        self.user_seen = set()
+
+    def is_duplicate(self,text,user=None,unique_user=False):
+        """Return `True` if `text` was already offered or if `unique_user` is `True` and `user` already had a comment
+        offered"""
+
+        if text in self.text_seen:
+            return True
+        return unique_user and user is not None and user in self.user_seen
+
+    def period(self,timestamp):
+        """Return the period of the lookback window of `timestamp` (epoch in seconds, `None` if we don't know it)"""
+
+        if timestamp is None or self.strata == 1 or self.start is None:
+            return -1
+        position = (timestamp - self.start) / (self.end - self.start)
+        return min(self.strata - 1, max(0, int(position * self.strata)))
+
+    def capacity(self,period):
+        """Maximum number of comments in the reservoir of `period`"""
+
+        return self.budget if period == -1 else max(1, self.budget // self.strata)
+
+    def offer(self,source,text,comment,user=None,timestamp=None):
+        """Offer a comment to the reservoir of `source`. `comment` is what we keep if it is sampled (ex: text,
+        directional and user) and `timestamp` the time it was posted (epoch in seconds)"""
+
+        self.text_seen.add(text)
+        if user is not None:
+            self.user_seen.add(user)
+        period = self.period(timestamp)
+        totals = self.totals.setdefault(source, {})
+        totals[period] = totals.get(period, 0) + 1
+        reservoir = self.reservoirs.setdefault(source, {}).setdefault(period, [])
+        if len(reservoir) < self.capacity(period):
+            reservoir.append(comment)
+        else:
+            #the i-th comment replaces one in the reservoir with a probability capacity/i
+            i = self.random.randrange(totals[period])
+            if i < len(reservoir):
+                reservoir[i] = comment
+
+    def pop(self,source):
+        """Remove the reservoir of `source` and return the comments sampled as a list of (period, comment)"""
+
+        return [(period, comment) for period, reservoir in self.reservoirs.pop(source, {}).items()
+                for comment in reservoir]
+
+    def record(self,source,period,score):
+        """Record the `score` of a comment sampled in `period`"""
+
+        self.scores.setdefault(source, {}).setdefault(period, []).append(score)
+
+    def total(self,source):
+        """Number of comments offered for `source` (true total)"""
+
+        return sum(self.totals.get(source, {}).values())
+
+    def sampled(self,source):
+        """Number of comments sampled and scored for `source`"""
+
+        return sum(len(scores) for scores in self.scores.get(source, {}).values())
+
+    def score_sum(self,source):
+        """Sum of the scores of the comments sampled for `source`"""
+
+        return sum(sum(scores) for scores in self.scores.get(source, {}).values())
+
+    def estimate(self,source):
+        """Return the estimate of the average sentiment of all the comments of `source` and its standard error.
+
+        Each period weighs its share of the comments offered (N_h/N) and the standard error has the finite
+        population correction (1 - n_h/N_h), so that it is 0 when all the comments are scored"""
+
+        total = self.total(source)
+        mean = 0.
+        variance = 0.
+        for period, scores in self.scores.get(source, {}).items():
+            nb_scores = len(scores)
+            nb_comments = self.totals[source][period]
+            weight = nb_comments / total
+            mean_period = sum(scores) / nb_scores
+            mean += weight * mean_period
+            if nb_scores > 1:
+                variance_period = sum((score - mean_period)**2 for score in scores) / (nb_scores - 1)
+                variance += weight**2 * (1 - nb_scores / nb_comments) * variance_period / nb_scores
+        return mean, math.sqrt(variance)
+
+    def state(self):
+        """Return the totals and scores per source and period (saved in the journal of the run)"""
+
+        return {'totals' : self.totals, 'scores' : self.scores}
+
+    def load_state(self,state):
+        """Load the totals and scores of `self.state()` (json keys are strings)"""
+
+        for name in ['totals', 'scores']:
+            setattr(self, name, {source : {int(period) : value for period, value in periods.items()}
+                                 for source, periods in state[name].items()})
@@ -0,0 +1,211 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module with the sequential test that stops the webscrapping and the scoring of a source of a stock once its
+average sentiment is settled (adaptive mode, `init.early_stop`)"""
+
+import math
+import time
+
+
+class SequentialTest():
+    """Sequential test on the average sentiment of the comments of the current stock, one test per source.
+
+    The decision only needs to know if the average sentiment is above `threshold`, below `-threshold` or inside the
+    band, with at least `min_comments` comments. The comments are scored by batch of `batch_size`
+    (`pm.score_batch()`) and, after each batch, we update the running mean and variance (Welford) of the source and
+    its confidence bound `z` * s/sqrt(n). Once the source has its floor of comments (`self.floor()` : a batch and its
+    share of `min_comments`) and its confidence interval is entirely above the threshold, below `-threshold` or
+    inside the band, the source is settled : its loop on the comments stops and the browser stops scrolling.
+
+    The sources are tested separately because their sentiment differs (ex: the twits are more bullish than the reddit
+    comments) : a pooled test could settle on the first source alone and skip the others, so the average of the stock
+    would only be the one of the first source. Every source runs and the decision of the stock (`self.decision`) is
+    taken once they all have contributed, on the average weighted by the number of comments of each source (as in
+    `CalculateMetrics.total_average_sentiment()`) with the stratified standard error and at least `min_comments`
+    comments for the stock.
+
+    `z` is higher than the usual 1.96 because we look at the test after every batch (the more we look, the more
+    likely an interval excludes the true mean by chance at least once).
+
+    We report the comments we didn't score (known only for the sources where we already have all the posts) and
+    the seconds saved, estimated with the time the sources took when they were not stopped
+    """
+
+    def __init__(self,enabled,min_comments,threshold,z=3.,batch_size=32,sources=()):
+        """
+        Parameters
+        ----------
+        `enabled` : boolean
+            adaptive mode (`True`) or not (`False`). If `False`, the sources always run to the end
+        `min_comments` : int
+            minimum number of comments of the stock to take a position (`init.min_comments`)
+        `threshold` : float
+            minimum average sentiment (between 0 and 1) to take a position (`init.min_sentiment` / 100)
+        `z` : float
+            number of standard errors of the confidence bound
+        `batch_size` : int
+            number of comments scored at the same time
+        `sources` : list
+            the sources of a stock (`init.comment_source`). The decision of the stock is taken once they all ran
+        """
+
+        self.enabled = enabled
+        self.min_comments = min_comments
+        self.threshold = threshold
+        self.z = z
+        self.batch_size = batch_size
+        self.sources = list(sources)
+        self.source_time = {} #source : seconds the source took when it was not stopped
+        self.clear()
+
+    def clear(self,probabilities=(),sources=()):
+        """Start the test of a new stock with the `probabilities` already scored and their `sources` (index in
+        `self.sources`), ex: partial results of the journal or window of the daemon"""
+
+        self.stats = {} #source : [number of comments, mean, sum of the squared deviations to the mean (Welford)]
+        self.decisions = {} #source : decision of the sources settled
+        self.ran = set() #sources that contributed to the test
+        self.source = None #source running
+        self.comments_saved = 0
+        self.seconds_saved = 0.
+        self.pending = [] #comments waiting to be scored in the next batch
+        for source, probability in zip(sources, probabilities):
+            self.add(self.sources[source], probability)
+            self.ran.add(self.sources[source])
+
+    @property
+    def settled(self):
+        """`True` if the source running is settled"""
+
+        return self.source in self.decisions
+
+    def is_stopped(self,source):
+        """Return `True` if `source` was stopped because it was settled"""
+
+        return source in self.decisions
+
+    def queue(self,comment):
+        """Add `comment` to the next batch. Return `True` if the batch is full"""
+
+        self.pending.append(comment)
+        return len(self.pending) >= self.batch_size
+
+    def pop(self):
+        """Remove and return the comments of the batch"""
+
+        pending, self.pending = self.pending, []
+        return pending
+
+    def add(self,source,score):
+        """Add `score` to the running mean and variance of `source` (Welford)"""
+
+        stats = self.stats.setdefault(source, [0, 0., 0.])
+        stats[0] += 1
+        delta = score - stats[1]
+        stats[1] += delta / stats[0]
+        stats[2] += delta * (score - stats[1])
+
+    def update(self,scores):
+        """Update the running mean and variance of the source running with the `scores` of a batch and check if the
+        source is settled"""
+
+        for score in scores:
+            self.add(self.source, score)
+        self.check()
+
+    def side(self,mean,bound):
+        """Return 'long', 'short' or 'none' if the confidence interval `mean` +/- `bound` is on one side of the
+        thresholds (`None` otherwise)"""
+
+        if mean - bound > self.threshold:
+            return 'long'
+        if mean + bound < -self.threshold:
+            return 'short'
+        if -self.threshold < mean - bound and mean + bound < self.threshold:
+            return 'none'
+        return None
+
+    def floor(self):
+        """Minimum number of comments of a source to be settled : a batch and its share of `self.min_comments`, so
+        that the sources settled can still reach `self.min_comments` together"""
+
+        return max(2, self.batch_size, math.ceil(self.min_comments / max(1, len(self.sources))))
+
+    def check(self):
+        """Settle the source running if its confidence interval is on one side of the thresholds"""
+
+        nb_comments, mean, m2 = self.stats.get(self.source, [0, 0., 0.])
+        if not self.enabled or self.settled or nb_comments < self.floor():
+            return
+        decision = self.side(mean, self.z * math.sqrt(m2 / (nb_comments - 1) / nb_comments))
+        if decision is not None:
+            self.decisions[self.source] = decision
+
+    @property
+    def decision(self):
+        """Decision of the stock ('long', 'short' or 'none') once all the sources contributed, with the average
+        weighted by the number of comments of each source and its stratified standard error. `None` if a source is
+        missing or the confidence interval is not on one side of the thresholds"""
+
+        if not self.enabled or not self.sources or not self.ran.issuperset(self.sources):
+            return None
+        total = sum(stats[0] for stats in self.stats.values())
+        if total < max(2, self.min_comments):
+            return None
+        mean, variance = 0., 0.
+        for nb_comments, mean_, m2 in self.stats.values():
+            weight = nb_comments / total
+            mean += weight * mean_
+            if nb_comments > 1:
+                variance += weight ** 2 * m2 / (nb_comments - 1) / nb_comments
+        return self.side(mean, self.z * math.sqrt(variance))
+
+    def is_settled(self,nb_remaining=0):
+        """Return `True` if the source running is settled, in which case the `nb_remaining` comments of the loop are
+        not scored"""
+
+        if self.settled:
+            self.comments_saved += nb_remaining
+            return True
+        return False
+
+    def run(self,source,scrap):
+        """Webscrap and score `source` with `scrap` (until it is settled). The time of the sources not stopped is
+        kept to estimate the seconds saved. Return the result of `scrap` (`False` if the source was skipped by the
+        scheduler, it doesn't contribute to the test)"""
+
+        self.source = source
+        start_time = time.time()
+        result = scrap()
+        if result is False:
+            return result
+        self.ran.add(source)
+        seconds = time.time() - start_time
+        if self.settled:
+            self.seconds_saved += max(0., self.source_time.get(source, seconds) - seconds)
+        else:
+            self.source_time[source] = seconds
+        return result
@@ -0,0 +1,231 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module to run the project as a long-running daemon (`python main.py --daemon`) to get the sentiment intraday"""
+
+import logging
+import signal
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import sentiment_analysis as sa
+import web_scrapping as ws
+import perform_stats as ps
+import stock_to_trade as stt
+from run_control.instrumentation import instrumentation
+
+
+def init_scrapers(init,init_sentiment):
+    """Return the webscrappers (reddit, stocktwits, twitter) and the ones that use a browser (for `ParallelScrap`)"""
+
+    ra_ = ws.RedditApi_(init, init_sentiment) # Reddit
+    ta = ws.TwitsApi(init, init_sentiment) # Twitter
+    if init.stocktwits_source == 'api':
+        sta_ = ws.StockTwitsStream(init, init_sentiment) # Stocktwits (API, no browser)
+        browser_scrapers = [ta]
+    else:
+        sta_ = ws.StockTwitsApi(init, init_sentiment) # Stocktwits (browser)
+        browser_scrapers = [sta_, ta]
+    return ra_, sta_, ta, browser_scrapers
+
+
+class Daemon():
+    """Class that runs the project in cycles until it receives a signal (SIGINT or SIGTERM).
+
+    Things to know :
+    - The sentiment model (`TwitAnalysis`) is loaded once
+    - The stocks (universe) are evaluated again with `StockToTrade` every `init.universe_cycles` cycles
+    - Each cycle only webscraps the comments posted since the last cycle for each stock (the delta, plus
+      `init.daemon_overlap` minutes). The comments of the previous cycles in the lookback window of the stock
+      (`init.get_time_ago()`) are kept in memory, so that the duplicates are not scored again and the metrics of the
+      stock are updated in place
+    - The cycles only run between `init.daemon_start` and `init.daemon_end` (hh:mm), every `init.daemon_interval`
+      minutes
+    - Each cycle is scheduled as a run (`scheduler.py`) : deadline, time budgets of the stocks and sources and
+      priority of the stocks. The status of each unit is written in `init.schedule_file` at the end of the cycle. A
+      stock with a unit skipped or truncated is webscrapped again from its last complete cycle
+    - On a signal, the daemon finishes the current stock, writes the results and exits
+    """
+
+    def __init__(self,init):
+        """
+        Parameters
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+
+        Attributes
+        ----------
+        `self.windows` : dict
+            scored comments (pandas DataFrame as built by `CommentBuffer.to_frame()`) and the time they were posted
+            (numpy array of epochs) in the lookback window of each stock (key)
+        `self.last_scrap` : dict
+            last time (datetime) we webscrapped each stock (key), and reddit (key `None`)
+        """
+
+        self.init = init
+        self.stop_event = threading.Event()
+        self.windows = {}
+        self.last_scrap = {}
+        self.cycle = 0
+
+    def __call__(self):
+        """Built-in method to run the daemon until it receives a signal"""
+
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        #initialize the Roberta sentiment analysis once
+        init_roberta = sa.TwitAnalysis(self.init)
+        init_roberta()
+        self.ra_, self.sta_, self.ta, self.browser_scrapers = init_scrapers(self.init, init_roberta)
+        self.stt_ = stt.StockToTrade(self.init)
+        self.cm = ps.CalculateMetrics(self.init)
+        self.ch = ps.CommentHistory(self.init)
+
+        while not self.stop_event.is_set():
+            if self.is_open():
+                start_time = time.time()
+                try:
+                    self.run_cycle()
+                except Exception as e:
+                    logging.error(f"Error in the cycle {self.cycle} of the daemon : {e}")
+                logging.info(f"Cycle {self.cycle} done in {time.time() - start_time:.1f} s")
+                self.cycle += 1
+            self.stop_event.wait(self.init.daemon_interval * 60)
+
+    def stop(self,signum,frame):
+        """Signal handler : stop the daemon after the current stock"""
+
+        self.stop_event.set()
+
+    def is_open(self):
+        """Return `True` if the current time is between `self.init.daemon_start` and `self.init.daemon_end`"""
+
+        now = datetime.now().strftime('%H:%M')
+        return self.init.daemon_start <= now <= self.init.daemon_end
+
+    def delta_hours(self,key,time_ago):
+        """Return how far (in hours) we webscrap `key` (a stock or `None` for reddit) : since the last cycle
+        (plus the overlap) and at most `time_ago` hours"""
+
+        if key not in self.last_scrap:
+            return time_ago
+        elapse_time = (datetime.now() - self.last_scrap[key]).total_seconds() / 3600
+        return min(time_ago, elapse_time + self.init.daemon_overlap / 60)
+
+    def update_universe(self):
+        """Evaluate again the stocks we webscrap and forget the stocks that are not in it anymore"""
+
+        self.init.stock_dictionnary = {}
+        self.init.trending_stock = {}
+        self.stt_()
+        if self.init.adaptive_lookback:
+            self.init.lookback = {}
+            stt.LookbackPlanner(self.init)()
+        for stock in list(self.windows):
+            if stock not in self.init.stock_dictionnary:
+                del self.windows[stock]
+                self.last_scrap.pop(stock, None)
+                self.init.pd_metrics.drop(index=stock, errors='ignore', inplace=True)
+
+    def run_cycle(self):
+        """Webscrap the delta of every stock, update the metrics in place and write the results"""
+
+        if self.cycle % self.init.universe_cycles == 0:
+            self.update_universe()
+
+        #reddit comments are webscrapped once for all the stocks
+        self.init.time_ago = self.delta_hours(None, self.init.time_ago_trend)
+        self.last_scrap[None] = datetime.now()
+        self.ra_.reddit_comments = []
+        self.ra_.reddit_times = []
+        self.ra_.webscrap()
+
+        #deadline of the cycle and priority of the stocks (position, trending, shorted). See `scheduler.py`
+        self.init.scheduler()
+        stocks = self.init.scheduler.order(self.init.stock_dictionnary)
+        time_ago = {stock : self.delta_hours(stock, self.init.get_time_ago(stock)) for stock in stocks}
+        if self.init.parallel_scrap:
+            ws.ParallelScrap(self.init, self.browser_scrapers, stocks, time_ago=time_ago)()
+
+        for stock in stocks:
+            if self.stop_event.is_set():
+                break
+            #the deadline is passed, the stock is skipped (webscrapped from its last cycle in the next one)
+            if not self.init.scheduler.start_stock(stock):
+                continue
+            scrap_time = datetime.now()
+            with instrumentation.span(stock):
+                self.run_stock(stock, time_ago[stock])
+            #the delta of the next cycle starts here only if no source was skipped or truncated
+            if all(self.init.scheduler.units.get((stock, source), {}).get('status') == 'done'
+                   for source in self.init.comment_source):
+                self.last_scrap[stock] = scrap_time
+
+        self.init.pd_metrics.to_csv(self.init.results_file, encoding='utf-8')
+        instrumentation.write_report(self.init.report_file)
+        self.init.scheduler.write_report(self.init.schedule_file)
+        self.init.pd_scroll.to_csv(self.init.scroll_file, encoding='utf-8')
+
+    def run_stock(self,stock,time_ago):
+        """Webscrap and score the comments of `stock` posted in the last `time_ago` hours, add them to the window
+        of the stock and update its metrics"""
+
+        self.init.current_stock = stock
+        self.init.time_ago = time_ago
+        now = time.time()
+
+        #the comments of the window are in the buffer, so that the duplicates are not scored again
+        window, posted_time = self.windows.get(stock, (None, np.empty(0)))
+        self.init.comment_buffer.clear()
+        self.init.comment_sample.clear(time_ago)
+        if window is not None:
+            self.init.comment_buffer.extend(window, posted_time)
+        nb_comments = len(self.init.comment_buffer)
+        #adaptive mode : each source stops once its average sentiment is settled (see `sequential_test.py`)
+        self.init.sequential_test.clear(self.init.comment_buffer.probability, self.init.comment_buffer.source)
+
+        for source, scrap in zip(self.init.comment_source, [self.ra_.write_values, self.sta_.webscrap,
+                                                            self.ta.webscrap]):
+            self.init.sequential_test.run(source, lambda: self.init.scheduler.run(source, scrap))
+
+        frame = self.init.comment_buffer.to_frame()
+        #time the comments were posted (the time they were scored if the source doesn't give it)
+        posted_time = self.init.comment_buffer.timestamps()
+        posted_time = np.where(np.isnan(posted_time), now, posted_time)
+
+        #append only the new comments to the history
+        if self.init.save_history:
+            self.init.pd_stock_sentiment = frame.iloc[nb_comments:]
+            self.ch()
+
+        #keep only the comments posted in the lookback window of the stock, as a one-shot run would
+        in_window = posted_time >= now - self.init.get_time_ago(stock) * 3600
+        self.windows[stock] = (frame[in_window].reset_index(drop=True), posted_time[in_window])
+        self.init.pd_stock_sentiment = self.windows[stock][0]
+        self.init = self.cm()
@@ -0,0 +1,204 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module with the instrumentation of the run : nested spans (timers) per stock, source and stage with counters and
+histograms, exported in a run report (json and csv)
+
+Ex:
+    from run_control.instrumentation import instrumentation
+    with instrumentation.span('inference'):
+        ...
+    instrumentation.count(items_in=len(posts), items_out=len(comments))
+"""
+
+import csv
+import json
+import math
+import threading
+import time
+
+
+class NullSpan():
+    """Span that does nothing, returned when the instrumentation is disabled so that the overhead is one attribute
+    check and one function call"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span():
+    """Context manager that times a stage. Its path is the path of the span in which it is opened (in the same
+    thread) plus its name. Ex: 'TSLA/twitter/page load'"""
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        stack = self.instrumentation.stack()
+        self.path = stack[-1] + '/' + self.name if stack else self.name
+        stack.append(self.path)
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        elapse_time = time.perf_counter() - self.start_time
+        self.instrumentation.stack().pop()
+        self.instrumentation.record(self.path, elapse_time)
+        for hook in self.instrumentation.hooks:
+            hook(self.path)
+        return False
+
+
+class Instrumentation():
+    """Statistics of the spans of the run, aggregated by path : number of calls, total/min/max time, items in and out
+    and histogram of the time (buckets in powers of 2 of milliseconds). The spans are nested per thread (each thread
+    has its own stack) and the statistics are shared between the threads (with a lock)
+
+    When it is disabled (`self.enabled` is `False`), `self.span()` returns `NULL_SPAN` and nothing is recorded.
+    The functions in `self.hooks` are called with the path of each span that ends (ex: memory snapshots in
+    `profiling.py`)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stats = {}
+        self.hooks = []
+
+    def enable(self, enabled=True):
+        """Enable (or disable) the instrumentation"""
+
+        self.enabled = enabled
+
+    def clear(self):
+        """Remove all the statistics recorded"""
+
+        with self.lock:
+            self.stats = {}
+
+    def stack(self):
+        """Return the stack of the paths of the spans opened in the current thread"""
+
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def span(self, name):
+        """Return a context manager that times the stage `name` nested in the current span"""
+
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def timed(self, name):
+        """Decorator that opens the span `name` around the function"""
+
+        def decorator(func):
+            def wrapper_(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper_
+        return decorator
+
+    def path_stats(self, path):
+        """Return the statistics of `path` (created empty if it's a new path). Must be called with `self.lock`"""
+
+        if path not in self.stats:
+            self.stats[path] = {'calls' : 0, 'total_s' : 0., 'min_s' : math.inf, 'max_s' : 0., 'items_in' : 0,
+                                'items_out' : 0, 'histogram_ms' : {}}
+        return self.stats[path]
+
+    def record(self, path, elapse_time):
+        """Add a call of `elapse_time` seconds to the statistics of `path`"""
+
+        bucket = str(2 ** max(0, math.ceil(math.log2(max(elapse_time * 1000, 1)))))
+        with self.lock:
+            stats = self.path_stats(path)
+            stats['calls'] += 1
+            stats['total_s'] += elapse_time
+            stats['min_s'] = min(stats['min_s'], elapse_time)
+            stats['max_s'] = max(stats['max_s'], elapse_time)
+            stats['histogram_ms'][bucket] = stats['histogram_ms'].get(bucket, 0) + 1
+
+    def count(self, items_in=0, items_out=0):
+        """Add items in and out to the current span (ex: posts webscrapped and comments kept)"""
+
+        if not self.enabled:
+            return
+        stack = self.stack()
+        if not stack:
+            return
+        with self.lock:
+            stats = self.path_stats(stack[-1])
+            stats['items_in'] += items_in
+            stats['items_out'] += items_out
+
+    def add_time(self, path, elapse_time):
+        """Add `elapse_time` seconds to `path` without a span (ex: wall time measured elsewhere)"""
+
+        if self.enabled:
+            self.record(path, elapse_time)
+
+    def report(self):
+        """Return the statistics of the run as a list of dictionaries (one per path, sorted by path)"""
+
+        with self.lock:
+            rows = []
+            for path, stats in sorted(self.stats.items()):
+                row = {'path' : path, 'depth' : path.count('/')}
+                row.update(stats)
+                row['mean_s'] = stats['total_s'] / stats['calls'] if stats['calls'] else 0.
+                row['min_s'] = stats['min_s'] if stats['calls'] else 0.
+                row['histogram_ms'] = dict(stats['histogram_ms'])
+                rows.append(row)
+        return rows
+
+    def write_report(self, file_name):
+        """Write the run report in `file_name` + '.json' and `file_name` + '.csv' (the histogram is a json string
+        in the csv)"""
+
+        rows = self.report()
+        with open(file_name + '.json', 'w', encoding='utf-8') as file_:
+            json.dump({'spans' : rows}, file_, indent=2)
+        columns = ['path', 'depth', 'calls', 'total_s', 'mean_s', 'min_s', 'max_s', 'items_in', 'items_out',
+                   'histogram_ms']
+        with open(file_name + '.csv', 'w', newline='', encoding='utf-8') as file_:
+            writer = csv.DictWriter(file_, fieldnames=columns)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(dict(row, histogram_ms=json.dumps(row['histogram_ms'])))
+
+
+#instrumentation of the project (one for the whole run, shared by all the modules)
+instrumentation = Instrumentation()
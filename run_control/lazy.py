@@ -0,0 +1,56 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module with the lazy imports of the packages (PEP 562 `__getattr__`) : the objects of a package are imported when
+they are used, so that importing a package doesn't import the dependencies of all its modules"""
+
+import importlib
+
+
+def lazy_attributes(package,lazy_imports):
+    """Return the `__getattr__` and `__dir__` of a package.
+
+    Parameters
+    ----------
+    `package` : dict
+        `globals()` of the package. The objects imported are kept in it
+    `lazy_imports` : dict
+        name of the object : module where it is defined
+    """
+
+    def __getattr__(name):
+        """Import the module of `name` the first time it is used and keep the object in the package"""
+
+        if name not in lazy_imports:
+            raise AttributeError(f"module {package['__name__']!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(lazy_imports[name]), name)
+        package[name] = value
+        return value
+
+    def __dir__():
+        return sorted(list(package) + list(lazy_imports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,194 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module with the opt-in profiling of a run. The results are written in a new directory per run in
+`output/profiles/` :
+- `profile.pstats` with cProfile (`--mode cprofile`). Read it with `python -m pstats profile.pstats`
+- `profile.collapsed` with the sampling profiler (`--mode sample`), in the collapsed-stack format of flamegraphs
+  (one line per stack 'module:function;module:function count'). Ex: `flamegraph.pl profile.collapsed > flame.svg`
+- `tracemalloc.txt` with a memory snapshot (current, peak and top allocations) at the end of the stages (spans of
+  `instrumentation.py`) when `--tracemalloc` is used
+
+It works for any script of the project, ex: `python -m run_control.profiling --mode sample --tracemalloc main.py
+--resume` or with the environment variables `SENTIMENT_PROFILE` ('cprofile' or 'sample') and `SENTIMENT_TRACEMALLOC`
+('1') read by `profile_from_env()` at the beginning of `main.py`
+"""
+
+import argparse
+import atexit
+import cProfile
+import os
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from run_control.instrumentation import instrumentation
+
+profile_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'output', 'profiles')
+
+
+class SamplingProfiler():
+    """Profiler that samples the stack of a thread every `interval` seconds (with `sys._current_frames()`, only
+    available on CPython) and counts the collapsed stacks. The overhead doesn't depend on the number of function calls
+    like cProfile"""
+
+    def __init__(self,thread_id,interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def sample(self):
+        """Method run by the thread of the profiler"""
+
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self,file_name):
+        """Write the stacks in the collapsed-stack format"""
+
+        with open(file_name, 'w', encoding='utf-8') as file_:
+            for stack, count in self.stacks.most_common():
+                file_.write(f"{stack} {count}\n")
+
+
+class Profiler():
+    """Profile the current thread with cProfile (`mode` 'cprofile') or the sampling profiler (`mode` 'sample'), with
+    optional memory snapshots at the end of the stages (`memory` is `True`, spans with a depth up to
+    `memory_depth`)"""
+
+    def __init__(self,mode='cprofile',memory=False,memory_depth=1,output_dir=None):
+        self.mode = mode
+        self.memory = memory
+        self.memory_depth = memory_depth
+        self.output_dir = os.path.join(output_dir or profile_dir, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.snapshots = []
+        self.profiler = None
+
+    def start(self):
+        """Start the profiling"""
+
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        if self.memory:
+            tracemalloc.start()
+            instrumentation.enable()
+            instrumentation.hooks.append(self.snapshot)
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.mode == 'sample' and hasattr(sys, '_current_frames'):
+            self.profiler = SamplingProfiler(threading.get_ident())
+            self.profiler.start()
+        return self
+
+    def snapshot(self,label):
+        """Record the memory (current, peak and top allocations) at the end of the stage `label`"""
+
+        if label.count('/') > self.memory_depth:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+        self.snapshots.append((time.strftime('%H:%M:%S'), label, current, peak, top))
+
+    def stop(self):
+        """Stop the profiling and write the results in `self.output_dir`"""
+
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.disable()
+            self.profiler.dump_stats(os.path.join(self.output_dir, 'profile.pstats'))
+        elif isinstance(self.profiler, SamplingProfiler):
+            self.profiler.stop()
+            self.profiler.write(os.path.join(self.output_dir, 'profile.collapsed'))
+        if self.memory:
+            self.snapshot('end')
+            tracemalloc.stop()
+            instrumentation.hooks.remove(self.snapshot)
+            with open(os.path.join(self.output_dir, 'tracemalloc.txt'), 'w', encoding='utf-8') as file_:
+                for time_, label, current, peak, top in self.snapshots:
+                    file_.write(f"{time_} {label} : current {current / 2**20:.1f} MB, peak {peak / 2**20:.1f} MB\n")
+                    for stat in top:
+                        file_.write(f"    {stat}\n")
+        self.profiler = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self,*args):
+        self.stop()
+        return False
+
+
+def profile_from_env():
+    """Start the profiling if the environment variable `SENTIMENT_PROFILE` ('cprofile' or 'sample') or
+    `SENTIMENT_TRACEMALLOC` ('1') is set. The results are written when the program exits. Return the profiler or
+    `None`"""
+
+    mode = os.environ.get('SENTIMENT_PROFILE')
+    memory = os.environ.get('SENTIMENT_TRACEMALLOC') == '1'
+    if not mode and not memory:
+        return None
+    profiler = Profiler(mode, memory).start()
+    atexit.register(profiler.stop)
+    return profiler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['cprofile', 'sample', 'none'], default='cprofile', help='profiler')
+    parser.add_argument('--tracemalloc', action='store_true', help='memory snapshots at the end of the stages')
+    parser.add_argument('--depth', type=int, default=1, help='maximum depth of the stages with a memory snapshot')
+    parser.add_argument('--output', help=f'directory of the results (default: {profile_dir})')
+    parser.add_argument('script', help='script to profile, ex: main.py')
+    parser.add_argument('arguments', nargs=argparse.REMAINDER, help='arguments of the script')
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.arguments
+    sys.path.insert(0, os.path.dirname(os.path.realpath(args.script)))
+    with Profiler(args.mode, args.tracemalloc, args.depth, args.output) as profiler:
+        try:
+            runpy.run_path(args.script, run_name='__main__')
+        except SystemExit:
+            pass
+    print(f"Profiling results in {profiler.output_dir}")
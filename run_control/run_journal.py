@@ -0,0 +1,220 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module with the journal of a run, so that a run that failed can be resumed (`python main.py --resume`) without
+doing again the work already done"""
+
+import json
+import os
+import time
+from datetime import date
+from pathlib import Path
+import pandas as pd
+from run_control.instrumentation import instrumentation
+
+
+class RunJournal():
+    """Journal of the run on disk (in `init.journal_dir`). A unit of work is a source (reddit, stocktwit, twitter) of a
+    stock. The journal records :
+    - the stocks we webscrap (`init.stock_dictionnary` and `init.trending_stock`), so that we don't call
+      `StockToTrade` again when we resume
+    - the reddit comments (they are webscrapped once for all the stocks)
+    - the sources done for each stock with the scored comments of the stock so far (partial results) and, in budget
+      mode, the totals and scores of its reservoir sample
+    - the stocks done with the metrics (`init.pd_metrics`), the scroll stats and the spans (`instrumentation.py`)
+      so far
+
+    Each file is written in a temporary file and then renamed, so that a crash while writing doesn't corrupt the
+    journal
+    """
+
+    def __init__(self,init):
+        """
+        Parameters
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+
+        Attributes
+        ----------
+        `self.state` : dict
+            content of the journal file : date and id of the run, stocks webscrapped, sources done per stock, stocks done
+            and if the run is complete
+        """
+
+        self.init = init
+        self.journal_file = os.path.join(self.init.journal_dir, 'journal.json')
+        self.reddit_file = os.path.join(self.init.journal_dir, 'reddit_comments.json')
+        self.report_file = os.path.join(self.init.journal_dir, 'instrumentation.json')
+        self.state = {}
+
+    def __call__(self,resume=False):
+        """Built-in method to start the journal. If `resume` is `True` and the last run is not complete and is from
+        today, we load its state in `self.init` and return `True`. Otherwise, we start a new journal and return
+        `False` (the stocks and comments of another day are stale)"""
+
+        Path(self.init.journal_dir).mkdir(parents=True, exist_ok=True)
+        if resume and os.path.exists(self.journal_file):
+            with open(self.journal_file, encoding='utf-8') as file_:
+                self.state = json.load(file_)
+            if not self.state['complete'] and self.state['date'] == date.today().isoformat():
+                self.load()
+                return True
+        self.clear()
+        return False
+
+    def clear(self):
+        """Start a new journal (remove the files of the last run)"""
+
+        for file_ in os.listdir(self.init.journal_dir):
+            os.remove(os.path.join(self.init.journal_dir, file_))
+        self.state = {'date' : date.today().isoformat(), 'run_id' : int(time.time()), 'stocks' : None, 'trending' : None, 'reddit' : False,
+                      'sources_done' : {}, 'stocks_done' : [], 'complete' : False}
+        self.write_json(self.journal_file, self.state)
+
+    def load(self):
+        """Load the state of the run in `self.init` (stocks, metrics and scroll stats) and the spans"""
+
+        if self.state['stocks'] is not None:
+            self.init.stock_dictionnary = self.state['stocks']
+            self.init.trending_stock = self.state['trending']
+        for name in ['pd_metrics', 'pd_scroll']:
+            file_ = self.frame_file(name)
+            if os.path.exists(file_):
+                setattr(self.init, name, pd.read_pickle(file_))
+        if os.path.exists(self.report_file):
+            with open(self.report_file, encoding='utf-8') as file_:
+                instrumentation.stats = json.load(file_)
+
+    def write_json(self,file_,value):
+        """Write `value` in the json file `file_` (temporary file and then renamed)"""
+
+        with open(file_ + '.tmp', 'w', encoding='utf-8') as tempo_file:
+            json.dump(value, tempo_file)
+        os.replace(file_ + '.tmp', file_)
+
+    def write_frame(self,file_,frame):
+        """Write the pandas DataFrame `frame` in the pickle file `file_` (temporary file and then renamed)"""
+
+        frame.to_pickle(file_ + '.tmp')
+        os.replace(file_ + '.tmp', file_)
+
+    def frame_file(self,name):
+        """Return the pickle file of `name` (a stock or a DataFrame of `self.init`)"""
+
+        return os.path.join(self.init.journal_dir, name + '.pkl')
+
+    def sample_file(self,stock):
+        """Return the json file with the totals and scores of the reservoir sample of `stock` (budget mode)"""
+
+        return os.path.join(self.init.journal_dir, stock + '_sample.json')
+
+    def has_stocks(self):
+        """Return `True` if the stocks to webscrap are already in the journal"""
+
+        return self.state['stocks'] is not None
+
+    def save_stocks(self):
+        """Record the stocks we webscrap (`self.init.stock_dictionnary` and `self.init.trending_stock`)"""
+
+        self.state['stocks'] = self.init.stock_dictionnary
+        self.state['trending'] = self.init.trending_stock
+        self.write_json(self.journal_file, self.state)
+
+    def has_reddit(self):
+        """Return `True` if the reddit comments are already in the journal"""
+
+        return self.state['reddit']
+
+    def save_reddit(self,comments):
+        """Record the reddit comments webscrapped for all the stocks"""
+
+        self.write_json(self.reddit_file, comments)
+        self.state['reddit'] = True
+        self.write_json(self.journal_file, self.state)
+
+    def load_reddit(self):
+        """Return the reddit comments recorded in the journal"""
+
+        with open(self.reddit_file, encoding='utf-8') as file_:
+            return json.load(file_)
+
+    def is_done(self,stock,source=None):
+        """Return `True` if the `source` of `stock` is done (or the whole `stock` if `source` is `None`)"""
+
+        if source is None:
+            return stock in self.state['stocks_done']
+        return source in self.state['sources_done'].get(stock, [])
+
+    def remaining_stocks(self):
+        """Return the stocks (dictionary as `self.init.stock_dictionnary`) that are not done yet"""
+
+        return {stock : keywords for stock, keywords in self.init.stock_dictionnary.items()
+                if not self.is_done(stock)}
+
+    def load_stock(self,stock):
+        """Add the scored comments of the sources of `stock` already done (partial results) in
+        `self.init.comment_buffer` (and the totals of its reservoir sample in `self.init.comment_sample`)"""
+
+        file_ = self.frame_file(stock)
+        if os.path.exists(file_):
+            self.init.comment_buffer.extend(pd.read_pickle(file_))
+        if os.path.exists(self.sample_file(stock)):
+            with open(self.sample_file(stock), encoding='utf-8') as file_:
+                self.init.comment_sample.load_state(json.load(file_))
+
+    def source_done(self,stock,source):
+        """Record that `source` of `stock` is done with the scored comments of the stock so far"""
+
+        self.write_frame(self.frame_file(stock), self.init.comment_buffer.to_frame())
+        if self.init.comment_budget is not None:
+            self.write_json(self.sample_file(stock), self.init.comment_sample.state())
+        self.state['sources_done'].setdefault(stock, []).append(source)
+        self.write_json(self.journal_file, self.state)
+
+    def stock_done(self,stock):
+        """Record that `stock` is done with the metrics, scroll stats and spans so far"""
+
+        for name in ['pd_metrics', 'pd_scroll']:
+            self.write_frame(self.frame_file(name), getattr(self.init, name))
+        self.write_json(self.report_file, instrumentation.stats)
+        self.state['stocks_done'].append(stock)
+        self.write_json(self.journal_file, self.state)
+        for file_ in [self.frame_file(stock), self.sample_file(stock)]:
+            if os.path.exists(file_):
+                os.remove(file_)
+
+    @property
+    def run_id(self):
+        """Id of the run (unix time it started), it tags the rows of the run in the history (`comment_history.py`)"""
+
+        return self.state.get('run_id')
+
+    def finish(self):
+        """Record that the run is complete (the next `--resume` starts a new run)"""
+
+        self.state['complete'] = True
+        self.write_json(self.journal_file, self.state)
@@ -0,0 +1,208 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module with the scheduler of a run : global deadline, time budgets per stock and source and priority of the
+stocks"""
+
+import csv
+import logging
+import os
+import time
+from datetime import datetime
+
+
+class Scheduler():
+    """Scheduler of the run (`init.scheduler`). A unit of work is a source (reddit, stocktwit, twitter) of a stock.
+
+    Things to know :
+    - The stocks are webscrapped by priority : the stocks we have a position on (`init.position_file`), then the
+      trending stocks on Stocktwits, then the shorted stocks (`self.order()`)
+    - The run must be done by `init.run_deadline` (time of the day, ex: before the market opens). Once it is passed,
+      the next stocks are skipped
+    - Each stock has a time budget of `init.stock_budget` seconds and each source of `init.source_budget` seconds.
+      When a budget runs out, we stop scrolling (`pm.scroll_to_value()`) or paging (`StockTwitsStream`) and we stop
+      looping through the comments, so that the work is cancelled cleanly : the comments already scored are kept
+      and the browser is closed
+    - The scrolling/paging of a unit stops after `init.fetch_share` of its budget (`self.fetch_deadline`), so that
+      the rest of the budget is left to score the comments fetched
+    - Each unit is recorded as 'done', 'truncated' (a budget ran out during the unit) or 'skipped' (a budget ran out
+      before the unit) in `init.schedule_file` with `self.write_report()`
+    """
+
+    def __init__(self,init):
+        """
+        Parameters
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+
+        Attributes
+        ----------
+        `self.deadline` : float
+            time (epoch) the run must be done. `None` if there is no deadline
+        `self.stock_deadline` : float
+            time (epoch) the current stock must be done
+        `self.unit_deadline` : float
+            time (epoch) the current unit (source of the current stock) must be done
+        `self.fetch_deadline` : float
+            time (epoch) the current unit must stop scrolling/paging to leave time to score the comments
+        `self.units` : dict
+            status and seconds of each unit. The keys are (stock, source)
+        """
+
+        self.init = init
+        self.deadline = None
+        self.stock_deadline = None
+        self.unit_deadline = None
+        self.fetch_deadline = None
+        self.current_unit = None
+        self.units = {}
+
+    def __call__(self):
+        """Built-in method to set the deadline of the run (today at `self.init.run_deadline`)"""
+
+        self.units = {}
+        self.deadline = None
+        if self.init.run_deadline is not None:
+            deadline = datetime.combine(datetime.now().date(),
+                                        datetime.strptime(self.init.run_deadline, '%H:%M').time()).timestamp()
+            if deadline <= time.time():
+                logging.warning(f"The deadline of the run ({self.init.run_deadline}) is already passed, the run has "
+                                f"no deadline")
+            else:
+                self.deadline = deadline
+        return self
+
+    def positions(self):
+        """Return the stocks we have a position on (first column of `self.init.position_file`)"""
+
+        if not os.path.exists(self.init.position_file):
+            return set()
+        with open(self.init.position_file, newline='', encoding='utf-8') as file_:
+            return {row[0].strip().upper() for row in csv.reader(file_) if row and row[0].strip()}
+
+    def order(self,stocks):
+        """Return `stocks` (dictionary as `self.init.stock_dictionnary`) by priority : position, trending and
+        shorted. The order of `stocks` is kept within a priority"""
+
+        positions = self.positions()
+
+        def priority(stock):
+            if stock in positions:
+                return 0
+            return 1 if self.init.trending_stock.get(stock) else 2
+
+        return {stock : stocks[stock] for stock in sorted(stocks, key=priority)}
+
+    def earliest(self,*deadlines):
+        """Return the earliest of `deadlines` that are not `None` (`None` if they all are)"""
+
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        return min(deadlines) if deadlines else None
+
+    def is_over(self):
+        """Return `True` if the deadline of the run is passed"""
+
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def start_stock(self,stock):
+        """Start the time budget of `stock`. Return `False` (and record its sources as skipped) if the deadline of
+        the run is passed"""
+
+        if self.is_over():
+            for source in self.init.comment_source:
+                self.record(stock, source, 'skipped')
+            return False
+        budget = time.time() + self.init.stock_budget if self.init.stock_budget is not None else None
+        self.stock_deadline = self.earliest(self.deadline, budget)
+        return True
+
+    def source_deadline(self,source,stock_deadline=None):
+        """Return the time (epoch) `source` must be done if it starts now"""
+
+        budget = self.init.source_budget.get(source)
+        return self.earliest(self.deadline, stock_deadline, time.time() + budget if budget is not None else None)
+
+    def run(self,source,scrap):
+        """Webscrap and score `source` of the current stock with `scrap` in its time budget. Return `False` if the
+        unit is skipped (the budget of the stock ran out before it)"""
+
+        stock = self.init.current_stock
+        if self.stock_deadline is not None and time.time() >= self.stock_deadline:
+            self.record(stock, source, 'skipped')
+            return False
+        self.current_unit = (stock, source)
+        self.unit_deadline = self.source_deadline(source, self.stock_deadline)
+        start_time = time.time()
+        if self.unit_deadline is not None:
+            self.fetch_deadline = start_time + self.init.fetch_share*(self.unit_deadline - start_time)
+        try:
+            scrap()
+        finally:
+            self.record(stock, source, 'done', time.time() - start_time)
+            self.unit_deadline = None
+            self.fetch_deadline = None
+            self.current_unit = None
+        return True
+
+    def is_expired(self):
+        """Return `True` (and record the current unit as truncated) if the time budget of the current unit ran
+        out"""
+
+        if self.unit_deadline is not None and time.time() >= self.unit_deadline:
+            self.truncate(*self.current_unit)
+            return True
+        return False
+
+    def is_fetch_expired(self):
+        """Return `True` (and record the current unit as truncated) if the current unit must stop scrolling/paging
+        (`self.fetch_deadline`)"""
+
+        if self.fetch_deadline is not None and time.time() >= self.fetch_deadline:
+            self.truncate(*self.current_unit)
+            return True
+        return False
+
+    def truncate(self,stock,source):
+        """Record that a budget ran out during `source` of `stock`"""
+
+        self.units.setdefault((stock, source), {})['truncated'] = True
+
+    def record(self,stock,source,status,seconds=0.):
+        """Record the `status` of `source` of `stock` (a unit truncated stays truncated)"""
+
+        unit = self.units.setdefault((stock, source), {})
+        if unit.get('truncated') and status == 'done':
+            status = 'truncated'
+        unit.update({'status' : status, 'seconds' : round(seconds, 2)})
+
+    def write_report(self,file_name):
+        """Write the status and seconds of each unit in the csv file `file_name`"""
+
+        with open(file_name, 'w', newline='', encoding='utf-8') as file_:
+            writer = csv.writer(file_)
+            writer.writerow(['stock', 'source', 'status', 'seconds'])
+            for (stock, source), unit in self.units.items():
+                writer.writerow([stock, source, unit.get('status', 'truncated'), unit.get('seconds', 0.)])
@@ -24,4 +24,15 @@
 #  OR OTHER DEALINGS IN THE SOFTWARE.
 ##############################################################################
 
-from sentiment_analysis.twits_analysis import TwitAnalysis
\ No newline at end of file
+"""The models are imported when they are used (PEP 562 `__getattr__`), so that importing the package doesn't
+import transformers, torch or nltk"""
+
+from run_control.lazy import lazy_attributes
+
+#name of the object : module where it is defined
+lazy_imports = {
+    'TwitAnalysis'  : 'sentiment_analysis.twits_analysis',
+    'VaderAnalysis' : 'sentiment_analysis.vader_analysis',
+}
+
+__getattr__, __dir__ = lazy_attributes(globals(), lazy_imports)
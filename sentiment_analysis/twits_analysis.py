@@ -38,10 +38,12 @@ from transformers import BertTokenizer, BertForSequenceClassification
 from transformers import AutoModelForSequenceClassification
 from transformers import AutoTokenizer
 import numpy as np
+import torch
 from scipy.special import softmax
 import csv
 import urllib.request
 import time
+from run_control.instrumentation import instrumentation
 
 
 class TwitAnalysis():
@@ -118,9 +120,11 @@ class TwitAnalysis():
         # extract sentiment prediction if there is a text in the stocktwit
         if (twit!= "") and (twit):
             #encoded_input = self.tokenizer(twit, return_tensors='pt')
-            encoded_input = self.tokenizer(twit, return_tensors='pt', padding=True, truncation=True,max_length=50,
-                                           add_special_tokens = True)
-            output = self.model(**encoded_input)
+            with instrumentation.span('tokenization'):
+                encoded_input = self.tokenizer(twit, return_tensors='pt', padding=True, truncation=True,max_length=50,
+                                               add_special_tokens = True)
+            with instrumentation.span('inference'):
+                output = self.model(**encoded_input)
             scores = output[0][0].detach().numpy()
             scores = softmax(scores)
             ranking = np.argsort(scores)
@@ -138,6 +142,36 @@ class TwitAnalysis():
                     score -=scores[ranking[i]]
         return score
 
+    def roberta_batch(self,twits,batch_size=32):
+        """
+        Same as `self.roberta_analysis()` but for many twits at the same time. The twits are tokenized and passed to
+        the model by batch of `batch_size` (one call to the model per batch instead of one per twit). It returns the
+        list of the 'net' sentiment of each twit (0 for an empty twit)
+
+        Parameters
+        ----------
+        `twits` : list
+            twits/reddit comments (text only)
+        `batch_size` : int
+            number of twits per call to the model
+        """
+
+        positive = self.labels.index('positive')
+        negative = self.labels.index('negative')
+        scores = [0.] * len(twits)
+        to_score = [i for i, twit in enumerate(twits) if twit]
+        for start in range(0, len(to_score), batch_size):
+            batch = to_score[start:start + batch_size]
+            with instrumentation.span('tokenization'):
+                encoded_input = self.tokenizer([twits[i] for i in batch], return_tensors='pt', padding=True,
+                                               truncation=True, max_length=50, add_special_tokens = True)
+            with instrumentation.span('inference'), torch.no_grad():
+                output = self.model(**encoded_input)
+            probabilities = softmax(output[0].numpy(), axis=1)
+            for i, probability in zip(batch, probabilities):
+                scores[i] = float(probability[positive] - probability[negative])
+        return scores
+
     """
     To test to make sure it works
     def finbert_analysis(self,twit,key):
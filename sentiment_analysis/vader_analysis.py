@@ -28,12 +28,13 @@
 import sqlite3
 from os.path import isfile
 import nltk
-#from nltk.sentiment.vader import SentimentIntensityAnalyzer as sia
+from nltk.sentiment.vader import SentimentIntensityAnalyzer as sia
 #nltk.download('vader_lexicon')
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from statistics import mean
-from initialize import Init
+from initialize import InitNewsHeadline as Init
+from run_control.instrumentation import instrumentation
 
 class VaderAnalysis(Init):
     """Class that performs sentiment analysis (NLP) on financial news headlines using the VADER analyzer
@@ -57,6 +58,8 @@ class VaderAnalysis(Init):
             minimum of headlines for a given day to be considered for sentiment analysis. By default, 30.
         `self.sentiment_name` : str
             Name of the sentiment analysis score in the pd Dataframe
+        `self.analyzer` : cls
+            VADER analyzer (`SentimentIntensityAnalyzer` of `nltk`)
         """
 
         #get the attributes (global attributes) from the `initialize.py`
@@ -64,6 +67,7 @@ class VaderAnalysis(Init):
         self.sentiment_name = 'Sentiment Score'
         #Initialize attributes here
         self.min_sample = 15
+        self.analyzer = sia() #the VADER lexicon is loaded once, not for each headline
 
     def __call__(self,ticker_db,hist_price):
         """Special function call operator to call the class object callable
@@ -80,7 +84,8 @@ class VaderAnalysis(Init):
         self.end_date_tempo = None #temporary datetime value (ending date)
 
         #executing the `self.vader_analysis()` function
-        _ = self.vader_analysis()
+        with instrumentation.span(self.ticker_db), instrumentation.span('vader analysis'):
+            _ = self.vader_analysis()
 
         if not (self.sentiment_name in self.pd_data.columns):
             raise Exception(f"Column {self.sentiment_name} does not exist. That's probably because there was no days"
@@ -153,7 +158,7 @@ class VaderAnalysis(Init):
                       f"{self.start_debut_tempo} and {self.news_header[1]} < {self.end_date_tempo}")
             rows = c.fetchall()
             for row in rows:
-                list_results.append(sia().polarity_scores(row[0])['compound'])
+                list_results.append(self.analyzer.polarity_scores(row[0])['compound'])
 
             #to make it easier, the sentiment score from previous day is on the same line than current day return
             #(index + 1 )
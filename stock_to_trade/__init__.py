@@ -24,5 +24,17 @@
 #  OR OTHER DEALINGS IN THE SOFTWARE.
 ##############################################################################
 
-from stock_to_trade.stock_to_trade import StockToTrade
-from stock_to_trade.decide_position import DecidePosition
\ No newline at end of file
+"""The classes are imported when they are used (PEP 562 `__getattr__`)"""
+
+from run_control.lazy import lazy_attributes
+
+#name of the object : module where it is defined
+lazy_imports = {
+    'StockToTrade'      : 'stock_to_trade.stock_to_trade',
+    'DecidePosition'    : 'stock_to_trade.decide_position',
+    'LookbackPlanner'   : 'stock_to_trade.lookback_planner',
+    'MarketCapScreener' : 'stock_to_trade.market_cap',
+    'FinvizScreener'    : 'stock_to_trade.finviz',
+}
+
+__getattr__, __dir__ = lazy_attributes(globals(), lazy_imports)
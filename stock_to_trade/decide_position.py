@@ -53,7 +53,7 @@ class DecidePosition():
 
     def decide_position(self):
         """Method to decide if we take a short or long position on a stock"""
-        df = pd.read_csv(init.timer_file)
+        df = pd.read_csv(init.results_file)
         for _, row in df.iterrows():
             if row[init.column_metrics[1]] > init.min_comments:
 
@@ -0,0 +1,204 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module to get the stocks of a Finviz screener (ex: the most shorted stocks) with all the pages at the same time"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import bs4 as bs
+from web_scrapping.http_client import http_client
+
+
+#total number of stocks of the screener (ex: '<b>Total: </b>253 #1' or '#1 / 253 Total')
+TOTAL = re.compile(r'Total:\s*(?:<[^>]*>\s*)*(\d+)|/\s*(\d+)\s*Total')
+
+
+class FinvizScreener():
+    """Class that gets the stocks (ticker, company) of the Finviz screener of the shorted stocks.
+
+    Things to know :
+    - Finviz displays 20 stocks per page (https://finviz.com/screener.ashx?v=111&f=sh_short_o25&r=1, then r=21,
+      etc.). We read the total number of stocks on the first page and we fetch the other pages at the same time
+      with `self.max_workers` threads (the limits of the host 'finviz.com' are in `init.host_limits`)
+    - If the total is not on the first page, we go through the pages one at a time until a page returns a stock
+      we already have (the end of the list)
+    - The stocks are cached for the day per short level in `init.finviz_dir`. If a page fails (ex: 429 after the
+      retries), we keep the stocks of the pages we have for the run but the screen is not cached, so that we don't
+      keep a partial list for the day
+    """
+
+    def __init__(self,init):
+        """
+        Parameter
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+
+        Attributes
+        ----------
+        `self.page_size` : int
+            number of stocks per page
+        `self.max_workers` : int
+            number of pages fetched at the same time
+        `self.headers` : dict
+            headers of the requests to Finviz
+        `self.complete` : boolean
+            `True` if all the pages of the last screen were fetched
+        """
+
+        self.init = init
+        self.page_size = 20
+        self.max_workers = 2
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                          '(KHTML, like Gecko) Chrome/71.0.3578.98 Safari/537.36'}
+        self.complete = True
+
+    def __call__(self,short_level):
+        """Return the stocks (list of (ticker, company)) with `short_level` % or more of the floating shares
+        shorted"""
+
+        stocks = self.load(short_level)
+        if stocks is None:
+            try:
+                stocks = self.screen(short_level)
+            except Exception as e:
+                logging.error(f"Error when screening the shorted stocks on Finviz : {e}")
+                return []
+            if not self.complete:
+                logging.warning(f"The Finviz screen is partial ({len(stocks)} stocks), it is not cached")
+            elif stocks:
+                self.save(short_level, stocks)
+        return stocks
+
+    def cache_file(self,short_level):
+        """Return the json file with the stocks of `short_level`"""
+
+        return os.path.join(self.init.finviz_dir, f'short_{short_level}.json')
+
+    def load(self,short_level):
+        """Return the stocks of `short_level` screened today (`None` if there are none)"""
+
+        file_ = self.cache_file(short_level)
+        if not os.path.exists(file_):
+            return None
+        with open(file_, encoding='utf-8') as tempo_file:
+            cache = json.load(tempo_file)
+        if cache.get('date') != date.today().isoformat():
+            return None
+        return [tuple(stock) for stock in cache['stocks']]
+
+    def save(self,short_level,stocks):
+        """Write the stocks of `short_level` screened today (temporary file and then renamed)"""
+
+        os.makedirs(self.init.finviz_dir, exist_ok=True)
+        file_ = self.cache_file(short_level)
+        with open(file_ + '.tmp', 'w', encoding='utf-8') as tempo_file:
+            json.dump({'date' : date.today().isoformat(), 'stocks' : stocks}, tempo_file)
+        os.replace(file_ + '.tmp', file_)
+
+    def url(self,short_level,first_row):
+        """Return the url of the page of `short_level` that starts at the stock `first_row` (1, 21, 41, etc.)"""
+
+        return ''.join(['https://finviz.com/screener.ashx?v=111&f=sh_short_o', str(short_level), '&r=',
+                        str(first_row)])
+
+    def fetch(self,url):
+        """Return the html of the page `url`. Raise an exception if the page fails (ex: 429 after the retries)"""
+
+        response = http_client.get(url, headers=self.headers)
+        if response.status_code != 200:
+            raise Exception(f"Finviz returned {response.status_code} for the page {url}")
+        return response.text
+
+    def parse(self,text):
+        """Return the stocks (list of (ticker, company)) of the page `text`"""
+
+        soup = bs.BeautifulSoup(text, 'lxml')
+        stocks = []
+        for row in soup.find_all('tr', {'valign': 'top'})[1:]:
+            cells = row.findAll('td')
+            if len(cells) > 2:
+                stocks.append((cells[1].text, cells[2].text))
+        return stocks
+
+    def screen(self,short_level):
+        """Return the stocks of all the pages of the screener of `short_level`. If a page after the first one fails,
+        we return the stocks of the other pages and `self.complete` is `False`"""
+
+        self.complete = True
+        text = self.fetch(self.url(short_level, 1))
+        stocks = self.parse(text)
+        total = TOTAL.search(text)
+        if total is None:
+            logging.warning("Total number of stocks not found on Finviz, the pages are fetched one at a time")
+            return self.screen_serial(short_level, stocks)
+
+        total = int(total.group(1) or total.group(2))
+        urls = [self.url(short_level, first_row) for first_row in range(self.page_size + 1, total + 1, self.page_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.fetch, url) for url in urls]
+            for future in futures:
+                try:
+                    stocks += self.parse(future.result())
+                except Exception as e:
+                    logging.error(f"Error when getting a page of the Finviz screen : {e}")
+                    self.complete = False
+        return self.unique(stocks)
+
+    def screen_serial(self,short_level,stocks):
+        """Return the stocks of the pages after the first one (`stocks`), fetched one at a time until a page returns
+        a stock we already have. If a page fails, we return the stocks we have and `self.complete` is `False`"""
+
+        tickers = {ticker for ticker, _ in stocks}
+        first_row = self.page_size + 1
+        while True:
+            try:
+                page = self.parse(self.fetch(self.url(short_level, first_row)))
+            except Exception as e:
+                logging.error(f"Error when getting a page of the Finviz screen : {e}")
+                self.complete = False
+                return stocks
+            new_stocks = [stock for stock in page if stock[0] not in tickers]
+            stocks += new_stocks
+            tickers.update(ticker for ticker, _ in new_stocks)
+            if not page or len(new_stocks) < len(page):
+                return stocks
+            first_row += self.page_size
+
+    def unique(self,stocks):
+        """Return `stocks` without the duplicated tickers (the order is kept)"""
+
+        tickers = set()
+        unique_stocks = []
+        for ticker, company in stocks:
+            if ticker not in tickers:
+                tickers.add(ticker)
+                unique_stocks.append((ticker, company))
+        return unique_stocks
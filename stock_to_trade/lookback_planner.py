@@ -0,0 +1,157 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module to decide how far in the past (lookback window) we webscrap each stock from its posting velocity"""
+
+import json
+import logging
+import math
+import os
+from datetime import datetime, timedelta
+import requests
+from web_scrapping.http_client import http_client
+
+
+class LookbackPlanner():
+    """Class that plans the lookback window (in hours) of each stock in `init.lookback` (see `init.get_time_ago()`).
+
+    With the binary switch `init.time_ago_trend` / `init.time_ago_no_trend`, a quiet stock still scrolls back a week
+    and a semi-popular one (not trending) can scroll for many minutes. Here we estimate the posting velocity of each
+    stock (twits per hour on Stocktwits) and choose the window that reaches `init.lookback_target` twits, between
+    `init.lookback_min` and `init.time_ago_no_trend` hours, so that the webscrapping time per stock is roughly
+    constant.
+
+    The velocity comes from the history of the velocities we observed in the last runs (`self.observe()`, saved in
+    `init.lookback_file`) or, if the stock has no recent history, from the first page of its Stocktwits stream
+    (30 most recent twits)
+    """
+
+    def __init__(self,init):
+        """
+        Parameter
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+
+        Attributes
+        ----------
+        `self.stream_endpoint` : str
+            Endpoint of the symbol stream of the Stocktwits API. The stock is added with `format()`
+        `self.time_out` : int
+            Number of seconds before a request to the API is cancelled
+        `self.smoothing` : float
+            weight of the last velocity observed in the velocity of the history (exponential moving average)
+        `self.max_age` : int
+            number of days after which a velocity of the history is too old to be used
+        `self.velocities` : dict
+            history of the velocities. The keys are the stocks and the items are a dictionary with the velocity
+            (twits per hour) and the date it was observed
+        """
+
+        self.init = init
+        self.stream_endpoint = ''.join([self.init.stocktwits_api, 'streams/symbol/{}.json'])
+        self.time_out = 10
+        self.date_format = '%Y-%m-%dT%H:%M:%SZ' #format of `created_at` in the API
+        self.smoothing = 0.5
+        self.max_age = 7
+        self.velocities = {}
+
+    def __call__(self,stocks=None):
+        """Plan the lookback window of `stocks` (all the stocks we webscrap by default) in `self.init.lookback`"""
+
+        self.load()
+        for stock in (stocks if stocks is not None else self.init.stock_dictionnary):
+            velocity = self.history_velocity(stock)
+            if velocity is None:
+                velocity = self.page_velocity(stock)
+            self.init.lookback[stock] = self.window(velocity)
+        return self.init.lookback
+
+    def load(self):
+        """Load the history of the velocities"""
+
+        if os.path.exists(self.init.lookback_file):
+            with open(self.init.lookback_file, encoding='utf-8') as file_:
+                self.velocities = json.load(file_)
+
+    def save(self):
+        """Write the history of the velocities (temporary file and then renamed)"""
+
+        with open(self.init.lookback_file + '.tmp', 'w', encoding='utf-8') as file_:
+            json.dump(self.velocities, file_)
+        os.replace(self.init.lookback_file + '.tmp', self.init.lookback_file)
+
+    def window(self,velocity):
+        """Return the lookback window (in hours) to reach `self.init.lookback_target` twits at `velocity` (twits per
+        hour)"""
+
+        if not velocity:
+            return self.init.time_ago_no_trend
+        hours = math.ceil(self.init.lookback_target / velocity)
+        return min(self.init.time_ago_no_trend, max(self.init.lookback_min, hours))
+
+    def history_velocity(self,stock):
+        """Return the velocity of `stock` in the history (`None` if there is none in the last `self.max_age` days)"""
+
+        history = self.velocities.get(stock)
+        if history is None:
+            return None
+        if datetime.fromisoformat(history['date']) < datetime.now() - timedelta(days=self.max_age):
+            return None
+        return history['velocity']
+
+    def page_velocity(self,stock):
+        """Return the velocity of `stock` estimated with the first page of its Stocktwits stream (`None` if we can't
+        get it). If the page has all the twits of the stock, the velocity is the one of a quiet stock"""
+
+        try:
+            response = http_client.get(self.stream_endpoint.format(stock), timeout=self.time_out)
+        except requests.RequestException as e:
+            logging.error(f"First page of the Stocktwits stream of {stock} : {e}")
+            return None
+        if response.status_code != 200:
+            logging.error(f"Stocktwits stream returned {response.status_code} for {stock}")
+            return None
+
+        data = response.json()
+        created_at = [datetime.strptime(message['created_at'], self.date_format)
+                      for message in data.get('messages', [])]
+        if len(created_at) < 2 or not data.get('cursor', {}).get('more'):
+            return len(created_at) / self.init.time_ago_no_trend
+        hours = max((datetime.utcnow() - min(created_at)).total_seconds() / 3600, 1/60) #`created_at` is in UTC
+        return len(created_at) / hours
+
+    def observe(self,stock,nb_twits,hours):
+        """Add the velocity observed for `stock` (`nb_twits` twits on Stocktwits in the last `hours` hours) to the
+        history"""
+
+        if not hours:
+            return
+        velocity = nb_twits / hours
+        history = self.history_velocity(stock)
+        if history is not None:
+            velocity = self.smoothing * velocity + (1 - self.smoothing) * history
+        self.velocities[stock] = {'velocity' : velocity, 'date' : datetime.now().isoformat()}
+        self.save()
@@ -0,0 +1,173 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module to get the market capitalisation of many stocks at the same time (Yahoo Finance key statistics)"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import bs4 as bs
+from web_scrapping.http_client import http_client
+
+
+#value of the first cell after the label 'Market Cap' in the key statistics table
+MARKET_CAP = re.compile(r'>Market Cap[^<]*<.*?</td>\s*<td[^>]*>(?:<[^>]*>)*([^<]+)<', re.S)
+#units of the market capitalisation
+UNITS = {'T' : 10**12, 'B' : 10**9, 'M' : 10**6}
+
+
+def parse_market_cap(text):
+    """Return the market capitalisation (in $) of the text of a cell (ex: '2.1T'), `None` if it is not available
+    ('N/A') or in an unknown unit"""
+
+    text = text.strip().replace(',', '')
+    if not text or text[-1] not in UNITS:
+        return None
+    try:
+        return float(text[:-1]) * UNITS[text[-1]]
+    except ValueError:
+        return None
+
+
+class MarketCapScreener():
+    """Class that gets the market capitalisation of stocks on Yahoo Finance (key statistics).
+
+    Things to know :
+    - The pages are fetched at the same time by `self.max_workers` threads with the pooled sessions of
+      `http_client` (the limits of the host 'finance.yahoo.com' are in `init.host_limits`)
+    - We only read the cell of the market capitalisation with a regular expression (`MARKET_CAP`) instead of
+      parsing the whole page. If the layout changes and it doesn't match, we parse the page with BeautifulSoup as
+      before
+    - The market capitalisations are cached for the day in `init.market_cap_file`, so that the stocks already
+      screened today are not fetched again
+    - If Yahoo redirects (the stock doesn't have key statistics) or the market capitalisation is not available, it
+      is `None`. If the request fails, it is `None` too but it is not cached (we try again on the next call)
+    """
+
+    def __init__(self,init):
+        """
+        Parameter
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+
+        Attributes
+        ----------
+        `self.max_workers` : int
+            number of pages fetched at the same time
+        `self.headers` : dict
+            headers of the requests to Yahoo Finance
+        `self.market_caps` : dict
+            market capitalisation (in $) of the stocks (key) screened today
+        `self.failed` : set
+            stocks for which the request failed (not cached)
+        """
+
+        self.init = init
+        self.max_workers = 8
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                          '(KHTML, like Gecko) Chrome/71.0.3578.98 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'DNT': '1',  # Do Not Track Request Header
+        }
+        self.market_caps = {}
+        self.failed = set()
+
+    def __call__(self,tickers):
+        """Return the market capitalisation (in $, `None` if we don't know it) of each ticker of `tickers`"""
+
+        self.load()
+        self.failed = set()
+        market_caps = {ticker : self.market_caps[ticker] for ticker in tickers if ticker in self.market_caps}
+        new_tickers = [ticker for ticker in tickers if ticker not in market_caps]
+        if new_tickers:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for ticker, market_cap in zip(new_tickers, executor.map(self.fetch, new_tickers)):
+                    market_caps[ticker] = market_cap
+                    if ticker not in self.failed:
+                        self.market_caps[ticker] = market_cap
+            self.save()
+        return market_caps
+
+    def load(self):
+        """Load the market capitalisations screened today"""
+
+        self.market_caps = {}
+        if os.path.exists(self.init.market_cap_file):
+            with open(self.init.market_cap_file, encoding='utf-8') as file_:
+                cache = json.load(file_)
+            if cache.get('date') == date.today().isoformat():
+                self.market_caps = cache['market_caps']
+
+    def save(self):
+        """Write the market capitalisations screened today (temporary file and then renamed)"""
+
+        with open(self.init.market_cap_file + '.tmp', 'w', encoding='utf-8') as file_:
+            json.dump({'date' : date.today().isoformat(), 'market_caps' : self.market_caps}, file_)
+        os.replace(self.init.market_cap_file + '.tmp', self.init.market_cap_file)
+
+    def fetch(self,ticker):
+        """Return the market capitalisation of `ticker` (run by a thread of the pool)"""
+
+        url = ''.join(['https://finance.yahoo.com/quote/', ticker, '/key-statistics?p=',ticker])
+        try:
+            response = http_client.get(url, headers=self.headers)
+        except Exception as e:
+            logging.error(f"Error when getting the market cap of {ticker} : {e}")
+            self.failed.add(ticker)
+            return None
+
+        #not possible to see the market cap if we have a redirect
+        if any(response_.status_code == 302 for response_ in response.history):
+            return None
+        #an error page (ex: 404, 429 after the retries) is not cached, we try again on the next run
+        if response.status_code != 200:
+            logging.error(f"Error {response.status_code} when getting the market cap of {ticker}")
+            self.failed.add(ticker)
+            return None
+        return self.parse(response.text)
+
+    def parse(self,text):
+        """Return the market capitalisation in the key statistics page `text`"""
+
+        match = MARKET_CAP.search(text)
+        if match is not None:
+            return parse_market_cap(match.group(1))
+
+        soup = bs.BeautifulSoup(text, 'lxml')
+        tables = soup.find_all('table', {'class': 'W(100%) Bdcl(c)'})
+        if not tables:
+            logging.error("Table to get US market cap in `MarketCapScreener.parse()` does not exist")
+            return None
+        #the market capitalisation is the second cell of the first row
+        for row_ in tables[0].findAll('tr')[0:1]:
+            for market_cap_ in row_.findAll('td')[1:2]:
+                return parse_market_cap(market_cap_.text)
+        return None
@@ -26,7 +26,9 @@
 
 """Module to determine the stock we want to webscrap the data from"""
 
-import requests
+from web_scrapping.http_client import http_client
+from stock_to_trade.market_cap import MarketCapScreener
+from stock_to_trade.finviz import FinvizScreener
 import string
 import bs4 as bs
 
@@ -75,73 +77,19 @@ class StockToTrade():
 
     def check_cap(self):
         """make sure the stocks has the minimum desired market cap. If not it is remove form the stock we want
-        to webscrap"""
+        to webscrap. The market caps are fetched at the same time and cached for the day (see `market_cap.py`)"""
 
-        tempo_dict = self.init.stock_dictionnary.copy()
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                          '(KHTML, like Gecko) Chrome/71.0.3578.98 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'DNT': '1',  # Do Not Track Request Header
-            'Connection': 'close'
-        }
-
-        for ticker in self.init.stock_dictionnary:
-            url = ''.join(['https://finance.yahoo.com/quote/', ticker, '/key-statistics?p=',ticker])
-            response = requests.get(url,headers=headers)
-
-            #check if we have a redirect
-            is_redirect = False
-            for response_ in response.history:
-                if response_.status_code == 302:
-                    # not possible to see the market cap, so the stock is not popped out of the list
-                    tempo_dict.pop(ticker, None)
-                    is_redirect = True
-                    break
-
-            if is_redirect:
-                is_redirect =False
-                continue
-
-            soup = bs.BeautifulSoup(response.text, 'lxml')
-            # Grab the table with the market cap in it
-            table = soup.find_all('table', {'class': 'W(100%) Bdcl(c)'})[0]
-            if table == []:
-                raise Exception("Table to get US market cap in function `check_cap()` does not exist")
-
-            # get the market capitalisation only
-            for row_ in table.findAll('tr')[0:1]:
-                for market_cap_ in row_.findAll('td')[1:2]:
-                    market_cap = market_cap_.text
-
-            if market_cap == 'N/A':
-                tempo_dict.pop(ticker, None)
-                continue
-
-            #check if market cap is in 'Trillions' (T),'Billions' (B) or 'Millions' (M)
-            elif "T" in market_cap:
-                market_cap = 10**12*float(market_cap.replace('T',''))
-            elif 'B' in market_cap:
-                market_cap = 10**9*float(market_cap.replace('B',''))
-            elif 'M' in market_cap:
-                market_cap = 10**6*float(market_cap.replace('M',''))
-            else:
-                tempo_dict.pop(ticker, None)
-                continue
-
-            if market_cap < self.init.min_cap:
-                tempo_dict.pop(ticker, None)
-
-        self.init.stock_dictionnary = tempo_dict
+        market_caps = MarketCapScreener(self.init)(list(self.init.stock_dictionnary))
+        #a stock without market cap (redirect, 'N/A' or unknown unit) is removed too
+        self.init.stock_dictionnary = {ticker : keywords for ticker, keywords in self.init.stock_dictionnary.items()
+                                       if market_caps[ticker] is not None and market_caps[ticker] >= self.init.min_cap}
 
     def get_trending(self):
         """Function to get the most trending stock on Stock Twits
         By default it will return the 30 most trending stocks
         """
 
-        response = requests.get(self.stocktwit_trending)
+        response = http_client.get(self.stocktwit_trending)
         i =0
         symbol_list = response.json()['symbols']
         for stock in symbol_list:
@@ -174,7 +122,7 @@ class StockToTrade():
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
                           '(KHTML, like Gecko) Chrome/71.0.3578.98 Safari/537.36'}
-        resp = requests.get(url, headers=headers)
+        resp = http_client.get(url, headers=headers)
         soup = bs.BeautifulSoup(resp.text, 'lxml')
         return soup.find_all('tr', {'valign': class_str})
 
@@ -190,43 +138,10 @@ class StockToTrade():
                             f"values.")
 
 
-        symbol_list = []
-        symbol_exist = False
-        ticker_number = 1 #which page we are. On finviz, for the shorted stocks, it displays 20 ticker per page.
-                        #So the first page will look like : https://finviz.com/screener.ashx?v=111&f=sh_short_o25&r=1,
-                        #the second : https://finviz.com/screener.ashx?v=111&f=sh_short_o25&r=21, etc.
-
-        while not symbol_exist:
-            url_ = ''.join(['https://finviz.com/screener.ashx?v=111&f=sh_short_o', str(self.init.short_level),'&r=',
-                            str(ticker_number)])
-
-            tables = []
-            tables = self.call_bs(url_, 'tr', 'top')
-
-            for table in tables[1:]:
-               #getting the ticker
-                for row in table.findAll('td')[1:2]:
-                    # we check if we already have the symbol in the list. It will tell us that we are at the end
-                    # of the list in finviz
-                    if row.text in symbol_list:
-                        symbol_exist = True
-                        break
-                    symbol_list.append(row.text)
-                    ticker = row.text
-
-                #getting the company name
-                for row in table.findAll('td')[2:3]:
-                    company = row.text
-
-                #symbol already exist, we are at the end of the list in Finviz
-                if symbol_exist:
-                    break
-
-                ticker = self.adjust_keywords(ticker, company)
-                self.set_trending(ticker, False)
-
-            #go to the next page
-            ticker_number +=20
+        #all the pages are fetched at the same time and cached for the day (see `finviz.py`)
+        for ticker, company in FinvizScreener(self.init)(self.init.short_level):
+            ticker = self.adjust_keywords(ticker, company)
+            self.set_trending(ticker, False)
 
 
     def adjust_keywords(self,symbol,stock_name):
@@ -24,9 +24,20 @@
 #  OR OTHER DEALINGS IN THE SOFTWARE.
 ##############################################################################
 
-from web_scrapping.finnhub import FinnHub
-from web_scrapping.twitter_api import TwitsApi
-from web_scrapping.reddit_api_old import RedditApiOld
-from web_scrapping.stocktwits_api import StockTwitsApi
-from web_scrapping.alpha_vantage import HistoricalReturn
-from web_scrapping.reddit_api import RedditApi_
+"""The webscrappers are imported when they are used (PEP 562 `__getattr__`), so that a run only imports the
+dependencies (selenium, fasttext, pmaw, etc.) of the sources it uses"""
+
+from run_control.lazy import lazy_attributes
+
+#name of the object : module where it is defined
+lazy_imports = {
+    'FinnHub'          : 'web_scrapping.finnhub',
+    'TwitsApi'         : 'web_scrapping.twitter_api',
+    'StockTwitsApi'    : 'web_scrapping.stocktwits_api',
+    'StockTwitsStream' : 'web_scrapping.stocktwits_stream',
+    'HistoricalReturn' : 'web_scrapping.alpha_vantage',
+    'RedditApi_'       : 'web_scrapping.reddit_api',
+    'ParallelScrap'    : 'web_scrapping.parallel_scrap',
+}
+
+__getattr__, __dir__ = lazy_attributes(globals(), lazy_imports)
@@ -26,7 +26,7 @@
 
 """It's the module to get info and make API calls to StockTwits"""
 
-import requests
+from web_scrapping.http_client import http_client
 from bs4 import BeautifulSoup
 import html5lib
 from datetime import datetime, timedelta,time
@@ -41,6 +41,7 @@ import pandas as pd
 import os
 from pathlib import Path
 import web_scrapping.package_methods as pm
+from run_control.instrumentation import instrumentation
 
 
 class FinnHub(InitNewsHeadline):
@@ -103,12 +104,17 @@ class FinnHub(InitNewsHeadline):
                                             # error in SQLite database
         self.js_data = []
 
-        #call the methods here
+        #call the methods here (each one is a stage of the ticker, see `instrumentation.py`)
         self.js_data.clear()
-        self.req_new()
-        self.create_table()
-        self.clean_table()
-        self.lang_review()
+        with instrumentation.span(self.ticker):
+            with instrumentation.span('request news'):
+                self.req_new()
+            with instrumentation.span('create table'):
+                self.create_table()
+            with instrumentation.span('clean table'):
+                self.clean_table()
+            with instrumentation.span('language review'):
+                self.lang_review()
 
 
     def init_sql(func):
@@ -257,5 +263,5 @@ class FinnHub(InitNewsHeadline):
         """ Method that makes news request(s) to the Finnhub API"""
         request_ =  'https://finnhub.io/api/v1/company-news?symbol=' + self.ticker + '&from=' + date_ + \
                     '&to=' + date_ + '&token=' + self.finhub_key
-        response_ = requests.get(request_)
+        response_ = http_client.get(request_)
         self.js_data += response_.json()
\ No newline at end of file
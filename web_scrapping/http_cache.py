@@ -0,0 +1,147 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module with the on-disk cache of the HTTP responses of the pages that change rarely (used by `http_client.py`)"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class HttpCache():
+    """On-disk cache of the responses (status 200, without redirect) of the GET requests.
+
+    Things to know :
+    - Each URL (with its parameters) has a time to live given by the longest prefix ('host/path') of `ttl` that it
+      starts with. The URLs without a time to live are not cached
+    - A response younger than its time to live is returned without any network call
+    - An older response is revalidated with its `ETag` (`If-None-Match`) and `Last-Modified`
+      (`If-Modified-Since`) : if the server answers 304, the body in the cache is returned and its time is reset
+    - Each response is a json file (url, status, headers, encoding and time it was stored or revalidated) and a
+      file with the body, named after the hash of the URL. They are written in a temporary file and then renamed
+    """
+
+    validators = ['ETag', 'Last-Modified', 'Content-Type']
+
+    def __init__(self, cache_dir, ttl):
+        """
+        Parameters
+        ----------
+        `cache_dir` : str
+            directory of the cache
+        `ttl` : dict
+            time to live (in seconds) of the URLs that start with the prefix 'host/path' (key)
+        """
+
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
+
+    def time_to_live(self, url):
+        """Return the time to live of `url` (`None` if it is not cached)"""
+
+        parts = urlsplit(url)
+        address = parts.hostname + parts.path
+        prefixes = [prefix for prefix in self.ttl if address.startswith(prefix)]
+        return self.ttl[max(prefixes, key=len)] if prefixes else None
+
+    def key(self, url, params=None):
+        """Return the name of the files of `url` with its `params` in the cache"""
+
+        request = requests.Request('GET', url, params=params).prepare()
+        return os.path.join(self.cache_dir, hashlib.sha256(request.url.encode('utf-8')).hexdigest())
+
+    def load(self, key):
+        """Return the entry (metadata) of `key` (`None` if it is not in the cache)"""
+
+        try:
+            with open(key + '.json', encoding='utf-8') as file_:
+                return json.load(file_)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry, ttl):
+        """Return `True` if `entry` is younger than `ttl` seconds"""
+
+        return time.time() - entry['time'] < ttl
+
+    def conditional_headers(self, entry):
+        """Return the headers to revalidate `entry`"""
+
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def response(self, key, entry):
+        """Return the `requests.Response` of `entry` with the body in the cache (`None` if the body is missing)"""
+
+        try:
+            with open(key + '.body', 'rb') as file_:
+                content = file_.read()
+        except OSError:
+            return None
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response._content = content
+        return response
+
+    def write(self, file_, value, mode):
+        """Write `value` in `file_` (temporary file of the thread and then renamed)"""
+
+        tempo_name = f'{file_}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tempo_name, mode, **({} if 'b' in mode else {'encoding' : 'utf-8'})) as tempo_file:
+            if 'b' in mode:
+                tempo_file.write(value)
+            else:
+                json.dump(value, tempo_file)
+        os.replace(tempo_name, file_)
+
+    def store(self, key, response):
+        """Store `response` in the cache if it is a 200 without redirect"""
+
+        if response.status_code != 200 or response.history:
+            return
+        self.write(key + '.body', response.content, 'wb')
+        entry = {'url' : response.url, 'status' : response.status_code, 'encoding' : response.encoding,
+                 'headers' : {name : response.headers[name] for name in self.validators if name in response.headers},
+                 'time' : time.time()}
+        self.write(key + '.json', entry, 'w')
+
+    def touch(self, key, entry):
+        """Reset the time of `entry` (revalidated by the server)"""
+
+        self.write(key + '.json', dict(entry, time=time.time()), 'w')
@@ -0,0 +1,272 @@
+#!/usr/local/bin/python3.7
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Module with the HTTP client shared by the project (`http_client`) : pooled keep-alive sessions, default timeout,
+jittered retries on 429/5xx, concurrency and rate limits per host, on-disk cache (`http_cache.py`) and metrics of
+the requests"""
+
+import json
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from run_control.instrumentation import instrumentation
+
+
+class HostLimit():
+    """Concurrency (semaphore) and rate (minimum interval between two requests) limits of a host"""
+
+    def __init__(self, concurrency, rate=None):
+        """
+        Parameters
+        ----------
+        `concurrency` : int
+            maximum number of requests in flight at the same time on the host
+        `rate` : float
+            maximum number of requests per second on the host (`None` for no limit)
+        """
+
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.interval = 1 / rate if rate else 0.
+        self.lock = threading.Lock()
+        self.next_time = 0.
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        if self.interval:
+            #each request books the next slot, so that the threads wait their turn
+            with self.lock:
+                wait_time = self.next_time - time.monotonic()
+                self.next_time = max(self.next_time, time.monotonic()) + self.interval
+            if wait_time > 0:
+                time.sleep(wait_time)
+        return self
+
+    def __exit__(self, *args):
+        self.semaphore.release()
+        return False
+
+
+class HttpClient():
+    """HTTP client shared by all the modules that call a website or an API (Wikipedia, NYSE, Stocktwits, Finviz,
+    Yahoo Finance, Finnhub).
+
+    Things to know :
+    - Each thread has its own `requests.Session` (a session is not thread-safe), so the connections are kept alive
+      and reused between the requests of a thread
+    - Every request has a timeout (`self.timeout` by default)
+    - A request is retried up to `self.retries` times on a connection error, a timeout or a status 429/5xx. We wait
+      the 'Retry-After' header if there is one, or an exponential backoff with a random jitter (so that the threads
+      don't retry at the same time). After the last retry, the last response is returned (or the error raised)
+    - Each host has a concurrency and a rate limit (`self.host_limits`, `self.default_limit` for the other hosts)
+    - The GET responses of the pages that change rarely are cached on disk (`self.cache`, see `http_cache.py`) and
+      revalidated once their time to live is passed. In offline mode (`self.offline`), the responses come only from
+      the cache (even if they are too old) and a request that is not in the cache raises `requests.ConnectionError`
+    - The metrics per host (requests, retries, failures, status, seconds, cache hits and revalidations) are in
+      `self.metrics` and each request is timed in the span 'http `host`' (`instrumentation.py`)
+    """
+
+    retry_status = {429, 500, 502, 503, 504}
+
+    def __init__(self, timeout=10, retries=3, backoff=0.5, max_backoff=30., pool_size=10, host_limits=None,
+                 default_limit=None, cache=None, offline=False):
+        """
+        Parameters
+        ----------
+        `timeout` : float
+            default number of seconds before a request is cancelled
+        `retries` : int
+            maximum number of retries of a request
+        `backoff` : float
+            number of seconds we wait before the first retry (doubled at each retry)
+        `max_backoff` : float
+            maximum number of seconds we wait before a retry
+        `pool_size` : int
+            maximum number of connections kept alive per host in a session
+        `host_limits` : dict
+            limits of the hosts (key) : dictionary with the 'concurrency' and the 'rate' (requests per second)
+        `default_limit` : dict
+            limits of the hosts that are not in `host_limits`
+        `cache` : cls
+            on-disk cache of the responses (`HttpCache`). `None` for no cache
+        `offline` : boolean
+            serve the responses only from `cache` (`True`) without any network call
+        """
+
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.configure(timeout, retries, backoff, max_backoff, pool_size, host_limits, default_limit, cache, offline)
+
+    def configure(self, timeout=10, retries=3, backoff=0.5, max_backoff=30., pool_size=10, host_limits=None,
+                  default_limit=None, cache=None, offline=False):
+        """Set the parameters of the client (see `self.__init__()`) and reset the limits and the metrics"""
+
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.host_limits = host_limits if host_limits is not None else {}
+        self.default_limit = default_limit if default_limit is not None else {'concurrency' : 4, 'rate' : None}
+        self.cache = cache
+        self.offline = offline
+        self.limits = {}
+        self.metrics = {}
+
+    def session(self):
+        """Return the session of the current thread"""
+
+        if not hasattr(self.local, 'session'):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.local.session = session
+        return self.local.session
+
+    def limit(self, host):
+        """Return the limits of `host`"""
+
+        with self.lock:
+            if host not in self.limits:
+                limit = self.host_limits.get(host, self.default_limit)
+                self.limits[host] = HostLimit(limit['concurrency'], limit.get('rate'))
+            return self.limits[host]
+
+    def host_metrics(self, host):
+        """Return the metrics of `host` (created empty if it's a new host). Must be called with `self.lock`"""
+
+        return self.metrics.setdefault(host, {'requests' : 0, 'retries' : 0, 'failures' : 0, 'seconds' : 0.,
+                                              'status' : {}, 'cache_hits' : 0, 'revalidated' : 0})
+
+    def add_cache_metrics(self, host, name):
+        """Add a cache hit or a revalidation (`name`) on `host` to the metrics"""
+
+        with self.lock:
+            self.host_metrics(host)[name] += 1
+
+    def add_metrics(self, host, seconds, status=None, retry=False, failure=False):
+        """Add a request (or a try) on `host` to the metrics"""
+
+        with self.lock:
+            metrics = self.host_metrics(host)
+            metrics['requests'] += 1
+            metrics['retries'] += retry
+            metrics['failures'] += failure
+            metrics['seconds'] += seconds
+            if status is not None:
+                metrics['status'][str(status)] = metrics['status'].get(str(status), 0) + 1
+
+    def redact(self, url):
+        """Return the host and the path of `url` to log it. The query is removed, it may have an API key (ex: `token`
+        of Finnhub)"""
+
+        parts = urlsplit(url)
+        return parts.netloc.rsplit('@', 1)[-1] + parts.path
+
+    def wait_time(self, attempt, response=None):
+        """Number of seconds we wait before the retry `attempt` (0 for the first retry)"""
+
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(self.max_backoff, float(retry_after))
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def request(self, method, url, **kwargs):
+        """Return the response of the request `method` (ex: 'GET') to `url` from the cache if it is fresh (or
+        revalidated), otherwise send it (see `self.send()`). `kwargs` are passed to `requests.Session.request()`
+        (ex: `params`, `headers`, `timeout`)"""
+
+        host = urlsplit(url).hostname
+        ttl = self.cache.time_to_live(url) if self.cache is not None and method == 'GET' else None
+        key = self.cache.key(url, kwargs.get('params')) if ttl is not None else None
+        entry = self.cache.load(key) if key is not None else None
+        cached = self.cache.response(key, entry) if entry is not None else None
+
+        if cached is not None and (self.offline or self.cache.is_fresh(entry, ttl)):
+            self.add_cache_metrics(host, 'cache_hits')
+            return cached
+        if self.offline:
+            raise requests.ConnectionError(f"Offline mode : {self.redact(url)} is not in the cache")
+        if cached is not None:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **self.cache.conditional_headers(entry))
+
+        response = self.send(method, url, **kwargs)
+        if key is None:
+            return response
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(key, entry)
+            self.add_cache_metrics(host, 'revalidated')
+            return cached
+        self.cache.store(key, response)
+        return response
+
+    def send(self, method, url, **kwargs):
+        """Send the request `method` (ex: 'GET') to `url` with the limits of its host and the retries"""
+
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).hostname
+        limit = self.limit(host)
+        path = self.redact(url)
+        for attempt in range(self.retries + 1):
+            start_time = time.perf_counter()
+            try:
+                with limit, instrumentation.span('http ' + host):
+                    response = self.session().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                is_retry = attempt < self.retries
+                self.add_metrics(host, time.perf_counter() - start_time, retry=is_retry, failure=not is_retry)
+                if not is_retry:
+                    raise
+                logging.warning(f"{method} {path} failed ({type(e).__name__}), retry {attempt + 1}")
+                time.sleep(self.wait_time(attempt))
+                continue
+
+            is_retry = response.status_code in self.retry_status and attempt < self.retries
+            self.add_metrics(host, time.perf_counter() - start_time, response.status_code, retry=is_retry,
+                             failure=response.status_code >= 400 and not is_retry)
+            if not is_retry:
+                return response
+            logging.warning(f"{method} {path} returned {response.status_code}, retry {attempt + 1}")
+            time.sleep(self.wait_time(attempt, response))
+
+    def get(self, url, **kwargs):
+        """Send a GET request to `url` (see `self.request()`)"""
+
+        return self.request('GET', url, **kwargs)
+
+    def write_report(self, file_name):
+        """Write the metrics per host in the json file `file_name`"""
+
+        with self.lock:
+            with open(file_name, 'w', encoding='utf-8') as file_:
+                json.dump(self.metrics, file_, indent=2, sort_keys=True)
+
+
+#HTTP client of the project (one for the whole run, shared by all the modules)
+http_client = HttpClient()
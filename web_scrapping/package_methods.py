@@ -23,24 +23,21 @@
 #  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
 #  OR OTHER DEALINGS IN THE SOFTWARE.
 ###############################################################################
-""" Methods used across the package wbe_scrapping"""
+""" Methods used across the package wbe_scrapping
+
+selenium, webdriver_manager and fasttext are imported in the functions that use them, so that a source without a
+browser (ex: the Stocktwits API, reddit) doesn't import them"""
 
 from datetime import datetime
 import re
 import emoji
 import time
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from selenium.webdriver.chrome.options import Options as opChrome
-from selenium.webdriver.firefox.options import Options as opFireFox
-import fasttext
 import os
+import json
+import copy
+import threading
+from pathlib import Path
+from run_control.instrumentation import instrumentation
 
 
 def delta_date(start_date,end_date):
@@ -90,7 +87,83 @@ def text_cleanup(text_to_clean):
 
     return text_to_clean
 
-def initialise_driver(which_driver,driver_parameters):
+#path of the drivers already resolved during the run (see `driver_path()`). The lock is for the browsers launched
+#at the same time in `parallel_scrap.py`
+driver_paths = {}
+driver_lock = threading.Lock()
+#slots of the browser cache directories in use by each driver (see `acquire_cache_dir()`)
+cache_slots = {}
+
+def driver_path(which_driver,cache_file=None,refresh=False,max_age=7):
+    """Method that returns the path of the driver binary (chromedriver or geckodriver). `webdriver_manager` checks
+    the latest version over the network each time, so we resolve it only once per run (in memory) and once every
+    `max_age` days across runs (in `cache_file`)
+
+    Parameters
+    ----------
+    `which_driver` : str
+        'chrome' or 'firefox'
+    `cache_file` : str
+        json file where we keep the path of the drivers across runs. `None` to keep it in memory only
+    `refresh` : boolean
+        resolve the path with `webdriver_manager` even if it is in the cache. Ex: the browser was updated
+    """
+
+    with driver_lock:
+        if which_driver in driver_paths and not refresh:
+            return driver_paths[which_driver]
+
+        paths = {}
+        if cache_file and os.path.isfile(cache_file):
+            with open(cache_file) as file:
+                paths = json.load(file)
+        cached = paths.get(which_driver)
+        if (not refresh and cached and os.path.isfile(cached['path']) and
+                time.time() - cached['resolved'] < max_age*24*60*60):
+            path = cached['path']
+        else:
+            if which_driver == 'chrome':
+                from webdriver_manager.chrome import ChromeDriverManager
+                path = ChromeDriverManager().install()
+            else:
+                from webdriver_manager.firefox import GeckoDriverManager
+                path = GeckoDriverManager().install()
+            if cache_file:
+                paths[which_driver] = {'path' : path, 'resolved' : time.time()}
+                Path(os.path.dirname(cache_file)).mkdir(parents=True, exist_ok=True)
+                with open(cache_file, 'w') as file:
+                    json.dump(paths, file)
+
+        driver_paths[which_driver] = path
+        return path
+
+def acquire_cache_dir(which_driver,browser_cache_dir):
+    """Method that returns a persistent cache directory for a new browser (`None` if `browser_cache_dir` is `None`).
+    The browsers opened at the same time can't share the same cache, so each one takes the first free slot
+    (ex: 'chrome_0', 'chrome_1') that must be released with `release_cache_dir()` when the browser is closed. The
+    static files (JS bundles, css) are then downloaded once and reused by the next browsers"""
+
+    if browser_cache_dir is None:
+        return None
+    with driver_lock:
+        slots = cache_slots.setdefault(which_driver, set())
+        slot = 0
+        while slot in slots:
+            slot += 1
+        slots.add(slot)
+    cache_dir = os.path.join(browser_cache_dir, ''.join([which_driver, '_', str(slot)]))
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+def release_cache_dir(which_driver,cache_dir):
+    """Method that frees the slot of the cache directory `cache_dir` taken in `acquire_cache_dir()`"""
+
+    if cache_dir is None:
+        return
+    with driver_lock:
+        cache_slots[which_driver].discard(int(cache_dir.rsplit('_', 1)[1]))
+
+def initialise_driver(which_driver,driver_parameters,lean=False,cache_dir=None):
     """Method to initialize the drivers of our choice (Firefox or Chrome) with parameters defined in `initialize.py`
 
     Parameters
@@ -99,134 +172,412 @@ def initialise_driver(which_driver,driver_parameters):
         Which driver we want to use between
     `driver_parameters` : dict
         Parameters used to initialize the driver. Ex: option, language settings, etc.
+    `lean` : boolean
+        use the lean profile of the driver (no images, no media, blocked URLs, etc.). See `chrome_options()` and
+        `firefox_lean_preferences()` in `initialize.py`
+    `cache_dir` : str
+        persistent cache directory of the browser (see `acquire_cache_dir()`). `None` for a throwaway cache
     """
-    if which_driver == 'chrome':
 
-        return webdriver.Chrome(chrome_options=driver_parameters['options_chrome'],
-                                  executable_path=ChromeDriverManager().install())
+    from selenium.common.exceptions import WebDriverException
+    cache_file = driver_parameters.get('driver_cache_file')
+    try:
+        return start_driver(which_driver,driver_parameters,driver_path(which_driver,cache_file),lean,cache_dir)
+    except WebDriverException:
+        #the browser may have been updated since we resolved the path of the driver
+        return start_driver(which_driver,driver_parameters,driver_path(which_driver,cache_file,refresh=True),lean,
+                            cache_dir)
+
+def start_driver(which_driver,driver_parameters,executable_path,lean,cache_dir):
+    """Method that launches the browser with the driver in `executable_path`. See `initialise_driver()`"""
+
+    from selenium import webdriver
+
+    if which_driver == 'chrome':
+        options_chrome = driver_parameters['options_chrome_lean' if lean else 'options_chrome']
+        if cache_dir is not None:
+            options_chrome = copy.deepcopy(options_chrome)
+            options_chrome.add_argument(''.join(['--disk-cache-dir=', cache_dir]))
+        driver = webdriver.Chrome(chrome_options=options_chrome, executable_path=executable_path)
+        if lean and driver_parameters.get('url_blocklist'):
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls' : driver_parameters['url_blocklist']})
+        return driver
 
     if which_driver == 'firefox':
         profile_ff = webdriver.FirefoxProfile()
         profile_ff.set_preference('intl.accept_languages', driver_parameters['ff_language'])
+        if lean:
+            for preference, value in driver_parameters['ff_lean_preferences'].items():
+                profile_ff.set_preference(preference, value)
+        if cache_dir is not None:
+            profile_ff.set_preference('browser.cache.disk.enable', True)
+            profile_ff.set_preference('browser.cache.disk.parent_directory', cache_dir)
+            profile_ff.set_preference('browser.cache.disk.smart_size.enabled', False)
+            profile_ff.set_preference('browser.cache.disk.capacity', 512000)
         return webdriver.Firefox(options = driver_parameters['options_ff'],firefox_profile=profile_ff,
-                                           executable_path=GeckoDriverManager().install())
+                                           executable_path=executable_path)
+
+
+#JavaScript injected in the page to count the changes in the DOM (new posts loaded after a scroll) with a
+#MutationObserver. It returns the number of changes so far and the height of the page
+MUTATION_OBSERVER = """
+if (window.saMutations === undefined) {
+    window.saMutations = 0;
+    new MutationObserver(function(mutations) {window.saMutations += mutations.length;})
+        .observe(document.body, {childList: true, subtree: true});
+}
+return [window.saMutations, document.body.scrollHeight];
+"""
+
+#JavaScript that returns the timestamp (in ms) of the oldest post on the page. `arguments[0]` is the Xpath of the posts
+#and `arguments[1]` the CSS selector of the element with the published time (in the `datetime` attribute) in a post
+OLDEST_TIMESTAMP = """
+var posts = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var oldest = null;
+for (var i = 0; i < posts.snapshotLength; i++) {
+    var time = posts.snapshotItem(i).querySelector(arguments[1]);
+    if (time === null) continue;
+    var timestamp = Date.parse(time.getAttribute('datetime'));
+    if (!isNaN(timestamp) && (oldest === null || timestamp < oldest)) oldest = timestamp;
+}
+return oldest;
+"""
+
+#JavaScript that extracts all the posts on the page in one call to the browser. `arguments[0]` is the Xpath of the
+#posts and `arguments[1]` the layout of a post on the website (see `extract_posts()`). It returns a list of
+#{id, user, timestamp, directional, text}
+EXTRACT_POSTS = """
+var layout = arguments[1];
+var posts = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var id_pattern = new RegExp(layout.id_pattern);
+var results = [];
+for (var i = 0; i < posts.snapshotLength; i++) {
+    var post = posts.snapshotItem(i);
+    var permalink = post.querySelector(layout.permalink);
+    var status = permalink === null ? null : (permalink.getAttribute('href') || '').match(id_pattern);
+    var time = post.querySelector(layout.time_selector);
+    var timestamp = time === null ? NaN : Date.parse(time.getAttribute('datetime'));
+    var lines = post.innerText.split('\\n');
+    var directional = '';
+    var text_line = layout.text_line;
+    if (layout.directional && lines.length > 1 &&
+            (lines[1].indexOf('Bullish') !== -1 || lines[1].indexOf('Bearish') !== -1)) {
+        directional = lines[1];
+        text_line += 1;
+    }
+    results.push({'id' : status === null ? null : status[1], 'user' : lines[0],
+                  'timestamp' : isNaN(timestamp) ? null : timestamp, 'directional' : directional,
+                  'text' : lines.slice(text_line).join(layout.separator)});
+}
+return results;
+"""
+
+def webscrap_content(which_driver,posts_to_return,end_point,pause_time,search_time,driver_parameters,post_layout,
+                     is_twitter=False,stocktwit_class = None,lean=False,deadline=None):
+    """Method to web-scrap content on Stocktwits and Twitter. It returns the posts (see `extract_posts()`) and the
+    statistics of the scrolling (see `scroll_to_value()`)
+    """
 
+    scroll_stats = {}
+    posts = list(iter_content(which_driver,posts_to_return,end_point,pause_time,search_time,driver_parameters,
+                              post_layout,is_twitter,stocktwit_class,scroll_stats,lean,deadline))
+    return posts,scroll_stats
 
-def webscrap_content(which_driver,posts_to_return,end_point,pause_time,date_to_search,driver_parameters,
-                     is_twitter=False,stocktwit_class = None):
-    """Method to web-scrap content on Stocktwits
+def iter_content(which_driver,posts_to_return,end_point,pause_time,search_time,driver_parameters,post_layout,
+                 is_twitter=False,stocktwit_class = None,scroll_stats=None,lean=False,deadline=None):
+    """Generator that opens the browser and yields the posts while we scroll (see `scroll_to_value()`) until
+    `search_time` or `deadline` (epoch, see `scheduler.py`). The browser is closed when the generator is exhausted or
+    closed. The statistics of the scrolling are written in the dictionary `scroll_stats`
     """
 
-    twitter_post =[]
-    user= []
-    driver = initialise_driver(which_driver,driver_parameters)
-    driver.get(end_point)
-    user,twitter_post = scroll_to_value(driver,posts_to_return,end_point,pause_time,date_to_search,is_twitter,
-                                   stocktwit_class)
-    time.sleep(pause_time)
-    driver.quit()
+    cache_dir = acquire_cache_dir(which_driver,driver_parameters.get('browser_cache_dir'))
+    try:
+        with instrumentation.span('browser launch'):
+            driver = initialise_driver(which_driver,driver_parameters,lean,cache_dir)
+        try:
+            with instrumentation.span('page open'):
+                driver.get(end_point)
+            yield from scroll_to_value(driver,posts_to_return,end_point,pause_time,search_time,post_layout,
+                                       is_twitter,stocktwit_class,scroll_stats,deadline=deadline)
+        finally:
+            driver.quit()
+    finally:
+        release_cache_dir(which_driver,cache_dir)
+
+def extract_posts(driver,posts_to_return,post_layout):
+    """Method that returns all the posts on the page with one call to the browser (see `EXTRACT_POSTS`) instead of
+    reading the text of each post (one call to the browser per post).
 
-    return user,twitter_post
+    Parameters
+    ----------
+    `posts_to_return` : str
+        Xpath of the posts
+    `post_layout` : dict
+        layout of a post on the website. The keys are :
+        'permalink' : CSS selector of the link to the post,
+        'id_pattern' : regex to get the id of the post in the permalink (first group),
+        'time_selector' : CSS selector of the element with the published time in its `datetime` attribute,
+        'text_line' : line (in the text of the post) where the text of the post begins,
+        'separator' : string to join the lines of the text of the post,
+        'directional' : `True` if the second line may be the directional (Bullish or Bearish, on Stocktwits)
+
+    Return
+    ------
+    `posts` : list
+        list of dictionaries with the keys 'id', 'user', 'timestamp' (datetime or `None`), 'directional' and 'text'
+    """
 
-def scroll_to_value(driver,posts_to_return,end_point,pause_time,date_to_search,is_twitter,stocktwit_class):
-    """Method that scrolls until we find the value, then stops. It search for a date and the class containg
-    the date"""
+    posts = driver.execute_script(EXTRACT_POSTS, posts_to_return, post_layout)
+    for post in posts:
+        if post['timestamp'] is not None:
+            post['timestamp'] = datetime.fromtimestamp(post['timestamp']/1000)
+    return posts
+
+def new_posts(posts,posts_id,search_time):
+    """Generator that yields the posts we have not seen yet and that were published after `search_time`. The posts
+    are keyed by their id (or by user and text if they don't have an id) and the keys are added to the set
+    `posts_id`"""
+
+    for post in posts:
+        post_id = post['id'] or (post['user'], post['text'])
+        if post_id in posts_id:
+            continue
+        posts_id.add(post_id)
+        if post['timestamp'] is not None and post['timestamp'] < search_time:
+            continue
+        yield post
+
+def wait_for_load(driver,page_state,timeout,settle_time=0.1,poll_time=0.05):
+    """Method that waits after a scroll until the page has loaded new content, ie the page is higher and the DOM
+    stopped changing for `settle_time` seconds, or until `timeout` seconds.
 
-    wait = WebDriverWait(driver, pause_time)
+    Parameters
+    ----------
+    `driver` : selenium webdriver
+        driver with `MUTATION_OBSERVER` already injected in the page
+    `page_state` : list
+        number of changes in the DOM and height of the page before the scroll
+    `timeout` : float
+        maximum number of seconds we wait for new content
+
+    Return
+    ------
+    `is_loaded` : boolean
+        `True` if new content was loaded, `False` otherwise (we are probably at the end of the page)
+    `page_state` : list
+        number of changes in the DOM and height of the page after waiting
+    `waited` : float
+        number of seconds we waited
+    """
 
-    element_ = None
-    exist = None
-    twitter_tempo = []
-    twitter_post = []
-    user = []
-    screen_height = driver.execute_script("return window.screen.height;")  # return window screen height
-    #screen_height =1080
-    i = 1
-
-    while not element_:
-        #we need to make it sleep, (between 1 and 2 minimum) otherwise the browser doesn't have enough time to load
-        time.sleep(1)
-        try:
-            element_ = wait.until(EC.presence_of_element_located((By.XPATH,date_to_search)))
-        except TimeoutException:
-            pass
+    start_time = time.time()
+    last_change = start_time
+    mutations, height = page_state
+    while True:
+        time.sleep(poll_time)
+        now = time.time()
+        current_mutations, current_height = driver.execute_script(MUTATION_OBSERVER)
+        if current_mutations != mutations:
+            last_change = now
+        mutations = current_mutations
+        is_loaded = current_height > height
+        if is_loaded and now - last_change >= settle_time:
+            return True, [mutations, current_height], now - start_time
+        if now - start_time >= timeout:
+            return is_loaded, [mutations, current_height], now - start_time
+
+def oldest_timestamp(driver,posts_to_return,time_selector):
+    """Method that returns the published time (datetime) of the oldest post on the page with one call to the browser
+    (see `OLDEST_TIMESTAMP`) or `None` if there is no post with a time"""
+
+    timestamp = driver.execute_script(OLDEST_TIMESTAMP, posts_to_return, time_selector)
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp/1000)
+
+def scroll_to_value(driver,posts_to_return,end_point,pause_time,search_time,post_layout,is_twitter,stocktwit_class,
+                    scroll_stats=None,min_timeout=0.5,deadline=None):
+    """Generator that scrolls until the oldest post on the page was published before `search_time`, then stops.
+    It yields the posts (see `extract_posts()`). On twitter, the new posts are yielded after each scroll as they
+    appear. On Stocktwits, they are all yielded at the end.
+
+    After each scroll, we don't sleep for a fixed time. We wait only until the page has loaded the new posts (see
+    `wait_for_load()`) with a timeout that adapts to how long the page took to load the previous scrolls (between
+    `min_timeout` and `pause_time`). The number of scroll steps and the time we waited for the page (idle time) are
+    written in the dictionary `scroll_stats`.
+
+    If the time is passed `deadline` (epoch, time budget of the scheduler, see `scheduler.py`), we stop scrolling
+    and `scroll_stats['truncated']` is `True`"""
+
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.common.by import By
 
+    wait = WebDriverWait(driver, pause_time)
+    posts_id = set() #id of the posts already yielded
+    if scroll_stats is None:
+        scroll_stats = {}
+    scroll_stats.update({'scroll_steps' : 0, 'idle_time' : 0})
+    start_time = time.time()
+    is_loaded = True
+
+    #here we check if we are on a page that is empty on stocktwit (it exists!) so that we don't scroll down
+    # forever. On twitter, we just wait for the first posts
+    try:
+        wait.until(EC.presence_of_element_located((By.XPATH, posts_to_return if is_twitter else stocktwit_class)))
+    except TimeoutException:
+        is_loaded = is_twitter
+    page_state = driver.execute_script(MUTATION_OBSERVER)
+    load_time = pause_time/4 #first guess of the time the page needs to load new posts after a scroll
+    scroll_stats['idle_time'] += time.time() - start_time
+
+    while is_loaded:
         #need to do it every time on twitter as it doesn't load all the DOM from bottom to top
         if is_twitter:
             try:
-                for post in driver.find_elements_by_xpath(posts_to_return):
-                    text_splitting = post.text.split('\n')
-                    user.append(''.join(text_splitting[:1]))
-                    twitter_post.append(' '.join(text_splitting[4:]))
-                    t=5
-                #twitter_post += [post.text for post in driver.find_elements_by_xpath(posts_to_return)]
+                with instrumentation.span('extract'):
+                    posts = extract_posts(driver,posts_to_return,post_layout)
+                    instrumentation.count(items_out=len(posts))
             #it means that the page doesn't exist and will generate an error
             except:
-                pass
+                posts = []
+            yield from new_posts(posts,posts_id,search_time)
+            oldest_post = min([post['timestamp'] for post in posts if post['timestamp'] is not None], default=None)
+        else:
+            oldest_post = oldest_timestamp(driver,posts_to_return,post_layout['time_selector'])
 
-        #here we check if we are on a page that is empty on stocktwit (it exists!) so that we don't scroll down
-        # forever
-        if not is_twitter:
-            try :
-                exist = wait.until(EC.presence_of_element_located((By.XPATH,stocktwit_class)))
-            except:
-                element_ = True
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        #we reached the date we want
+        if oldest_post is not None and oldest_post < search_time:
+            break
 
-        # go to section in window according to `i` and `screen_height`
-        #driver.execute_script(
-         #   "window.scrollTo(0, {screen_height}*{i});".format(screen_height=screen_height, i=i))
-        # return DOM body height
-        scroll_height = driver.execute_script("return document.body.scrollHeight;")
-        i += 1
+        #the time budget ran out, we keep the posts we have
+        if deadline is not None and time.time() >= deadline:
+            scroll_stats['truncated'] = True
+            break
 
-        # check if we are a the end of the page
-        if (screen_height) * i > scroll_height:
-            element_ = True
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        scroll_stats['scroll_steps'] += 1
+        timeout = min(pause_time, max(min_timeout, 4*load_time))
+        with instrumentation.span('page load'):
+            is_loaded, page_state, waited = wait_for_load(driver, page_state, timeout)
+            if not is_loaded and timeout < pause_time:
+                #the page is slower than usual, we give it a last chance before deciding we are at the end of the page
+                is_loaded, page_state, waited_ = wait_for_load(driver, page_state, pause_time - timeout)
+                waited += waited_
+        scroll_stats['idle_time'] += waited
+        load_time = 0.7*load_time + 0.3*waited
 
     #putting the DOM elements (twits) in a dictionary (DOM elements is loaded from bottom to top)
     if not is_twitter:
         #sometimes we may get an error in stocktwits when there are too many posts. Also, if between the time we
-        #reach the desired element (above `while not element_`) and we save the text in a list, there are new posts
+        #reach the desired element (above `while is_loaded`) and we save the text in a list, there are new posts
         #(too many), it may generates an error. In that case, we return the list empty
         try :
-            twitter_post += [post.text for post in driver.find_elements_by_xpath(posts_to_return)]
+            with instrumentation.span('extract'):
+                posts = extract_posts(driver,posts_to_return,post_layout)
+                instrumentation.count(items_out=len(posts))
         except :
-            return [],[]
-    return user,twitter_post
+            return
+        yield from new_posts(posts,posts_id,search_time)
 
-def write_values(comment, pv, model,source, dict_,user=None):
+def write_values(comment, pv, model,source, dict_,user=None,unique_user=False):
     """Method to determine if mood of each comment (positive, negative) with a score between -1 and 1
      (-1 being the most negative and +1 being the most positive and write different values in the
-     pandas DataFrame `self.pd_stock_sentiment`"""
+     columnar buffer `pv.comment_buffer` (materialized later in the pandas DataFrame `pv.pd_stock_sentiment`).
 
-    # remove all unescessary text (transform emoji, remove \n, remove other symbol like $)
-    tempo_comment = text_cleanup(comment)
-    # if it's empty after cleaning, just continue, don't save/analyse the comment
-    if not tempo_comment == '':
-        dict_[pv.columns_sentiment[0]] = tempo_comment
-        dict_[pv.columns_sentiment[1]] = model.roberta_analysis(tempo_comment)
-        dict_[pv.columns_sentiment[3]] = pv.comment_source[source]
-        dict_[pv.columns_sentiment[4]] = user
-        pv.pd_stock_sentiment = pv.pd_stock_sentiment.append \
-            (dict_, ignore_index=True)
+     The duplicates (same text or, if `unique_user` is `True`, same user) are not analysed. In budget mode
+     (`pv.comment_budget`), the comment is offered to the reservoir sample `pv.comment_sample` instead of being
+     scored. `dict_` may have the time the comment was posted ('timestamp', epoch in seconds), kept in the buffer (ex:
+     for the window of the daemon) and used for the time-stratified sample. In adaptive mode (`pv.early_stop`), the
+     comment is scored with the next batch (`score_batch()`)"""
 
-    return pv.pd_stock_sentiment
+    # remove all unescessary text (transform emoji, remove \n, remove other symbol like $)
+    with instrumentation.span('cleanup'):
+        tempo_comment = text_cleanup(comment)
+    # if it's empty after cleaning or a duplicate, just continue, don't save/analyse the comment
+    if not tempo_comment == '' and not pv.comment_buffer.is_duplicate(tempo_comment,user,unique_user):
+        if pv.comment_budget is not None:
+            #budget mode : the comment is only offered to the reservoir sample, the sample is scored at the end of
+            #the source (`score_pending()`)
+            if not pv.comment_sample.is_duplicate(tempo_comment,user,unique_user):
+                pv.comment_sample.offer(pv.comment_source[source], tempo_comment,
+                                        (tempo_comment, dict_.get(pv.columns_sentiment[2]), user,
+                                         dict_.get('timestamp')), user, dict_.get('timestamp'))
+            return pv.comment_buffer
+        if pv.early_stop:
+            #adaptive mode : the comments are scored by batch and the running mean is tested after each batch
+            if pv.sequential_test.queue((tempo_comment, dict_.get(pv.columns_sentiment[2]),
+                                         pv.comment_source[source], user, dict_.get('timestamp'))):
+                score_batch(pv, model)
+            return pv.comment_buffer
+        probability = model.roberta_analysis(tempo_comment)
+        with instrumentation.span('append'):
+            pv.comment_buffer.append(tempo_comment, probability, dict_.get(pv.columns_sentiment[2]),
+                                     pv.comment_source[source], user, dict_.get('timestamp'))
+
+    return pv.comment_buffer
+
+
+def score_batch(pv, model):
+    """Method to score the batch of comments of the sequential test `pv.sequential_test` (adaptive mode, see
+    `sequential_test.py`), write them in the columnar buffer `pv.comment_buffer` and update the test"""
+
+    batch = pv.sequential_test.pop()
+    probabilities = model.roberta_batch([comment[0] for comment in batch])
+    with instrumentation.span('append'):
+        for (text, directional, source_, user, timestamp), probability in zip(batch, probabilities):
+            pv.comment_buffer.append(text, probability, directional, source_, user, timestamp)
+    pv.sequential_test.update(probabilities)
+
+    return pv.comment_buffer
+
+
+def score_pending(pv, model, source):
+    """Method to score the comments not scored yet at the end of `source` and write them in the columnar buffer
+    `pv.comment_buffer` : the reservoir sample of `source` in budget mode (see `comment_sample.py`) or the last batch
+    in adaptive mode (see `score_batch()`). The comments are scored by batch (`model.roberta_batch()`). Nothing is
+    done in the other modes"""
+
+    if pv.comment_budget is None:
+        if pv.early_stop and pv.sequential_test.pending:
+            score_batch(pv, model)
+        return pv.comment_buffer
+    source_ = pv.comment_source[source]
+    sample = pv.comment_sample.pop(source_)
+    probabilities = model.roberta_batch([comment[0] for _, comment in sample])
+    with instrumentation.span('append'):
+        for (period, (text, directional, user, timestamp)), probability in zip(sample, probabilities):
+            pv.comment_sample.record(source_, period, probability)
+            pv.comment_buffer.append(text, probability, directional, source_, user, timestamp)
+
+    return pv.comment_buffer
+
+
+def write_scroll_stats(pv,source,scroll_stats):
+    """Method to write the number of scroll steps and the time we waited for the page to load (idle time) for the
+    current stock in the pandas DataFrame `pv.pd_scroll`"""
+
+    pv.pd_scroll.loc[pv.current_stock, pv.columns_scroll[0] + source] = scroll_stats['scroll_steps']
+    pv.pd_scroll.loc[pv.current_stock, pv.columns_scroll[1] + source] = round(scroll_stats['idle_time'],2)
+    if scroll_stats.get('truncated'):
+        pv.scheduler.truncate(pv.current_stock, source)
 
 
 def decorator_timer(source):
-    """Decorator to time how long a function takes to execute
+    """Decorator to time how long a function takes to execute. It opens the span of the source (see
+    `instrumentation.py`) in which the stages are timed and counts the comments added in the buffer
 
     Sources nb are in `initialise.py` (reddit, twitter and stocktwits)"""
 
     def timer(func):
         def wrapper_timer(self):
-            start_time = time.time()
-            func(self)
-            end_time = time.time()
-            elapse_time = end_time - start_time
-            self.init.pd_timer.loc[0, self.init.comment_source[source]] += elapse_time
-            return self.init.pd_stock_sentiment
+            with instrumentation.span(self.init.comment_source[source]):
+                nb_comments = len(self.init.comment_buffer)
+                value = func(self)
+                instrumentation.count(items_out=len(self.init.comment_buffer) - nb_comments)
+            return value
         return wrapper_timer
     return timer
 
@@ -246,20 +597,22 @@ class PackageMethods():
 
         PRETRAINED_MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)),os.pardir,
                                                              'lid.176.bin'))
+        import fasttext
         self.model = fasttext.load_model(PRETRAINED_MODEL_PATH)
 
     def detect_lang(self,text):
         """return `True` if `text` is in English, False otherwise`"""
 
-        #try/except in case `text` is empty, it will throw an error
-        try:
-            language = self.model.predict(text[0])[0][0].replace('__label__','')
-        except :
-            return False
+        with instrumentation.span('language detection'):
+            #try/except in case `text` is empty, it will throw an error
+            try:
+                language = self.model.predict(text[0])[0][0].replace('__label__','')
+            except :
+                return False
 
         #fasttext is not that great to detect language for twits. Anything with $ is often associated with 'pl'
         #This is why we tolerate 'pl'
         if language == 'en' or language =='pl':
             return True
         else:
-            return False
\ No newline at end of file
+            return False
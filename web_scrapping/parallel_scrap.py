@@ -0,0 +1,111 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""Module to webscrap the raw posts of all the stocks concurrently on Stocktwits and Twitter with many headless
+browsers"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import web_scrapping.package_methods as pm
+from run_control.instrumentation import instrumentation
+
+
+class ParallelScrap():
+    """Class to webscrap the raw posts (user, text) of every stock in `init.stock_dictionnary` (or in `stocks`) with
+    many headless browsers at the same time. The raw posts are stored in `init.raw_posts` and are then analysed one stock at a time
+    in the loop in `main.py` (the webscrappers use them instead of opening a browser).
+
+    Things to know:
+    - We use threads as the time is spent waiting for the browsers (sleeping, scrolling), not in python
+    - Each source (website) has its own pool of threads, capped by `init.max_browsers`, to stay polite
+    - If the webscrapping of a stock fails, it is not in `init.raw_posts` and is webscrapped again in the loop
+    """
+
+    def __init__(self,init,scrapers,stocks=None,time_ago=None):
+        """
+        Parameters
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+        `scrapers` : list
+            instances of the webscrappers (`StockTwitsApi`, `TwitsApi`) we want to run concurrently. They must have
+            a method `scrap_parameters()` and an attribute `source`
+        `stocks` : dict
+            stocks we webscrap (as `init.stock_dictionnary`). `None` for all the stocks of `init.stock_dictionnary`
+        `time_ago` : dict
+            number of hours in the past we webscrap for each stock (key). `None` to use `init.get_time_ago()`
+        """
+
+        self.init = init
+        self.scrapers = scrapers
+        self.stocks = stocks if stocks is not None else self.init.stock_dictionnary
+        self.time_ago = time_ago if time_ago is not None else {}
+
+    def __call__(self):
+        """Built-in method to webscrap all the stocks concurrently"""
+
+        self.webscrap()
+        return self.init.raw_posts
+
+    def webscrap(self):
+        """Method that fans out the stocks across the browsers of each source and collects the raw posts per stock"""
+
+        executors = {}
+        futures = {}
+        start_time = time.time()
+        for scraper in self.scrapers:
+            self.init.raw_posts[scraper.source] = {}
+            executors[scraper.source] = ThreadPoolExecutor(max_workers=self.init.max_browsers[scraper.source])
+
+        #we submit stock by stock (and not source by source) so that all the sources progress at the same time
+        for stock in self.stocks:
+            time_ago = self.time_ago.get(stock, self.init.get_time_ago(stock))
+            for scraper in self.scrapers:
+                parameters = scraper.scrap_parameters(stock,time_ago)
+                future = executors[scraper.source].submit(self.webscrap_stock,stock,scraper.source,parameters)
+                futures[future] = (scraper.source, stock)
+
+        for future in as_completed(futures):
+            source, stock = futures[future]
+            try:
+                self.init.raw_posts[source][stock] = future.result()
+            except Exception as e:
+                logging.error(f"Error when webscrapping {stock} on {source} : {e}")
+
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+        #wall time of the concurrent webscrapping in its own path : 'parallel scrap' is the parent of the spans of
+        #`self.webscrap_stock()` (sum of the time of the threads)
+        instrumentation.add_time('parallel scrap wall', time.time() - start_time)
+
+    def webscrap_stock(self,stock,source,parameters):
+        """Method run by a thread of the pool : webscrap the raw posts of `stock` on `source` in the spans
+        'parallel scrap/`stock`/`source`. The time budget of the source (see `scheduler.py`) starts with the
+        thread"""
+
+        parameters = dict(parameters, deadline=self.init.scheduler.source_deadline(source))
+        with instrumentation.span('parallel scrap'), instrumentation.span(stock), instrumentation.span(source):
+            return pm.webscrap_content(**parameters)
@@ -27,18 +27,11 @@
 
 
 from datetime import datetime, timedelta, time, date
+from itertools import zip_longest
 import time
 import pandas as pd
 import os
 import web_scrapping.package_methods as pm
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import NoSuchElementException
-from selenium.common.exceptions import StaleElementReferenceException
 import web_scrapping.package_methods as pm
 from pmaw import PushshiftAPI
 
@@ -83,6 +76,7 @@ class RedditApi_():
 
         self.api = PushshiftAPI() #the pushift API
         self.reddit_comments= [] #list that contains the comments (text only)
+        self.reddit_times = [] #time the comments were posted (epoch), in the order of `self.reddit_comments`
 
     @pm.decorator_timer(0) #0 is for reddit in `self.comment_source` in `initialise.py`
     def webscrap(self):
@@ -96,7 +90,9 @@ class RedditApi_():
 
         comments = self.api.search_comments(subreddit=self.init.subreddit, limit=self.init.limit, before=self.before,
                                        after=self.after)
-        self.reddit_comments += [comment['body'] for comment in comments if comment['body'] != ('[' + 'removed' + ']')]
+        comments = [comment for comment in comments if comment['body'] != ('[' + 'removed' + ']')]
+        self.reddit_comments += [comment['body'] for comment in comments]
+        self.reddit_times += [comment.get('created_utc') for comment in comments]
         t = 5
 
 
@@ -105,7 +101,12 @@ class RedditApi_():
 
         def wrapper_(self):
             self.reddit_dict_ = {}
-            for comment in self.reddit_comments:
+            #the time of the comments is unknown if they were loaded from the journal (`--resume`)
+            for comment, created_utc in zip_longest(self.reddit_comments, self.reddit_times):
+                #we stop once the source is settled (adaptive mode, see `sequential_test.py`) or the time budget of
+                #the source ran out (see `scheduler.py`)
+                if self.init.sequential_test.is_settled() or self.init.scheduler.is_expired():
+                    break
                 # check if the post contains the stock (keywords) we are looking for
                 is_breaking = False
                 for stock,keywords in self.init.stock_dictionnary.items():
@@ -129,6 +130,7 @@ class RedditApi_():
                                 #Make sure that the ticker is not followed or preceded by an alphanumeric character.
                                 #Ex: ticker 'ED' could be preceded by 'F' which is 'FED' and not relevant to 'ED' ticker
                                 if not left_substring.isalnum() and not right_substring.isalnum():
+                                    self.reddit_dict_['timestamp'] = created_utc
                                     func(self,comment)
                                     break # not analyzing the same post twice (in case we have more than 1 keyword)
                                     is_breaking = True
@@ -136,9 +138,10 @@ class RedditApi_():
                             break
 
 
-            self.init.pd_stock_sentiment = self.init.pd_stock_sentiment.drop_duplicates\
-                (subset=self.init.columns_sentiment[0], keep="first",ignore_index=True)
-            return self.init.pd_stock_sentiment
+            #the comments not scored yet (sample in budget mode, last batch in adaptive mode), see `pm.score_pending()`
+            pm.score_pending(self.init, self.roberta, 0)
+            #the duplicated texts are not added in `self.init.comment_buffer` (see `pm.write_values()`)
+            return self.init.comment_buffer
         return wrapper_
 
     @pm.decorator_timer(0) #0 is for reddit in `self.comment_source` in `initialise.py`
@@ -146,7 +149,6 @@ class RedditApi_():
     def write_values(self,comment):
         """Method to determine the mood of each comment (positive, negative) with a score between -1 and 1
          (-1 being the most negative and +1 being the most positive and write different values in the
-         pandas DataFrame `self.pd_stock_sentiment`"""
+         buffer `self.init.comment_buffer`"""
 
-        self.init.pd_stock_sentiment = pm.write_values(comment = comment,pv = self.init,
-                                                     model = self.roberta,source = 0,dict_ = self.reddit_dict_)
\ No newline at end of file
+        pm.write_values(comment = comment,pv = self.init,model = self.roberta,source = 0,dict_ = self.reddit_dict_)
\ No newline at end of file
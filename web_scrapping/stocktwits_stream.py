@@ -0,0 +1,178 @@
+#!/usr/local/bin/python3.7
+###############################################################################
+#
+#  The MIT License (MIT)
+#  Copyright (c) 2021 Philippe Ostiguy
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+"""It's the module to get the twits on Stocktwits with the stream API (JSON) instead of webscrapping the website"""
+
+from web_scrapping.http_client import http_client
+import logging
+from datetime import datetime, timedelta, timezone
+import web_scrapping.package_methods as pm
+from web_scrapping.package_methods import PackageMethods
+from run_control.instrumentation import instrumentation
+
+
+class StockTwitsStream():
+    """Class to get the twits of a stock with the symbol stream of the Stocktwits API and analyse their mood. It
+    returns the same results as `StockTwitsApi` without opening a browser.
+
+    Things to know:
+    - The stream returns 30 twits per page from the most recent to the oldest. We go to the next (older) page with
+    the `max` cursor until the twits are older than `init.time_ago`
+    - The directional (bullish or bearish) is read in the structured field `sentiment` of each twit
+    - The API endpoint is `init.stocktwits_api` so that we can serve recorded JSON pages locally to test it
+    (`python -m benchmarks.stream_harness`, the pages are in `benchmarks/fixtures/stocktwits`)
+    - The free API is rate limited (around 200 requests per hour), so we stop after `self.max_pages` pages
+    """
+
+    def __init__(self,init,init_sentiment):
+        """
+        Parameter
+        ----------
+        `init` : cls
+            class from the module `initialize.py` that initializes global variables for the project
+        `init_sentiment` : cls
+            class from the module `twits_analysis` with the Twitter Roberta based transformer model already initialized
+            and ready to perform sentiment analysis
+
+        Attributes
+        ----------
+        `self.stream_endpoint` : str
+            Endpoint of the symbol stream. The stock is added with `format()`
+        `self.max_pages` : int
+            Maximum number of pages we request for a stock
+        `self.time_out` : int
+            Number of seconds before a request to the API is cancelled
+        """
+
+        #We should touch these data. They come from the classes where we initialize the data
+        self.init = init #variable for the class containing the global variables for the project
+        # variable for the class with the model/transformer to analyse twits/comments
+        self.init_sentiment = init_sentiment
+
+        self.pm = PackageMethods() #initialise `PackageMethods` class
+        self.stream_endpoint = ''.join([self.init.stocktwits_api, 'streams/symbol/{}.json'])
+        self.max_pages = 100
+        self.time_out = 10
+        self.date_format = '%Y-%m-%dT%H:%M:%SZ' #format of `created_at` in the API
+        self.stock_twits = [] #contains the twits (json) fetched from the stream
+        self.twit_dictionary = {}  # dictionary with information from twits
+        self.source = self.init.comment_source[1] #name of the source in `self.comment_source` in `initialise.py`
+
+    @pm.decorator_timer(1) #1 is for stocktwits in `self.comment_source` in `initialise.py`
+    def webscrap(self):
+        """Performs all the method necessary to get the twits on stocktwits and analyse the mood of the
+        comments"""
+
+        self.stock_twits = self.get_stream(self.init.current_stock, self.init.time_ago)
+        return self.write_values()
+
+    def get_stream(self,stock,time_ago):
+        """Method that pages through the symbol stream of `stock` and returns the twits published in the last
+        `time_ago` hours
+
+        Parameters
+        ----------
+        `stock` : str
+            ticker of the stock
+        `time_ago` : int
+            Number of hours in the past we want to get the twits
+        """
+
+        search_time = datetime.utcnow() - timedelta(hours=time_ago) #`created_at` is in UTC
+        twits = []
+        twits_id = set()
+        params = {}
+
+        for page in range(self.max_pages):
+            #the time to page ran out (see `scheduler.py`), we keep the twits we have and score them
+            if self.init.scheduler.is_fetch_expired():
+                break
+            response = http_client.get(self.stream_endpoint.format(stock), params=params, timeout=self.time_out)
+            if response.status_code != 200:
+                logging.error(f"Stocktwits stream returned {response.status_code} for {stock} at page {page}")
+                break
+
+            data = response.json()
+            #the twit at the cursor is returned again in the next page
+            messages = [message for message in data.get('messages', []) if message['id'] not in twits_id]
+            if not messages:
+                break
+
+            oldest_twit = None
+            for message in messages:
+                twits_id.add(message['id'])
+                created_at = datetime.strptime(message['created_at'], self.date_format)
+                if created_at >= search_time:
+                    twits.append(message)
+                if oldest_twit is None or created_at < oldest_twit:
+                    oldest_twit = created_at
+
+            cursor = data.get('cursor', {})
+            if oldest_twit < search_time or not cursor.get('more'):
+                break
+            params = {'max' : cursor.get('max', min(twits_id))}
+
+        return twits
+
+    def loop_twits(func):
+        """Decorator to loop throught the twits we get from the stream"""
+
+        def wrapper_(self):
+            instrumentation.count(items_in=len(self.stock_twits)) #posts in, the comments kept are counted as out
+            #raw posts in the lookback window, for the posting velocity (see `lookback_planner.py`)
+            self.init.nb_posts.setdefault(self.source, {})[self.init.current_stock] = len(self.stock_twits)
+            for i, twit in enumerate(self.stock_twits):
+                #we stop once the source is settled (adaptive mode, see `sequential_test.py`) or the time budget of
+                #the source ran out (see `scheduler.py`)
+                if self.init.sequential_test.is_settled(len(self.stock_twits) - i) or self.init.scheduler.is_expired():
+                    break
+                self.twit_dictionary = {}
+                #'Bullish', 'Bearish' or None if the user didn't choose
+                sentiment = (twit.get('entities') or {}).get('sentiment') or {}
+                self.twit_dictionary[self.init.columns_sentiment[2]] = sentiment.get('basic') or ''
+                #time of the twit (`created_at` is in UTC) for the time-stratified sample (budget mode)
+                self.twit_dictionary['timestamp'] = datetime.strptime(twit['created_at'], self.date_format)\
+                    .replace(tzinfo=timezone.utc).timestamp()
+
+                #skipping non-english post
+                if not self.pm.detect_lang(twit['body']):
+                    continue
+
+                func(self, twit['body'], twit['user']['username'])
+
+            #the twits not scored yet (sample in budget mode, last batch in adaptive mode), see `pm.score_pending()`
+            pm.score_pending(self.init, self.init_sentiment, 1)
+            #the duplicates (text, user) are not added in `self.init.comment_buffer` (see `pm.write_values()`)
+            return self.init.comment_buffer
+        return wrapper_
+
+    @loop_twits
+    def write_values(self,twit,user):
+        """Method to determine if mood of each comment (positive, negative) with a score between -1 and 1
+         (-1 being the most negative and +1 being the most positive and write different values in the
+         buffer `self.init.comment_buffer`. A user is kept only once (their first twit)"""
+
+        pm.write_values(comment = twit,pv = self.init,model = self.init_sentiment,source = 1,
+                        dict_ = self.twit_dictionary,user=user,unique_user=True)
@@ -26,17 +26,10 @@
 
 """It's the module to webscrap data on Twitter"""
 
-import requests
-from datetime import datetime, timedelta, time
-import time
-from initialize import InitStockTwit
-import re
-import pandas as pd
+from datetime import datetime, timedelta
 import web_scrapping.package_methods as pm
-import os
-import sentiment_analysis as sa
-from collections import defaultdict
 from web_scrapping.package_methods import PackageMethods
+from run_control.instrumentation import instrumentation
 
 class TwitsApi():
     """Class to webscrap content on Twitter
@@ -58,14 +51,12 @@ class TwitsApi():
             Name of the class in Twitter containing the published time of a twit
         `self.class_twits` : str
             Name of the class in Twitter containing the twits (text, directional))
-        `self.time_ago` : int
-            Number of hours in the past we want to webscrape the data. The value must be 24 hours or more or it
-            the webscrapping of data will not work properly. If we want to set a value between 1 hour and 24 hours, we
-            must review the function `self.convert_time()`
+        `self.post_layout` : dict
+            layout of a twit on Twitter to extract it in the browser (see `pm.extract_posts()`). The time of each
+            twit is read in the `datetime` attribute of the element `time_selector`. We stop scrolling once the
+            oldest twit on the page is older than `init.time_ago`
         `self.stock_endpoint` : str
             Endpoint of the stock we want to webscrap
-        `self.buffer_date_` : int
-            Size of the buffer to search date for in function `self.buffer_date_`
         """
 
         # We should touch these data. They come from the classes where we initialize the data
@@ -79,14 +70,14 @@ class TwitsApi():
 
         #self.class_twits = 'css-901oao r-18jsvk2 r-37j5jr r-a023e6 r-16dba41 r-rjixqe r-bcqeeo r-bnwqim r-qvutc0'
 
-        self.buffer_date_ = 60
-        self.date_ = ''  # date if different from today in the Xpath
-        self.date__ = '' #list of date set in method `self.buffer_date()` to find the posts with the date we want
-        self.user = '' #list of user
-        self.twits = ""  # contains the twit fetched from Twitter (text, date, directional ie bullish or bearish)
+        self.post_layout = {'permalink' : 'a[href*="/status/"]', 'id_pattern' : '/status/(\\d+)',
+                            'time_selector' : 'time[datetime]', 'text_line' : 4, 'separator' : ' ',
+                            'directional' : False}
+        self.twits = []  # contains the twits fetched from Twitter (id, user, timestamp, text)
         self.twit_dictionary = {}  # dictionary with information from twits
 
         self.which_driver = 'firefox' #driver we takes to webscrap the data, firefox for twitter should be used
+        self.source = self.init.comment_source[2] #name of the source in `self.comment_source` in `initialise.py`
         self.posts_to_return = "//div[@class='{}']".format(self.class_twits)
 
     @pm.decorator_timer(2) #2 is for twitter in `self.comment_source` in `initialise.py`
@@ -94,102 +85,84 @@ class TwitsApi():
         """Performs all the method necessary to webscrap the content on twitter and analyse the mood of the
         comments"""
 
-        self.date_ = ''
-        self.date__ = ''
-        self.date_to_search = ''
-        self.buffer_date()
-        self.date_to_search = '//a[@class="{}" and ({})]'.format(self.class_time, self.date__)
-        self.twits = "" #we need to reinitialise the list which contains the comments everytime we fetch data
+        self.twits = [] #we need to reinitialise the list which contains the comments everytime we fetch data
                         #for a new stock
-        self.user = "" #same for user (as `self.twits`)
-        self.stock_endpoint = ''.join(['https://twitter.com/search?q=%24', self.init.current_stock,
-                                       '&src=typed_query&f=live'])
-        self.user,self.twits = pm.webscrap_content(which_driver = self.which_driver,posts_to_return=self.posts_to_return,
-                                         driver_parameters= self.init.driver_parameters,end_point=self.stock_endpoint,
-                                         pause_time=self.init.pause_time,date_to_search = self.date_to_search,
-                                         is_twitter= True)
+        #raw posts may already be webscrapped concurrently in `parallel_scrap.py`
+        raw_posts = self.init.raw_posts.get(self.source, {}).pop(self.init.current_stock, None)
+        if raw_posts is None and self.init.sequential_test.enabled:
+            #adaptive mode : the twits are scored while we scroll and we stop scrolling (the browser is closed with
+            #the generator) once the source is settled
+            scroll_stats = {}
+            self.twits = pm.iter_content(scroll_stats=scroll_stats,
+                                         **self.scrap_parameters(self.init.current_stock, self.init.time_ago))
+            try:
+                return self.write_values()
+            finally:
+                self.twits.close()
+                pm.write_scroll_stats(self.init,self.source,scroll_stats)
+        if raw_posts is None:
+            raw_posts = pm.webscrap_content(**self.scrap_parameters(self.init.current_stock, self.init.time_ago))
+        self.twits, scroll_stats = raw_posts
+        pm.write_scroll_stats(self.init,self.source,scroll_stats)
         return self.write_values()
 
-
-    def convert_time(self,time_ago):
-        """Method to convert time readable in the Xpath in Selenium.
+    def scrap_parameters(self,stock,time_ago):
+        """Return the parameters of `pm.webscrap_content()` to webscrap the twits of `stock` published in the last
+        `time_ago` hours. It doesn't open any browser so that the webscrapping can be done later in another thread
+        (see `parallel_scrap.py`)
 
         Parameters
         ----------
+        `stock` : str
+            ticker of the stock we webscrap
         `time_ago` : int
-            Time ago we want to webscrap the data
-        """
-
-        now = datetime.now()  # get the current datetime, this is our starting point
-        # datetime according to the number of the days ago we want
-        start_time = now - timedelta(hours=(time_ago))
-
-
-        #less than 24 hours ago, the format for dates is different than more than 24 hours.
-        #Ex: It will show as '23 hours ago' (for 23 hours ago), '1 hour ago' (for 1 hour ago)
-        # and 'Nov 29' (example) for more than 24 hours
-
-        if time_ago ==1 :
-            self.date_ = ''.join([str(time_ago), ' hour ago'])
-        elif time_ago >1 and time_ago < 24:
-            self.date_ = ''.join([str(time_ago),' hours ago'])
-        else:
-            # Write the day in Xpath format for Twitter
-            text = [str(start_time.strftime('%b')), str(start_time.day)]
-            self.date_ = (' '.join(text))
-
-    def buffer_date(self):
-        """ Method to make a list of date we can click on. It's a buffer to make sure that we don't scroll forever.
-         Ex : We are looking for 'Nov 10' on a stock, but the volume is low, we may find data before, but not exactly
-         on November 10. It depends on the size of the buffer `self.buffer_date_`
+            Number of hours in the past we want to webscrape the data
         """
 
-        iteration = 1
-        j=0
-        x= 0
-        tempo_time = self.init.time_ago
-        while iteration < self.buffer_date_:
-            #less than 24 hours
-            if (iteration - 1 + self.init.time_ago)<24:
-                self.convert_time(iteration-1+self.init.time_ago)
-                x = iteration - 1
-            else:
-                self.convert_time(j*24 + self.init.time_ago + x)  # multiply iteration by 24 to have in day
-                j+=1
-
-            if iteration == 1:
-                self.date__ += ''.join(['@aria-label = ','"', self.date_, '"'])
-            else:
-                self.date__ += ''.join([' or @aria-label = ','"', self.date_, '"'])
-            iteration += 1
+        search_time = datetime.now() - timedelta(hours=time_ago)
+        stock_endpoint = ''.join(['https://twitter.com/search?q=%24', stock, '&src=typed_query&f=live'])
+        return {'which_driver' : self.which_driver, 'posts_to_return' : self.posts_to_return,
+                'driver_parameters' : self.init.driver_parameters, 'end_point' : stock_endpoint,
+                'pause_time' : self.init.pause_time, 'search_time' : search_time,
+                'post_layout' : self.post_layout, 'lean' : self.init.lean_profile.get(self.source, False),
+                'deadline' : self.init.scheduler.fetch_deadline,
+                'is_twitter' : True}
 
     def loop_twits(func):
         """Decorator to loop throught the comments that we webscrap"""
 
         def wrapper_(self):
-            x = 0
+            #the twits are already unique (keyed by their status id when we scroll in `pm.new_posts()`) and the
+            #duplicated texts are not added in `self.init.comment_buffer` (see `pm.write_values()`)
+            #`self.twits` is a generator in adaptive mode, the posts in are counted while we loop
+            nb_twits = 0
             for twit in self.twits:
+                #we stop once the source is settled (adaptive mode, see `sequential_test.py`) or the time budget of
+                #the source ran out (see `scheduler.py`)
+                if (self.init.sequential_test.is_settled(len(self.twits) - nb_twits
+                                                         if isinstance(self.twits, list) else 0)
+                        or self.init.scheduler.is_expired()):
+                    break
+                nb_twits += 1
                 self.twit_dictionary = {}  # dictionary with information from twits
+                #time of the twit for the time-stratified sample (budget mode)
+                self.twit_dictionary['timestamp'] = twit['timestamp'].timestamp() if twit['timestamp'] else None
                 #skipping non-english post
-                if not self.pm.detect_lang(twit):
+                if not self.pm.detect_lang(twit['text']):
                     continue
-                func(self,twit,self.user[x])
-                x+=1
-
-            #remove duplicate post (text)
-            self.init.pd_stock_sentiment = self.init.pd_stock_sentiment.drop_duplicates\
-                (subset=self.init.columns_sentiment[0], keep="first",ignore_index=True)
-            #remove duplicate user's post
-            self.init.pd_stock_sentiment = self.init.pd_stock_sentiment.drop_duplicates\
-                (subset=self.init.columns_sentiment[4], keep="first",ignore_index=True)
-            return self.init.pd_stock_sentiment
+                func(self,twit['text'],twit['user'])
+
+            #the twits not scored yet (sample in budget mode, last batch in adaptive mode), see `pm.score_pending()`
+            pm.score_pending(self.init, self.init_sentiment, 2)
+            instrumentation.count(items_in=nb_twits) #posts in, the comments kept are counted as out
+            return self.init.comment_buffer
         return wrapper_
 
     @loop_twits
     def write_values(self,twit,user):
         """Method to determine if mood of each comment (positive, negative) with a score between -1 and 1
          (-1 being the most negative and +1 being the most positive and write different values in the
-         pandas DataFrame `self.pd_stock_sentiment`"""
+         buffer `self.init.comment_buffer`"""
 
-        self.init.pd_stock_sentiment = pm.write_values(user=user,comment = twit,pv = self.init,source = 2,
-                                                       model = self.init_sentiment,dict_ = self.twit_dictionary)
\ No newline at end of file
+        pm.write_values(user=user,comment = twit,pv = self.init,source = 2,model = self.init_sentiment,
+                        dict_ = self.twit_dictionary)
\ No newline at end of file